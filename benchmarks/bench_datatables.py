@@ -0,0 +1,69 @@
+# coding: utf-8
+"""
+Compares the time to render the data of a DataTables row index table column by column with rendering it row by row.
+
+Usage:
+
+    python benchmarks/bench_datatables.py --rows 50000 --repeat 3
+"""
+import argparse
+import timeit
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from fireant.slicer.transformers import DataTablesRowIndexTransformer
+
+
+def make_dataframe(rows):
+    random = np.random.RandomState(0)
+    n_categories = 10
+    n_dates = max(rows // n_categories, 1)
+
+    index = pd.MultiIndex.from_product([pd.date_range('2000-01-01', periods=n_dates, freq='H'),
+                                        ['cat%d' % i for i in range(n_categories)]],
+                                       names=['date', 'category'])
+    dataframe = pd.DataFrame({
+        'clicks': random.randint(0, 1000, len(index)),
+        'cost': random.normal(100, 20, len(index)),
+        'ctr': random.random_sample(len(index)),
+    }, index=index)[:rows]
+    dataframe.loc[dataframe.index[::13], 'cost'] = np.nan
+
+    return dataframe
+
+
+display_schema = {
+    'metrics': OrderedDict([
+        ('clicks', {'label': 'Clicks'}),
+        ('cost', {'label': 'Cost', 'precision': 2, 'prefix': '$'}),
+        ('ctr', {'label': 'CTR', 'precision': 4, 'suffix': '%'}),
+    ]),
+    'dimensions': OrderedDict([
+        ('date', {'label': 'Date'}),
+        ('category', {'label': 'Category', 'display_options': {'cat0': 'Category 0'}}),
+    ]),
+    'references': OrderedDict(),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    tx = DataTablesRowIndexTransformer()
+    dataframe = tx._prepare_dataframe(make_dataframe(args.rows), display_schema['dimensions'])
+
+    if repr(tx._render_data(dataframe, display_schema)) != repr(tx._render_data_by_row(dataframe, display_schema)):
+        raise AssertionError('The column and row rendering paths returned different results.')
+
+    for name, render in [('by row', tx._render_data_by_row), ('by column', tx._render_data)]:
+        best = min(timeit.repeat(lambda: render(dataframe, display_schema), number=1, repeat=args.repeat))
+        print('{name:>10}: {time:.3f}s for {rows} rows'.format(name=name, time=best, rows=len(dataframe)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# coding: utf-8
+"""
+Measures the time to import fireant and construct a slicer in a new Python process, as paid by short-lived worker
+processes and command line jobs.  Each measurement runs in a separate interpreter so that nothing is already imported.
+
+The benchmark fails with a non-zero exit code if pandas, numpy or matplotlib are imported by constructing a slicer, or
+if the median time exceeds --max-seconds, so that it can be used to guard against regressions.
+
+Usage:
+
+    python benchmarks/bench_import.py --repeat 10 --max-seconds 0.5
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+SCRIPT = '''
+import json
+import sys
+import timeit
+
+start = timeit.default_timer()
+
+from fireant.database.vertica import Vertica
+from fireant.slicer import *
+from pypika import Table
+
+imported = timeit.default_timer()
+
+table = Table('analytics')
+slicer = Slicer(
+    table,
+    Vertica(),
+    metrics=[Metric('metric_%d' % i) for i in range(100)],
+    dimensions=[CategoricalDimension('dimension_%d' % i) for i in range(20)] + [DatetimeDimension('date')],
+)
+
+constructed = timeit.default_timer()
+
+json.dump({
+    'import': imported - start,
+    'construct': constructed - imported,
+    'modules': [module for module in ['pandas', 'numpy', 'matplotlib'] if module in sys.modules],
+}, sys.stdout)
+'''
+
+
+def measure():
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT])
+    return json.loads(output.decode('utf-8'))
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Fails if the median time to import and construct a slicer is greater')
+    args = parser.parse_args()
+
+    # The first process compiles the modules, which is not measured
+    measure()
+    results = [measure() for _ in range(args.repeat)]
+
+    import_time = median([result['import'] for result in results])
+    construct_time = median([result['construct'] for result in results])
+    modules = sorted({module for result in results for module in result['modules']})
+
+    print('import     {:>8.4f}s'.format(import_time))
+    print('construct  {:>8.4f}s'.format(construct_time))
+    print('total      {:>8.4f}s'.format(import_time + construct_time))
+    print('imported   {}'.format(', '.join(modules) or '-'))
+
+    if modules:
+        sys.exit('Constructing a slicer imported {}'.format(', '.join(modules)))
+
+    if args.max_seconds is not None and import_time + construct_time > args.max_seconds:
+        sys.exit('Importing fireant and constructing a slicer took longer than {}s'.format(args.max_seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# coding: utf-8
+"""
+Measures the memory used by slicers with many metrics and dimensions, as paid by processes which build one slicer per
+tenant from the same definitions.  The memory is traced with tracemalloc while the definitions are created and the
+slicers are constructed.
+
+The first slicer pays for its metrics, dimensions and joins.  Further slicers which are built from equal definitions
+share the interned records of the first one, so their cost should be little more than their dictionaries.
+
+The benchmark fails with a non-zero exit code if the memory used by each further slicer exceeds --max-bytes, so that
+it can be used to guard against regressions.
+
+Usage:
+
+    python benchmarks/bench_memory.py --elements 1000 --slicers 20 --max-bytes 200000
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+
+from fireant.database.vertica import Vertica
+from fireant.slicer import *
+from pypika import Tables, functions as fn
+
+
+def make_slicer(elements):
+    table, join_table = Tables('analytics', 'accounts')
+    n_dimensions = elements // 5
+    n_metrics = elements - n_dimensions
+
+    return Slicer(
+        table,
+        Vertica(),
+        joins=[Join('account', join_table, table.account_id == join_table.id)],
+        metrics=[Metric('metric_%d' % i, definition=fn.Sum(table.field('metric_%d' % i)), precision=2, suffix='%')
+                 for i in range(n_metrics)],
+        dimensions=[CategoricalDimension('dimension_%d' % i,
+                                         definition=table.field('dimension_%d' % i),
+                                         display_options=[DimensionValue('a'), DimensionValue('b')])
+                    for i in range(n_dimensions - 1)] + [
+                       UniqueDimension('account', definition=join_table.id, display_field=join_table.name,
+                                       joins=['account'])
+                   ],
+    )
+
+
+def measure(elements, n_slicers):
+    gc.collect()
+    tracemalloc.start()
+
+    start, _ = tracemalloc.get_traced_memory()
+    slicers = [make_slicer(elements)]
+    first, _ = tracemalloc.get_traced_memory()
+    slicers += [make_slicer(elements) for _ in range(n_slicers - 1)]
+    gc.collect()
+    total, _ = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    return first - start, (total - first) / max(n_slicers - 1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--elements', type=int, default=1000,
+                        help='The number of metrics and dimensions in each slicer')
+    parser.add_argument('--slicers', type=int, default=20)
+    parser.add_argument('--max-bytes', type=int, default=None,
+                        help='Fails if each slicer after the first uses more memory')
+    args = parser.parse_args()
+
+    first, further = measure(args.elements, args.slicers)
+
+    print('elements       {:>10d}'.format(args.elements))
+    print('first slicer   {:>10.1f} KiB'.format(first / 1024.))
+    print('each further   {:>10.1f} KiB'.format(further / 1024.))
+
+    if args.max_bytes is not None and further > args.max_bytes:
+        sys.exit('Each slicer used {:.0f} bytes, more than {}'.format(further, args.max_bytes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+# coding: utf-8
+"""
+Measures the overhead of each stage of the slicer request pipeline separately from the database.  The queries are
+executed against a fake database which returns a synthetic data frame of the requested size so only the time spent in
+fireant is measured.
+
+The stages are:
+
+* schema: building the query, operation and display schemas in the slicer manager, without the memoized schemas
+* schema_memoized: the same with the memoized schemas
+* render_sql: rendering the SQL query with PyPika
+* query_data: loading the results from the fake database and formatting the data frame
+* post_process: performing the post-processing operations
+* correct_dimension_level_order: ordering the index levels and columns for the display schema
+* transform: each transformer of each bundle in ``fireant.slicer.transformers.bundles``
+
+Usage:
+
+    python benchmarks/bench_pipeline.py --rows 1000 10000 --dimensions 1 2 --output results.json
+
+    # Compare with the results of a previous release and fail if any stage is more than 20% slower
+    python benchmarks/bench_pipeline.py --output new.json --compare old.json --threshold 1.2
+"""
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from fireant import utils
+from fireant.database import Database
+from fireant.database.vertica import Round
+from fireant.slicer import *
+from fireant.slicer.operations import CumSum, L1Loss
+from fireant.slicer.queries import QueryManager
+from fireant.slicer.transformers import bundles, TransformationException
+from pypika import Table
+
+DIMENSIONS = ['date', 'device', 'account', 'age']
+METRICS = ['clicks', 'cost', 'revenue']
+
+# The number of distinct values of each dimension except for date, which has as many values as needed for the rows
+CARDINALITY = {'device': 3, 'account': 20, 'age': 10}
+
+
+class BenchmarkDatabase(Database):
+    """
+    A database which returns a copy of a prepared data frame for every query.
+    """
+
+    def __init__(self, dataframe=None):
+        self.dataframe = dataframe
+
+    def round_date(self, field, interval):
+        return Round(field, interval)
+
+    def fetch_dataframe(self, query, dtypes=None):
+        return self.dataframe.copy()
+
+
+def make_slicer(database):
+    analytics = Table('analytics')
+    return Slicer(
+        analytics,
+        database,
+
+        metrics=[
+            Metric('clicks', 'Clicks'),
+            Metric('cost', 'Cost', precision=2, prefix='$'),
+            Metric('revenue', 'Revenue', precision=2, prefix='$'),
+        ],
+
+        dimensions=[
+            DatetimeDimension('date', 'Date', definition=analytics.dt),
+            CategoricalDimension('device', 'Device', definition=analytics.device,
+                                 display_options=[DimensionValue('desktop', 'Desktop'),
+                                                  DimensionValue('mobile', 'Mobile'),
+                                                  DimensionValue('tablet', 'Tablet')]),
+            UniqueDimension('account', 'Account', definition=analytics.account_id,
+                            display_field=analytics.account_name),
+            ContinuousDimension('age', 'Age', definition=analytics.age),
+        ],
+    )
+
+
+def make_dataframe(rows, dimensions):
+    """
+    Returns a data frame with the columns returned by the database for a request with the given dimensions and all of
+    the metrics.
+    """
+    random = np.random.RandomState(0)
+
+    other_values = {
+        'device': ['desktop', 'mobile', 'tablet'],
+        'account': list(range(CARDINALITY['account'])),
+        'age': list(range(18, 18 + CARDINALITY['age'])),
+    }
+    other_size = int(np.prod([CARDINALITY[key] for key in dimensions if key != 'date'] or [1]))
+    dates = pd.date_range('2000-01-01', periods=-(-rows // other_size), freq='H')
+
+    index = pd.MultiIndex.from_product([dates if key == 'date' else other_values[key]
+                                        for key in dimensions],
+                                       names=dimensions)
+    dataframe = index.to_series().reset_index()[list(dimensions)][:rows]
+
+    if 'account' in dimensions:
+        position = list(dataframe.columns).index('account') + 1
+        dataframe.insert(position, 'account_display', ['Account %d' % account
+                                                        for account in dataframe['account']])
+
+    dataframe['clicks'] = random.randint(0, 1000, len(dataframe))
+    dataframe['cost'] = random.normal(100, 20, len(dataframe))
+    dataframe['revenue'] = random.normal(150, 40, len(dataframe))
+    dataframe.loc[dataframe.index[::13], 'cost'] = np.nan
+
+    return dataframe
+
+
+def time_stage(func, repeat):
+    times = timeit.repeat(func, number=1, repeat=repeat)
+    return {'best': min(times), 'median': float(np.median(times))}
+
+
+def run_scenario(rows, n_dimensions, repeat, transformers):
+    dimensions = DIMENSIONS[:n_dimensions]
+    database = BenchmarkDatabase(make_dataframe(rows, dimensions))
+    slicer = make_slicer(database)
+    manager = slicer.manager
+
+    request = dict(metrics=METRICS, dimensions=dimensions, metric_filters=[], dimension_filters=[], references=[],
+                   operations=[CumSum('clicks'), L1Loss('revenue', 'cost')])
+
+    def build_schemas():
+        return (manager.data_query_schema(**request),
+                manager.operation_schema(request['operations']),
+                manager.display_schema(metrics=request['metrics'], dimensions=request['dimensions'],
+                                       references=request['references'], operations=request['operations']))
+
+    def build_schemas_cold():
+        manager._schema_memo.clear()
+        return build_schemas()
+
+    query_schema, operation_schema, display_schema = build_schemas()
+    sql_schema = {key: value for key, value in query_schema.items() if key not in ('database', 'dtypes')}
+
+    dataframe = manager.query_data(**query_schema)
+    processed = manager.post_process(dataframe, operation_schema)
+    ordered = utils.correct_dimension_level_order(processed, display_schema)
+
+    stages = [
+        ('schema', None, build_schemas_cold),
+        ('schema_memoized', None, build_schemas),
+        ('render_sql', None, lambda: QueryManager._data_querystring(manager, **sql_schema)),
+        ('query_data', None, lambda: manager.query_data(**query_schema)),
+        ('post_process', None, lambda: manager.post_process(dataframe, operation_schema)),
+        ('correct_dimension_level_order', None,
+         lambda: utils.correct_dimension_level_order(processed, display_schema)),
+    ]
+
+    skipped = []
+    for bundle_key, bundle in sorted(bundles.items()):
+        for tx_key, tx in sorted(bundle.items()):
+            name = '{}.{}'.format(bundle_key, tx_key)
+            if transformers and name not in transformers:
+                continue
+
+            try:
+                tx.prevalidate_request(slicer, **dict(request, dimensions=list(dimensions)))
+                tx.transform(ordered, display_schema)
+            except (TransformationException, ImportError) as e:
+                # The transformer does not support the request or its optional dependencies are not installed
+                skipped.append(dict(stage='transform', transformer=name, rows=rows, dimensions=n_dimensions,
+                                    skipped=str(e)))
+                continue
+            except Exception as e:
+                skipped.append(dict(stage='transform', transformer=name, rows=rows, dimensions=n_dimensions,
+                                    skipped='{}: {}'.format(type(e).__name__, e)))
+                continue
+
+            stages.append(('transform', name, lambda tx=tx: tx.transform(ordered, display_schema)))
+
+    for stage, transformer, func in stages:
+        result = dict(stage=stage, transformer=transformer, rows=rows, dimensions=n_dimensions)
+        result.update(time_stage(func, repeat))
+        yield result
+
+    for result in skipped:
+        yield result
+
+
+def result_key(result):
+    return result['stage'], result['transformer'], result['rows'], result['dimensions']
+
+
+def format_result(result):
+    name = result['transformer'] or result['stage']
+    if 'skipped' in result:
+        return '{rows:>8} rows {dimensions} dims  {name:<36} skipped: {reason}'.format(
+            name=name, reason=result['skipped'].split('.')[0], **result)
+    return '{rows:>8} rows {dimensions} dims  {name:<36} {best:>10.4f}s'.format(name=name, **result)
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the stages which are slower than in the baseline by more than the threshold ratio.
+
+    :return:
+        The number of regressions.
+    """
+    baseline = {result_key(result): result
+                for result in baseline['results']
+                if 'best' in result}
+
+    regressions = 0
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None or 'best' not in result or not previous['best']:
+            continue
+
+        ratio = result['best'] / previous['best']
+        if threshold < ratio:
+            regressions += 1
+            print('REGRESSION {result} ({ratio:.2f}x, was {previous:.4f}s)'.format(
+                result=format_result(result), ratio=ratio, previous=previous['best']))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--dimensions', type=int, nargs='+', default=[1, 2, 3, 4], choices=[1, 2, 3, 4])
+    parser.add_argument('--transformers', nargs='+', default=None,
+                        help='Only benchmark these transformers, for example datatables.row_index_table')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--label', default=None, help='A label for the results, such as the release version')
+    parser.add_argument('--output', default=None, help='Saves the results to this JSON file')
+    parser.add_argument('--compare', default=None, help='Compares the results to a previously saved JSON file')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='The slowdown ratio reported as a regression when comparing results')
+    args = parser.parse_args()
+
+    # Deprecation warnings from pandas would be printed for each repetition
+    warnings.simplefilter('ignore')
+
+    results = []
+    for rows in args.rows:
+        for n_dimensions in args.dimensions:
+            for result in run_scenario(rows, n_dimensions, args.repeat, args.transformers):
+                print(format_result(result))
+                results.append(result)
+
+    output = {
+        'metadata': {
+            'label': args.label,
+            'date': datetime.datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# coding: utf-8
+"""
+Measures the post-processing operations of the slicer (cumulative sums and means, L1 and L2 loss) on data frames with a
+multi-index, with and without references.  The operations are compared to computing an expanding window in each group
+with ``groupby().apply()`` for each reference, which is how they were computed in previous releases.
+
+Usage:
+
+    python benchmarks/bench_postprocessing.py --rows 1000000 --groups 100 --references 0 2
+"""
+import argparse
+import timeit
+import warnings
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from fireant.slicer.operations import CumMean, CumSum, L1Loss, L2Loss
+from fireant.slicer.postprocessors import OperationManager, value_functions
+
+OPERATIONS = [CumSum('clicks'), CumMean('clicks'), L1Loss('revenue', 'cost'), L2Loss('revenue', 'cost')]
+
+expanding_functions = {
+    'cumsum': lambda x: x.expanding(min_periods=1).sum(),
+    'cummean': lambda x: x.expanding(min_periods=1).mean(),
+    'l1loss': lambda x: x.abs().expanding(min_periods=1).mean(),
+    'l2loss': lambda x: x.pow(2).expanding(min_periods=1).mean(),
+}
+
+
+def groupby_apply(dataframe, operation_schema):
+    """
+    Performs the operations with an expanding window in each group, one reference at a time.
+    """
+    dataframe = dataframe.copy()
+
+    for schema in operation_schema:
+        key = schema['key']
+        references = (list(OrderedDict.fromkeys(dataframe.columns.get_level_values(0)))
+                      if isinstance(dataframe.columns, pd.MultiIndex)
+                      else [None])
+
+        for reference in references:
+            metric_df = value_functions[key](dataframe, schema, reference=reference)
+            operation_key = ('{}_{}'.format(metric_df.name, key)
+                             if reference is None
+                             else (reference, '{}_{}'.format(metric_df.name[1], key)))
+
+            unstack_levels = list(range(1, len(dataframe.index.levels)))
+            dataframe[operation_key] = metric_df.groupby(level=unstack_levels, group_keys=False) \
+                .apply(expanding_functions[key])
+
+    return dataframe
+
+
+def make_dataframe(rows, groups, references):
+    random = np.random.RandomState(0)
+
+    dates = pd.date_range('2000-01-01', periods=-(-rows // groups), freq='H')
+    index = pd.MultiIndex.from_product([dates, ['group_%d' % i for i in range(groups)]], names=['date', 'group'])[:rows]
+
+    metrics = ['clicks', 'cost', 'revenue']
+    dataframe = pd.DataFrame(random.normal(100, 20, (len(index), len(metrics))), index=index, columns=metrics)
+    dataframe.iloc[::13, 1] = np.nan
+
+    if not references:
+        return dataframe
+
+    return pd.concat([dataframe] * (references + 1), axis=1,
+                     keys=[''] + ['reference_%d' % i for i in range(references)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--groups', type=int, default=100, help='The number of values of the second index level')
+    parser.add_argument('--references', type=int, nargs='+', default=[0, 2])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-baseline', action='store_true', help='Skips the groupby().apply() baseline')
+    args = parser.parse_args()
+
+    # Deprecation warnings from pandas would be printed for each repetition
+    warnings.simplefilter('ignore')
+
+    manager = OperationManager()
+    for rows in args.rows:
+        for references in args.references:
+            dataframe = make_dataframe(rows, args.groups, references)
+
+            for operation in OPERATIONS:
+                operation_schema = [operation.schemas()]
+                name = '{rows:>8} rows {references} refs  {operation:<8}'.format(rows=rows, references=references,
+                                                                                 operation=operation.key)
+
+                best = min(timeit.repeat(lambda: manager.post_process(dataframe, operation_schema),
+                                         number=1, repeat=args.repeat))
+                if args.skip_baseline:
+                    print('{name} {best:>10.4f}s'.format(name=name, best=best))
+                    continue
+
+                baseline = min(timeit.repeat(lambda: groupby_apply(dataframe, operation_schema),
+                                             number=1, repeat=args.repeat))
+                print('{name} {best:>10.4f}s  groupby().apply() {baseline:>10.4f}s  ({ratio:.1f}x)'.format(
+                    name=name, best=best, baseline=baseline, ratio=baseline / best))
+
+
+if __name__ == '__main__':
+    main()
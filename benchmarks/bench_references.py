@@ -0,0 +1,71 @@
+# coding: utf-8
+"""
+Measures the time to build the SQL for a request with 1 to 4 references (WoW, MoM, QoQ and YoY) on a date dimension
+with several joined dimensions and filters.
+
+Usage:
+
+    python benchmarks/bench_references.py --number 20 --repeat 3
+"""
+import argparse
+import timeit
+from collections import OrderedDict
+from datetime import date
+
+from fireant.slicer.queries import QueryManager
+from fireant.tests.database.mock_database import TestDatabase
+from pypika import Tables, JoinType, functions as fn
+
+analytics, accounts, campaigns = Tables('analytics', 'accounts', 'campaigns')
+database = TestDatabase()
+
+
+def build_request(references):
+    dt = analytics.dt
+
+    return dict(
+        table=analytics,
+        joins=[
+            (accounts, analytics.account_id == accounts.id, JoinType.left),
+            (campaigns, analytics.campaign_id == campaigns.id, JoinType.left),
+        ],
+        metrics=OrderedDict([
+            ('clicks', fn.Sum(analytics.clicks)),
+            ('cost', fn.Sum(analytics.cost)),
+            ('roi', fn.Sum(analytics.revenue) / fn.Sum(analytics.cost)),
+            ('cpc', fn.Sum(analytics.cost) / fn.Sum(analytics.clicks)),
+        ]),
+        dimensions=OrderedDict([
+            ('date', database.round_date(dt, 'DD')),
+            ('account', fn.Coalesce(accounts.name, 'None')),
+            ('campaign', fn.Coalesce(campaigns.name, 'None')),
+            ('device', analytics.device),
+        ]),
+        mfilters=[fn.Sum(analytics.clicks) > 10],
+        dfilters=[
+            dt[date(2000, 1, 1):date(2000, 3, 1)],
+            analytics.device.isin(['desktop', 'mobile']),
+            accounts.name.like('a%'),
+        ],
+        references=OrderedDict((key, 'date') for key in ['wow', 'mom', 'qoq', 'yoy'][:references]),
+        rollup=[],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    manager = QueryManager()
+    for references in range(1, 5):
+        request = build_request(references)
+        best = min(timeit.repeat(lambda: manager._build_data_query(**request),
+                                 number=args.number, repeat=args.repeat))
+        print('{references} reference(s): {time:.3f}ms per query'.format(references=references,
+                                                                          time=1000 * best / args.number))
+
+
+if __name__ == '__main__':
+    main()
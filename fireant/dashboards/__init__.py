@@ -1,4 +1,4 @@
 # coding: utf-8
 
-from .schemas import (WidgetGroup, LineChartWidget, BarChartWidget, ColumnChartWidget, RowIndexTableWidget,
-                      ColumnIndexTableWidget)
+from .schemas import (Dashboard, WidgetGroup, LineChartWidget, BarChartWidget, ColumnChartWidget,
+                      RowIndexTableWidget, ColumnIndexTableWidget)
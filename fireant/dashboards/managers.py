@@ -1,4 +1,6 @@
 # coding: utf-8
+from collections import OrderedDict
+
 import pandas as pd
 
 from fireant import utils
@@ -9,23 +11,36 @@ class WidgetGroupManager(object):
         self.widget_group = widget_group
 
     def render(self, dimensions=None, metric_filters=None, dimension_filters=None, references=None, operations=None):
-        combined_dimensions = utils.filter_duplicates(self.widget_group.dimensions + (dimensions or []))
-        combined_references = utils.filter_duplicates(self.widget_group.references + (references or []))
-        combined_operations = utils.filter_duplicates(self.widget_group.operations + (operations or []))
-
-        dataframe = self.widget_group.slicer.manager.data(
-            metrics=[metric
-                     for widget in self.widget_group.widgets
-                     for metric in widget.metrics],
-            dimensions=combined_dimensions,
-            metric_filters=metric_filters or [],
-            dimension_filters=self.widget_group.dimension_filters + (dimension_filters or []),
-            references=combined_references,
-            operations=combined_operations,
-        )
+        request = self._request(dimensions, metric_filters, dimension_filters, references, operations)
+
+        dataframe = self.widget_group.slicer.manager.data(metrics=self._metrics(), **request)
+
+        return self._transform(dataframe, request)
+
+    def _request(self, dimensions=None, metric_filters=None, dimension_filters=None, references=None,
+                 operations=None):
+        """
+        Combines the request parameters with those defined in the widget group.
 
+        :return:
+            A dict of the parameters for a slicer request, except for the metrics.
+        """
+        return {
+            'dimensions': utils.filter_duplicates(self.widget_group.dimensions + (dimensions or [])),
+            'metric_filters': metric_filters or [],
+            'dimension_filters': self.widget_group.dimension_filters + (dimension_filters or []),
+            'references': utils.filter_duplicates(self.widget_group.references + (references or [])),
+            'operations': utils.filter_duplicates(self.widget_group.operations + (operations or [])),
+        }
+
+    def _metrics(self):
+        return [metric
+                for widget in self.widget_group.widgets
+                for metric in widget.metrics]
+
+    def _transform(self, dataframe, request):
         return list(self._transform_widgets(self.widget_group.widgets, dataframe,
-                                            combined_dimensions, combined_references))
+                                            request['dimensions'], request['references']))
 
     def _transform_widgets(self, widgets, dataframe, dimensions, references):
         for widget in widgets:
@@ -44,3 +59,92 @@ class WidgetGroupManager(object):
 
             widget_df = utils.correct_dimension_level_order(pd.DataFrame(dataframe[widget_columns]), display_schema)
             yield widget.transformer.transform(widget_df, display_schema)
+
+
+class DashboardManager(object):
+    def __init__(self, dashboard):
+        self.dashboard = dashboard
+
+    def render(self, dimensions=None, metric_filters=None, dimension_filters=None, references=None, operations=None):
+        """
+        Renders all of the widget groups in the dashboard with as few queries as possible.  The parameters are added to
+        the request of each widget group in the same way as in ``WidgetGroupManager.render``.
+
+        Widget groups which use the same slicer and request the same dimensions, filters, references and operations are
+        combined into a single slicer request for the metrics of all of their widgets.  The remaining requests are
+        executed concurrently and the results are split back out to the widgets of each group.
+
+        :return:
+            A list containing the rendered widgets of each widget group, in the same order as the widget groups.
+        """
+        requests = [widget_group.manager._request(dimensions, metric_filters, dimension_filters, references,
+                                                  operations)
+                    for widget_group in self.dashboard.widget_groups]
+
+        plan = self._plan(self.dashboard.widget_groups, requests)
+        dataframes = self._execute(list(plan.values()))
+
+        results = [None] * len(requests)
+        for (widget_groups, slicer, metrics, request), dataframe in zip(plan.values(), dataframes):
+            for idx, widget_group in widget_groups:
+                results[idx] = widget_group.manager._transform(dataframe, request)
+
+        return results
+
+    def _plan(self, widget_groups, requests):
+        """
+        Groups the widget groups by their request.
+
+        :return:
+            An OrderedDict with a tuple for each distinct slicer request, containing the list of the indices and
+            widget groups using it, the slicer, the combined metrics of the widget groups and the request parameters.
+        """
+        plan = OrderedDict()
+        for idx, (widget_group, request) in enumerate(zip(widget_groups, requests)):
+            slicer = widget_group.slicer
+            metrics = widget_group.manager._metrics()
+            key = self._request_key(slicer, metrics, request)
+
+            if key not in plan:
+                plan[key] = ([], slicer, [], request)
+
+            plan[key][0].append((idx, widget_group))
+            plan[key][2].extend(metrics)
+
+        return plan
+
+    @staticmethod
+    def _request_key(slicer, metrics, request):
+        """
+        Returns a key which is equal for requests to the same slicer that only differ by their metrics.  The query
+        without any metrics is used so that dimensions and filters which are defined differently but produce the same
+        query, are also matched.  The joins are compared separately since these depend on the metrics.
+        """
+        query_schema = slicer.manager.data_query_schema(metrics=utils.filter_duplicates(metrics), **request)
+        query_schema.pop('database')
+        query_schema.pop('dtypes')
+        joins = frozenset(query_schema.pop('joins'))
+        query_schema['metrics'] = {}
+
+        return (id(slicer),
+                tuple(slicer.manager._data_querystrings(**query_schema)),
+                joins,
+                repr(slicer.manager.operation_schema(request['operations'])))
+
+    def _execute(self, requests):
+        """
+        Executes the slicer requests concurrently, each in its own thread.  A separate thread pool from the one of the
+        database is used since the slicer requests may use the database's thread pool themselves.
+        """
+
+        def data(request):
+            widget_groups, slicer, metrics, request_params = request
+            return slicer.manager.data(metrics=metrics, **request_params)
+
+        if len(requests) < 2:
+            return [data(request) for request in requests]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+            return list(executor.map(data, requests))
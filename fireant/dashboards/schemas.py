@@ -1,5 +1,5 @@
 # coding: utf-8
-from fireant.dashboards.managers import WidgetGroupManager
+from fireant.dashboards.managers import WidgetGroupManager, DashboardManager
 
 from fireant.slicer.transformers import *
 
@@ -64,3 +64,15 @@ class WidgetGroup(object):
         self.operations = operations or []
 
         self.manager = WidgetGroupManager(self)
+
+
+class Dashboard(object):
+    """
+    The `Dashboard` class represents a page of widget groups which are rendered together.  Widget groups which can be
+    served by the same slicer request are queried only once.
+    """
+
+    def __init__(self, widget_groups=None):
+        self.widget_groups = widget_groups or []
+
+        self.manager = DashboardManager(self)
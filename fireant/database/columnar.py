@@ -0,0 +1,115 @@
+# coding: utf-8
+"""
+Builds data frames from query results column by column instead of row by row.
+
+``pandas.read_sql`` creates an object column of Python values for each column of the result and then infers the type of
+each column from its values.  When the types of the columns are known in advance, each column is copied once into a
+numpy array of its type instead.  Results which are returned by the driver as an Arrow table are converted without
+creating Python objects for the values at all.
+"""
+import re
+from collections import OrderedDict
+
+# Table.to_pandas supports split_blocks and self_destruct since pyarrow 0.17, which does not support pandas before 0.23
+MIN_PYARROW_VERSION = (0, 17)
+MIN_PANDAS_VERSION = (0, 23)
+
+
+def version_tuple(version):
+    """
+    Returns the major and minor version of a version string as a tuple of integers, for example (0, 18) for '0.18.1'.
+    """
+    return tuple(int(part) for part in re.findall(r'\d+', version)[:2])
+
+
+def arrow_available():
+    """
+    Returns whether the installed versions of pyarrow and pandas can convert Arrow tables with ``arrow_to_dataframe``.
+    Arrow is not used with older versions, including the version of pandas which fireant currently depends on.
+    """
+    try:
+        import pandas as pd
+        import pyarrow as pa
+    except ImportError:
+        return False
+
+    return (version_tuple(pa.__version__) >= MIN_PYARROW_VERSION
+            and version_tuple(pd.__version__) >= MIN_PANDAS_VERSION)
+
+
+def column_names(description):
+    """
+    Returns the names of the columns of a result from a DB-API cursor description.  Some drivers return the names as
+    bytes which are decoded.
+    """
+    return [column[0].decode('utf-8') if isinstance(column[0], bytes) else column[0]
+            for column in description]
+
+
+def rows_to_dataframe(columns, rows, dtypes):
+    """
+    Converts the rows of a query result into a data frame.
+
+    :param columns:
+        The names of the columns of the result.
+    :param rows:
+        A list of the rows of the result as returned by ``fetchall`` or ``fetchmany``.
+    :param dtypes:
+        A dict of numpy dtypes keyed by column name.  Each of these columns is copied into an array of its dtype which
+        is allocated for all rows.  NULL values become NaN or NaT, and integer columns containing NULL values are loaded
+        as floats.  The 'category' dtype creates a pandas categorical.  The dtypes of other columns are inferred by
+        pandas.
+    :return:
+        A pd.DataFrame with the columns in the order of the result.
+    """
+    import numpy as np
+    import pandas as pd
+
+    data = OrderedDict()
+    for i, column in enumerate(columns):
+        values = [row[i] for row in rows]
+        dtype = dtypes.get(column)
+
+        if dtype is None:
+            data[column] = values
+            continue
+
+        if 'category' == dtype:
+            data[column] = pd.Categorical(values)
+            continue
+
+        array = np.empty(len(rows), dtype=dtype)
+        try:
+            array[:] = values
+        except TypeError:
+            # NULL values cannot be stored in integer arrays
+            array = np.array(values, dtype='float64')
+        data[column] = array
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def arrow_to_dataframe(table, dtypes):
+    """
+    Converts an Arrow table into a data frame.  The buffers of the table are released while the data frame is built so
+    that the result is not held in memory twice.  Dates are converted to datetime64 instead of Python objects and the
+    columns which do not already have the dtype given in `dtypes` are cast.  This requires the versions checked by
+    ``arrow_available``.
+    """
+    import numpy as np
+
+    dataframe = table.to_pandas(date_as_object=False, split_blocks=True, self_destruct=True)
+    dataframe.columns = [column.decode('utf-8') if isinstance(column, bytes) else column
+                         for column in dataframe.columns]
+
+    for column, dtype in dtypes.items():
+        if column not in dataframe.columns or dataframe[column].dtype == dtype:
+            continue
+
+        if 'category' != dtype and dataframe[column].dtype.kind == 'f' and np.dtype(dtype).kind in 'iu':
+            # Integer columns containing NULL values are converted to floats by Arrow
+            continue
+
+        dataframe[column] = dataframe[column].astype(dtype)
+
+    return dataframe
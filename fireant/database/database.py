@@ -1,24 +1,247 @@
 # coding: utf-8
 import logging
+import threading
+from contextlib import contextmanager
 
-import pandas as pd
+from pypika import Interval, Query
+from .pool import ConnectionPool
 
 logger = logging.getLogger(__name__)
 
 
 class Database(object):
+    # The maximum number of open connections kept by the connection pool.
+    max_connections = 5
+
+    # The number of seconds an unused connection may stay open in the pool.  None keeps connections open indefinitely.
+    idle_timeout = 300
+
+    # Whether the database supports window functions such as SUM(...) OVER (...).  Cumulative operations can only be
+    # computed in the database when this is True, otherwise they are computed in pandas.
+    supports_window_functions = False
+
+    # Whether the cursors of the driver can return the results of a query as an Arrow table with ``fetch_arrow_table``.
+    # When this is True, data frames are built from the Arrow table without creating Python objects for each value.
+    # This requires pyarrow 0.17 and pandas 0.23 or later, otherwise the rows are fetched with ``fetchall``.
+    supports_arrow = False
+
+    # Whether LIKE patterns match strings case-sensitively.  Cached dimension options are searched in memory the same way.
+    case_sensitive_like = True
+
+    # Whether pooled connections are reset and kept when a query fails instead of being discarded.  This is required
+    # when opening a new connection would lose the data of the database, as with in-memory databases.
+    keep_connections_on_error = False
+
+    # The PyPika query class used to build the queries executed against the database, which renders its SQL dialect.
+    query_cls = Query
+
+    # The LIMIT used for an OFFSET without a limit by databases which do not support OFFSET without LIMIT, or None.
+    unbounded_limit = None
+
+    _pool_lock = threading.Lock()
+    _executor_lock = threading.Lock()
+
     def connect(self):
         raise NotImplementedError
 
     def round_date(self, field, interval):
         raise NotImplementedError
 
+    def date_add(self, field, date_part, interval):
+        """
+        Shifts a date by an interval, which is used to query references such as week over week.  By default an
+        ``INTERVAL`` literal is added, for example ``"dt"+INTERVAL '1 WEEK'``.  Subclasses should override this for
+        databases which do not support these literals.
+
+        :param field:
+            The date term to shift.
+        :param date_part:
+            The unit of the interval as a keyword of ``pypika.Interval``, for example 'weeks' or 'quarters'.
+        :param interval:
+            The number of units to shift the date by.
+        """
+        return field + Interval(**{date_part: interval})
+
+    @property
+    def identity(self):
+        """
+        A string which identifies the database that queries are executed against.  This is used to separate cached
+        query results from different databases.
+        """
+        params = ','.join('{}={}'.format(key, value)
+                          for key, value in sorted(vars(self).items())
+                          if not key.startswith('_') and key != 'password')
+        return '{module}.{name}({params})'.format(module=type(self).__module__, name=type(self).__name__,
+                                                  params=params)
+
+    def ping(self, connection):
+        """
+        Checks that a pooled connection can still be used before it is checked out of the pool.  Subclasses should
+        override this with a cheaper check if the driver provides one.
+        """
+        cursor = connection.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchall()
+        return True
+
+    def reset(self, connection):
+        """
+        Ends the transaction of a connection when it is returned to the pool so that its transaction and session state
+        do not leak into the next checkout, for example a snapshot of the data which would return stale results.
+        """
+        connection.rollback()
+
+    @property
+    def pool(self):
+        pool = self.__dict__.get('_pool')
+        if pool is not None:
+            return pool
+
+        with self._pool_lock:
+            if self.__dict__.get('_pool') is None:
+                self._pool = ConnectionPool(self.connect,
+                                            max_size=self.max_connections,
+                                            idle_timeout=self.idle_timeout,
+                                            ping=self.ping,
+                                            reset=self.reset,
+                                            keep_on_error=self.keep_connections_on_error)
+            return self._pool
+
+    @property
+    def executor(self):
+        """
+        The thread pool used to run queries asynchronously with drivers that do not support asyncio.  It has one thread
+        for each connection in the connection pool.
+        """
+        executor = self.__dict__.get('_executor')
+        if executor is not None:
+            return executor
+
+        with self._executor_lock:
+            if self.__dict__.get('_executor') is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.max_connections)
+            return self._executor
+
+    def close(self):
+        """
+        Closes all pooled connections and shuts down the thread pool used for asynchronous queries.  This should be
+        called when the database is no longer used, for example when the application shuts down.  A new pool is created
+        if the database is used again afterwards.
+        """
+        with self._pool_lock:
+            pool = self.__dict__.pop('_pool', None)
+
+        with self._executor_lock:
+            executor = self.__dict__.pop('_executor', None)
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        if pool is not None:
+            pool.close()
+
     def fetch(self, query):
-        with self.connect() as connection:
+        with self.pool.connection() as connection:
             cursor = connection.cursor()
             cursor.execute(query)
             return cursor.fetchall()
 
-    def fetch_dataframe(self, query):
-        with self.connect() as connection:
+    def fetch_dataframe(self, query, dtypes=None):
+        """
+        Executes a query and returns the results as a data frame.
+
+        :param query:
+            The query string to execute.
+        :param dtypes:
+            (Optional) A dict of numpy dtypes keyed by column name, for the columns whose types are known in advance.
+            When given, the results are copied column by column into arrays of these types instead of letting pandas
+            infer the types of the columns.  Drivers which support Arrow return the results as an Arrow table which is
+            converted with minimal copies, if the installed versions of pyarrow and pandas support it.
+        """
+        from .columnar import arrow_available
+
+        with self.pool.connection() as connection:
+            if self.supports_arrow and arrow_available():
+                from .columnar import arrow_to_dataframe
+
+                cursor = connection.cursor()
+                cursor.execute(query)
+                return arrow_to_dataframe(self.fetch_arrow_table(cursor), dtypes or {})
+
+            if dtypes:
+                from .columnar import column_names, rows_to_dataframe
+
+                cursor = connection.cursor()
+                cursor.execute(query)
+                return rows_to_dataframe(column_names(cursor.description), cursor.fetchall(), dtypes)
+
+            import pandas as pd
             return pd.read_sql(query, connection)
+
+    def fetch_arrow_table(self, cursor):
+        """
+        Returns the results of an executed query as a ``pyarrow.Table``.  This is only used when ``supports_arrow`` is
+        True.  By default, the ``fetch_arrow_table`` method of the cursor is used, which is provided by ADBC and DuckDB
+        cursors.  Subclasses should override this for other drivers.
+        """
+        return cursor.fetch_arrow_table()
+
+    def fetch_dataframe_async(self, query, dtypes=None):
+        """
+        Executes a query asynchronously and returns an awaitable which resolves to a data frame with the results.
+
+        By default, ``fetch_dataframe`` is run in the database's thread pool so that the event loop is not blocked.
+        Subclasses using a driver which supports asyncio should override this with a coroutine.
+        """
+        import asyncio
+        import functools
+
+        loop = asyncio.get_event_loop()
+        fetch = functools.partial(self.fetch_dataframe, dtypes=dtypes) if dtypes else self.fetch_dataframe
+        return loop.run_in_executor(self.executor, fetch, query)
+
+    @contextmanager
+    def chunked_cursor(self, connection):
+        """
+        Opens the cursor used by ``fetch_chunks`` and ``fetch_dataframe_chunks``.  The default cursors of many drivers
+        load the whole result set into memory when the query is executed, so subclasses should override this with a
+        server-side cursor if the driver provides one, so that only one chunk of rows is held in memory at a time.
+        """
+        yield connection.cursor()
+
+    def fetch_chunks(self, query, chunksize=10000):
+        """
+        Executes a query and yields the results in lists of at most `chunksize` rows so that the whole result set does
+        not need to be held in memory.
+        """
+        with self.pool.connection() as connection, self.chunked_cursor(connection) as cursor:
+            cursor.execute(query)
+
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    return
+                yield rows
+
+    def fetch_dataframe_chunks(self, query, chunksize=10000, dtypes=None):
+        """
+        Executes a query and yields the results as data frames of at most `chunksize` rows.  See ``fetch_dataframe``
+        for a description of `dtypes`.
+        """
+        import pandas as pd
+        from .columnar import column_names, rows_to_dataframe
+
+        with self.pool.connection() as connection, self.chunked_cursor(connection) as cursor:
+            cursor.execute(query)
+
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    return
+
+                # Server-side cursors may only describe the columns of the result once rows have been fetched
+                columns = column_names(cursor.description)
+                yield (rows_to_dataframe(columns, rows, dtypes)
+                       if dtypes
+                       else pd.DataFrame.from_records(rows, columns=columns, coerce_float=True))
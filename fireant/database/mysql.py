@@ -0,0 +1,144 @@
+# coding: utf-8
+from contextlib import contextmanager
+
+from pypika import Query, terms
+from pypika.queries import QueryBuilder
+from pypika.utils import RollupException
+from . import Database
+
+
+class DateTrunc(terms.Function):
+    # Truncates dates with the MySQL date functions, since MySQL has no function like DATE_TRUNC.
+    templates = {
+        'HH': 'TIMESTAMP(DATE({field}),MAKETIME(HOUR({field}),0,0))',
+        'DD': 'DATE({field})',
+        'WW': 'SUBDATE(DATE({field}),WEEKDAY({field}))',
+        'MM': 'SUBDATE(DATE({field}),DAYOFMONTH({field})-1)',
+        'Q': 'MAKEDATE(YEAR({field}),1)+INTERVAL QUARTER({field}) QUARTER-INTERVAL 1 QUARTER',
+        'IY': 'MAKEDATE(YEAR({field}),1)',
+    }
+
+    def __init__(self, field, date_format, alias=None):
+        super(DateTrunc, self).__init__('DATE_TRUNC', field, date_format, alias=alias)
+
+    def get_sql(self, with_alias=False, with_namespace=False, **kwargs):
+        field, date_format = self.params
+        return '{sql}{alias}'.format(
+            sql=self.templates[date_format.value].format(
+                field=field.get_sql(with_quotes=True, with_alias=False, with_namespace=with_namespace)),
+            alias=' "{}"'.format(self.alias) if self.alias is not None and with_alias else ''
+        )
+
+
+class DateAdd(terms.Function):
+    # Shifts dates with DATE_ADD, since MySQL only accepts intervals with an unquoted number, such as INTERVAL 1 WEEK.
+    units = {
+        'years': 'YEAR',
+        'quarters': 'QUARTER',
+        'months': 'MONTH',
+        'weeks': 'WEEK',
+        'days': 'DAY',
+        'hours': 'HOUR',
+        'minutes': 'MINUTE',
+        'seconds': 'SECOND',
+    }
+
+    def __init__(self, field, date_part, interval, alias=None):
+        super(DateAdd, self).__init__('DATE_ADD', field, alias=alias)
+        self.date_part = date_part
+        self.interval = interval
+
+    def get_sql(self, with_alias=False, with_namespace=False, **kwargs):
+        field, = self.params
+        return 'DATE_ADD({field},INTERVAL {interval} {unit}){alias}'.format(
+            field=field.get_sql(with_quotes=True, with_alias=False, with_namespace=with_namespace),
+            interval=int(self.interval),
+            unit=self.units[self.date_part],
+            alias=' "{}"'.format(self.alias) if self.alias is not None and with_alias else ''
+        )
+
+
+class MySQLQueryBuilder(QueryBuilder):
+    def rollup(self, *terms, **kwargs):
+        # MySQL only supports WITH ROLLUP, which rolls up all of the groups of a query instead of only the given terms
+        if self._groupbys:
+            raise RollupException('MySQL can only roll up all of the dimensions of a query.')
+
+        return super(MySQLQueryBuilder, self).rollup(*terms, vendor='mysql')
+
+
+class MySQLQuery(Query):
+    # Query class which builds queries in the MySQL dialect.
+
+    @staticmethod
+    def from_(table):
+        return MySQLQueryBuilder().from_(table)
+
+    @staticmethod
+    def into(table):
+        return MySQLQueryBuilder().into(table)
+
+    @staticmethod
+    def select(*terms):
+        return MySQLQueryBuilder().select(*terms)
+
+
+class MySQL(Database):
+    # MySQL client that uses the PyMySQL driver.
+    query_cls = MySQLQuery
+    # The default collations compare strings case-insensitively
+    case_sensitive_like = False
+    # OFFSET requires a LIMIT, so the largest limit is used to select all of the remaining rows
+    unbounded_limit = 18446744073709551615
+
+    def __init__(self, host='localhost', port=3306, database='mysql',
+                 user='root', password=None, charset='utf8mb4',
+                 connect_timeout=10, max_connections=5, idle_timeout=300):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.charset = charset
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+
+    def connect(self):
+        import pymysql
+
+        # Identifiers are quoted with double quotes in the queries, which MySQL only accepts with ANSI_QUOTES.  Without
+        # autocommit, pooled connections would keep reading the snapshot of the first query of their transaction.
+        return pymysql.connect(
+            host=self.host, port=self.port, database=self.database,
+            user=self.user, password=self.password or '', charset=self.charset,
+            connect_timeout=self.connect_timeout, autocommit=True,
+            init_command="SET SESSION sql_mode=TRIM(BOTH ',' FROM CONCAT(@@SESSION.sql_mode,',ANSI_QUOTES'))",
+        )
+
+    @contextmanager
+    def chunked_cursor(self, connection):
+        import pymysql.cursors
+
+        # Unbuffered cursors read the rows from the connection as they are fetched instead of all at once
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        yield cursor
+        cursor.close()
+
+    @property
+    def identity(self):
+        return 'mysql://{user}@{host}:{port}/{database}'.format(user=self.user, host=self.host, port=self.port,
+                                                               database=self.database)
+
+    def ping(self, connection):
+        return connection.open
+
+    def round_date(self, field, interval):
+        if interval not in DateTrunc.templates:
+            raise ValueError('MySQL cannot round dates to the interval {}.'.format(interval))
+        return DateTrunc(field, interval)
+
+    def date_add(self, field, date_part, interval):
+        if date_part not in DateAdd.units:
+            raise ValueError('MySQL cannot shift dates by {}.'.format(date_part))
+        return DateAdd(field, date_part, interval)
@@ -0,0 +1,214 @@
+# coding: utf-8
+import threading
+import time
+from contextlib import contextmanager
+
+
+class ConnectionPoolException(Exception):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    A bounded, thread-safe pool of database connections.
+
+    Connections are created lazily using the `connect` function and are returned to the pool after use so that
+    subsequent queries can reuse them instead of opening a new connection each time.  At most `max_size` connections
+    are open at any time, including those which are currently checked out.
+    """
+
+    def __init__(self, connect, max_size=5, idle_timeout=None, ping=None, reset=None, keep_on_error=False):
+        """
+        :param connect:
+            A function with no arguments which opens a new connection.
+
+        :param max_size:
+            The maximum number of connections which can be open at the same time.
+
+        :param idle_timeout:
+            (Optional) The number of seconds that a connection may remain unused in the pool before it is closed.  If
+            not set, idle connections are kept open until the pool is closed.
+
+        :param ping:
+            (Optional) A function which takes a connection and returns a truthy value if the connection can still be
+            used.  This is called each time an idle connection is checked out of the pool.
+
+        :param reset:
+            (Optional) A function which takes a connection and resets its transaction and session state, for example by
+            rolling back.  This is called each time a connection is returned to the pool.  If it raises an error, the
+            connection is discarded instead.
+
+        :param keep_on_error:
+            (Optional) When True, a connection which was in use when an error was raised is reset and returned to the
+            pool instead of being discarded.  This is for connections which hold state that cannot be opened again, such
+            as the connection to an in-memory database.
+        """
+        if max_size < 1:
+            raise ConnectionPoolException('The maximum size of a connection pool must be at least 1.')
+
+        self.connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ping = ping
+        self.reset = reset
+        self.keep_on_error = keep_on_error
+
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """
+        Checks out a connection for the duration of the context.  If an error is raised while the connection is in
+        use, the connection is discarded instead of being returned to the pool, unless ``keep_on_error`` is set.
+
+        :param timeout:
+            (Optional) The number of seconds to wait for a connection when the pool is exhausted.  Waits indefinitely
+            if not set.
+        """
+        connection = self.acquire(timeout)
+        try:
+            yield connection
+        except BaseException:
+            # Includes GeneratorExit when a generator using the connection is closed before it is exhausted
+            if self.keep_on_error:
+                self.release(connection)
+            else:
+                self.discard(connection)
+            raise
+        self.release(connection)
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+
+        while True:
+            connection = self._checkout(deadline)
+            if connection is None:
+                # A slot was reserved for a new connection
+                return self._open()
+
+            if self._is_alive(connection):
+                return connection
+
+            self.discard(connection)
+
+    def release(self, connection):
+        if self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                self.discard(connection)
+                return
+
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                self._condition.notify()
+                _close_quietly(connection)
+                return
+
+            self._idle.append((connection, time.time()))
+            self._condition.notify()
+
+    def discard(self, connection):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+        _close_quietly(connection)
+
+    def close(self):
+        """
+        Closes all idle connections and prevents any new connections from being checked out.  Connections which are
+        checked out when the pool is closed are closed as soon as they are released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for connection, _ in idle:
+            _close_quietly(connection)
+
+    def _checkout(self, deadline):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ConnectionPoolException('Unable to check out a connection.  The pool has been closed.')
+
+                expired = self._remove_expired()
+                if expired:
+                    self._condition.release()
+                    try:
+                        for connection in expired:
+                            _close_quietly(connection)
+                    finally:
+                        self._condition.acquire()
+                    continue
+
+                if self._idle:
+                    # Most recently used connections first so that the others can expire
+                    connection, _ = self._idle.pop()
+                    return connection
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise ConnectionPoolException('Timed out waiting for a connection.  '
+                                                  'All {size} connections are in use.'.format(size=self.max_size))
+
+                self._condition.wait(remaining)
+
+    def _remove_expired(self):
+        if self.idle_timeout is None or not self._idle:
+            return []
+
+        cutoff = time.time() - self.idle_timeout
+        expired = [connection for connection, returned_at in self._idle if returned_at < cutoff]
+        if expired:
+            self._idle = [(connection, returned_at)
+                          for connection, returned_at in self._idle
+                          if cutoff <= returned_at]
+            self._size -= len(expired)
+            self._condition.notify_all()
+
+        return expired
+
+    def _open(self):
+        try:
+            return self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _is_alive(self, connection):
+        if self.ping is None:
+            return True
+
+        try:
+            return self.ping(connection)
+        except Exception:
+            return False
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
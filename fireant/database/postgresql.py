@@ -0,0 +1,72 @@
+# coding: utf-8
+import uuid
+from contextlib import contextmanager
+
+from pypika import terms
+from . import Database
+
+
+class DateTrunc(terms.Function):
+    # Wrapper for the PostgreSQL DATE_TRUNC function for truncating dates.
+    date_parts = {
+        'HH': 'hour',
+        'DD': 'day',
+        'WW': 'week',
+        'MM': 'month',
+        'Q': 'quarter',
+        'IY': 'year',
+    }
+
+    def __init__(self, field, date_format, alias=None):
+        super(DateTrunc, self).__init__('DATE_TRUNC', self.date_parts.get(date_format, date_format), field, alias=alias)
+
+
+class PostgreSQL(Database):
+    # PostgreSQL client that uses the psycopg2 driver.
+    supports_window_functions = True
+
+    def __init__(self, host='localhost', port=5432, database='postgres',
+                 user='postgres', password=None,
+                 connect_timeout=None, max_connections=5, idle_timeout=300):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+
+    def connect(self):
+        import psycopg2
+
+        connection = psycopg2.connect(
+            host=self.host, port=self.port, dbname=self.database,
+            user=self.user, password=self.password,
+            connect_timeout=self.connect_timeout,
+        )
+        # Pooled connections would otherwise stay idle in a transaction between queries and hold their locks
+        connection.autocommit = True
+        return connection
+
+    @contextmanager
+    def chunked_cursor(self, connection):
+        # Named cursors are declared on the server and fetch the rows in chunks, but they can only be used in a
+        # transaction
+        connection.autocommit = False
+        cursor = connection.cursor(name='fireant_{}'.format(uuid.uuid4().hex))
+        yield cursor
+        cursor.close()
+        connection.rollback()
+        connection.autocommit = True
+
+    @property
+    def identity(self):
+        return 'postgresql://{user}@{host}:{port}/{database}'.format(user=self.user, host=self.host, port=self.port,
+                                                                    database=self.database)
+
+    def ping(self, connection):
+        return not connection.closed
+
+    def round_date(self, field, interval):
+        return DateTrunc(field, interval)
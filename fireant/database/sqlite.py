@@ -0,0 +1,136 @@
+# coding: utf-8
+import uuid
+
+from pypika import Query, terms
+from pypika.queries import QueryBuilder
+from pypika.utils import RollupException
+from . import Database
+
+
+class DateTrunc(terms.Function):
+    # Truncates dates with the SQLite date functions, which return dates as strings in ISO 8601 format.
+    templates = {
+        'HH': "STRFTIME('%Y-%m-%d %H:00:00',{field})",
+        'DD': 'DATE({field})',
+        'WW': "DATE({field},'weekday 0','-6 days')",
+        'MM': "DATE({field},'start of month')",
+        'Q': "DATE({field},'start of month','-'||((CAST(STRFTIME('%m',{field}) AS INTEGER)-1)%3)||' months')",
+        'IY': "DATE({field},'start of year')",
+    }
+
+    def __init__(self, field, date_format, alias=None):
+        super(DateTrunc, self).__init__('DATE_TRUNC', field, date_format, alias=alias)
+
+    def get_sql(self, with_alias=False, with_namespace=False, **kwargs):
+        field, date_format = self.params
+        return '{sql}{alias}'.format(
+            sql=self.templates[date_format.value].format(
+                field=field.get_sql(with_quotes=True, with_alias=False, with_namespace=with_namespace)),
+            alias=' "{}"'.format(self.alias) if self.alias is not None and with_alias else ''
+        )
+
+
+class DateAdd(terms.Function):
+    # Shifts dates with a modifier of the SQLite date functions, such as DATE("dt",'+7 days').  Dates rounded to days or
+    # longer intervals are shifted with DATE and other dates with DATETIME, so that the shifted dates have the same
+    # format as the dates they are compared with.
+    modifiers = {
+        'years': (1, 'years'),
+        'quarters': (3, 'months'),
+        'months': (1, 'months'),
+        'weeks': (7, 'days'),
+        'days': (1, 'days'),
+        'hours': (1, 'hours'),
+        'minutes': (1, 'minutes'),
+        'seconds': (1, 'seconds'),
+    }
+
+    def __init__(self, field, date_part, interval, alias=None):
+        is_date = isinstance(field, DateTrunc) and 'HH' != field.params[1].value
+        super(DateAdd, self).__init__('DATE' if is_date else 'DATETIME', field, alias=alias)
+        self.date_part = date_part
+        self.interval = interval
+
+    def get_sql(self, with_alias=False, with_namespace=False, **kwargs):
+        field, = self.params
+        factor, unit = self.modifiers[self.date_part]
+        return "{name}({field},'{amount:+d} {unit}'){alias}".format(
+            name=self.name,
+            field=field.get_sql(with_quotes=True, with_alias=False, with_namespace=with_namespace),
+            amount=factor * int(self.interval),
+            unit=unit,
+            alias=' "{}"'.format(self.alias) if self.alias is not None and with_alias else ''
+        )
+
+
+class SQLiteQueryBuilder(QueryBuilder):
+    def rollup(self, *terms, **kwargs):
+        raise RollupException('SQLite does not support ROLLUP.')
+
+
+class SQLiteQuery(Query):
+    # Query class which builds queries in the SQLite dialect.
+
+    @staticmethod
+    def from_(table):
+        return SQLiteQueryBuilder().from_(table)
+
+    @staticmethod
+    def into(table):
+        return SQLiteQueryBuilder().into(table)
+
+    @staticmethod
+    def select(*terms):
+        return SQLiteQueryBuilder().select(*terms)
+
+
+class SQLite(Database):
+    # SQLite client that uses the sqlite3 module of the standard library.
+    query_cls = SQLiteQuery
+    # LIKE ignores the case of ASCII characters unless the case_sensitive_like pragma is set
+    case_sensitive_like = False
+    # OFFSET requires a LIMIT and a negative limit selects all of the remaining rows
+    unbounded_limit = -1
+
+    def __init__(self, path=':memory:', timeout=5.0, max_connections=5, idle_timeout=300):
+        self.path = path
+        self.timeout = timeout
+
+        # Each connection to an in-memory database opens a new, empty database, so a single connection is kept open,
+        # even when a query fails.  The identity of each in-memory database is unique so that their cached results are
+        # not shared.
+        if ':memory:' == path:
+            max_connections, idle_timeout = 1, None
+            self.keep_connections_on_error = True
+            self._memory_id = uuid.uuid4().hex
+
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+
+    def connect(self):
+        import sqlite3
+
+        # Pooled connections are used by the threads which execute queries asynchronously
+        return sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+
+    @property
+    def identity(self):
+        if ':memory:' == self.path:
+            return 'sqlite:///:memory:#{id}'.format(id=self._memory_id)
+        return 'sqlite:///{path}'.format(path=self.path)
+
+    @property
+    def supports_window_functions(self):
+        import sqlite3
+
+        return (3, 25, 0) <= sqlite3.sqlite_version_info
+
+    def round_date(self, field, interval):
+        if interval not in DateTrunc.templates:
+            raise ValueError('SQLite cannot round dates to the interval {}.'.format(interval))
+        return DateTrunc(field, interval)
+
+    def date_add(self, field, date_part, interval):
+        if date_part not in DateAdd.modifiers:
+            raise ValueError('SQLite cannot shift dates by {}.'.format(date_part))
+        return DateAdd(field, date_part, interval)
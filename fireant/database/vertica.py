@@ -12,16 +12,19 @@ class Round(terms.Function):
 
 class Vertica(Database):
     # Vertica client that uses the vertica_python driver.
+    supports_window_functions = True
 
     def __init__(self, host='localhost', port=5433, database='vertica',
                  user='vertica', password=None,
-                 read_timeout=None):
+                 read_timeout=None, max_connections=5, idle_timeout=300):
         self.host = host
         self.port = port
         self.database = database
         self.user = user
         self.password = password
         self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
 
     def connect(self):
         import vertica_python
@@ -32,5 +35,13 @@ class Vertica(Database):
             read_timeout=self.read_timeout,
         )
 
+    @property
+    def identity(self):
+        return 'vertica://{user}@{host}:{port}/{database}'.format(user=self.user, host=self.host, port=self.port,
+                                                                 database=self.database)
+
+    def ping(self, connection):
+        return not connection.closed()
+
     def round_date(self, field, interval):
         return Round(field, interval)
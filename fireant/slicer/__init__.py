@@ -2,4 +2,5 @@
 from .filters import EqualityFilter, ContainsFilter, RangeFilter, WildcardFilter
 from .managers import SlicerException
 from .schemas import (Slicer, Metric, Dimension, CategoricalDimension, ContinuousDimension, NumericInterval,
-                      UniqueDimension, DatetimeDimension, DatetimeInterval, DimensionValue, EqualityOperator, Join)
+                      UniqueDimension, DatetimeDimension, DatetimeInterval, DimensionValue, EqualityOperator, Join,
+                      AggregateTable)
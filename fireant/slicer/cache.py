@@ -0,0 +1,506 @@
+# coding: utf-8
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(database, querystring):
+    """
+    Returns the key used to cache the results of a query.  The key is a hash of the query string and the identity of
+    the database so that the same query executed against different databases is cached separately.
+    """
+    value = u'{database}\n{query}'.format(database=database.identity, query=querystring)
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+class Cache(object):
+    """
+    Base class for query result caches.  A cache stores the data frames returned by the database for a query so that
+    repeated requests for the same data do not have to execute the query again.
+
+    Subclasses must implement `_get`, `_set`, `_delete` and `_clear`.
+    """
+
+    def __init__(self, ttl=None):
+        """
+        :param ttl:
+            (Optional) The default number of seconds before a cached result expires.  If not set, results are kept until
+            they are evicted or invalidated.  This can be overridden for each slicer with the `cache_ttl` parameter.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        """
+        :return:
+            The cached data frame or None if the key is not cached or has expired.
+        """
+        dataframe = self._get(key)
+
+        with self._stats_lock:
+            if dataframe is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return dataframe
+
+    def set(self, key, dataframe, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        self._set(key, dataframe, ttl)
+
+    def delete(self, key):
+        self._delete(key)
+
+    def clear(self):
+        self._clear()
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+
+        requests = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': float(hits) / requests if requests else None,
+        }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.hits, self.misses = 0, 0
+
+    def _get(self, key):
+        raise NotImplementedError
+
+    def _set(self, key, dataframe, ttl):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+def _expires_at(ttl):
+    return time.time() + ttl if ttl else None
+
+
+def _is_expired(expires_at):
+    return expires_at is not None and expires_at <= time.time()
+
+
+class MemoryCache(Cache):
+    """
+    An in-process least-recently-used cache which is limited by the memory used by the cached data frames.
+    """
+
+    def __init__(self, max_bytes=128 * 2 ** 20, ttl=None):
+        """
+        :param max_bytes:
+            The maximum number of bytes used by the cached data frames.  When this is exceeded, the least recently
+            used results are evicted.  Results larger than this are not cached.
+
+        :param ttl:
+            See ``fireant.slicer.cache.Cache``
+        """
+        super(MemoryCache, self).__init__(ttl=ttl)
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        stats = super(MemoryCache, self).stats()
+        stats.update(entries=len(self._entries), bytes=self.nbytes)
+        return stats
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+
+            expires_at, nbytes, dataframe = entry
+            if _is_expired(expires_at):
+                self.nbytes -= nbytes
+                return None
+
+            # Re-insert to mark the entry as the most recently used
+            self._entries[key] = entry
+
+        # Return a copy so that callers can modify the data frame without changing the cached result
+        return dataframe.copy()
+
+    def _set(self, key, dataframe, ttl):
+        nbytes = int(dataframe.memory_usage(index=True, deep=True).sum())
+
+        with self._lock:
+            self._pop(key)
+
+            if self.max_bytes < nbytes:
+                return
+
+            while self._entries and self.max_bytes < self.nbytes + nbytes:
+                self._pop(next(iter(self._entries)))
+
+            self._entries[key] = (_expires_at(ttl), nbytes, dataframe.copy())
+            self.nbytes += nbytes
+
+    def _delete(self, key):
+        with self._lock:
+            self._pop(key)
+
+    def _clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+
+
+class DiskCache(Cache):
+    """
+    A cache which stores pickled results as files in a directory.  The directory can be shared by several processes.
+    """
+    extension = '.pkl'
+
+    def __init__(self, directory, ttl=None):
+        """
+        :param directory:
+            The path of the directory to store cached results in.  It is created if it does not exist.
+
+        :param ttl:
+            See ``fireant.slicer.cache.Cache``
+        """
+        super(DiskCache, self).__init__(ttl=ttl)
+        self.directory = directory
+
+        try:
+            os.makedirs(directory)
+        except OSError:
+            if not os.path.isdir(directory):
+                raise
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def _get(self, key):
+        try:
+            expires_at, dataframe = self._read(self._path(key))
+        except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+
+        if _is_expired(expires_at):
+            self._delete(key)
+            return None
+
+        return dataframe
+
+    def _set(self, key, dataframe, ttl):
+        path = self._path(key)
+        tmp_path = self._tmp_path(path)
+        self._write(tmp_path, dataframe, _expires_at(ttl))
+        self._replace(tmp_path, path)
+
+    def _read(self, path):
+        """
+        :return:
+            A tuple of the expiry time and the data frame stored in a file.
+        """
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def _write(self, path, dataframe, expires_at):
+        with open(path, 'wb') as f:
+            pickle.dump((expires_at, dataframe), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _tmp_path(path):
+        # Write to a temporary file first so that other processes never read a partially written file
+        return '{path}.{pid}.{thread}.tmp'.format(path=path, pid=os.getpid(),
+                                                  thread=threading.current_thread().ident)
+
+    def _replace(self, tmp_path, path):
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            # Windows does not allow renaming onto an existing file
+            self._remove(path)
+            os.rename(tmp_path, path)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _delete(self, key):
+        self._remove(self._path(key))
+
+    def _clear(self):
+        for filename in os.listdir(self.directory):
+            if filename.endswith(self.extension):
+                self._delete(filename[:-len(self.extension)])
+
+
+class ArrowCache(DiskCache):
+    """
+    A cache which stores results as uncompressed Arrow IPC files in a directory and is limited by the size of the
+    files.  Cached results are read by memory-mapping their file, so that the columns of large results are not copied
+    into memory until they are used.  Numeric columns without NULL values remain views of the mapped file and are
+    read-only.  The slicer copies the columns when it sets the index of the results, so its results can be modified.
+    This requires pyarrow 0.17 and pandas 0.23 or later.
+
+    The size, shape and usage of each cached result is recorded in a JSON manifest in the directory, which is used to
+    evict the least recently used results and can be inspected with ``manifest()``.
+    """
+    extension = '.arrow'
+    manifest_filename = 'manifest.json'
+    expires_at_metadata_key = b'fireant.expires_at'
+
+    def __init__(self, directory, max_bytes=10 * 2 ** 30, ttl=None, last_used_interval=60):
+        """
+        :param directory:
+            The path of the directory to store cached results in.  It is created if it does not exist.
+
+        :param max_bytes:
+            The maximum number of bytes used by the cached files.  When this is exceeded, the least recently used
+            results are evicted.  Results larger than this are not cached.
+
+        :param ttl:
+            See ``fireant.slicer.cache.Cache``
+
+        :param last_used_interval:
+            The number of seconds for which the times when results were last used are kept in memory before they are
+            written to the manifest, so that reading a result does not write to the disk each time.  Pending times are
+            also written whenever the manifest is changed by storing or evicting results.
+        """
+        from fireant.database.columnar import arrow_available, MIN_PANDAS_VERSION, MIN_PYARROW_VERSION
+
+        if not arrow_available():
+            raise ImportError('ArrowCache requires pyarrow {} and pandas {} or later.'.format(
+                '.'.join(map(str, MIN_PYARROW_VERSION)), '.'.join(map(str, MIN_PANDAS_VERSION))))
+
+        super(ArrowCache, self).__init__(directory, ttl=ttl)
+        self.max_bytes = max_bytes
+        self.last_used_interval = last_used_interval
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._last_used_saved = time.time()
+
+    def __len__(self):
+        return len(self.manifest())
+
+    @property
+    def nbytes(self):
+        return sum(entry['bytes'] for entry in self.manifest().values())
+
+    def stats(self):
+        stats = super(ArrowCache, self).stats()
+        manifest = self.manifest()
+        stats.update(entries=len(manifest), bytes=sum(entry['bytes'] for entry in manifest.values()))
+        return stats
+
+    def manifest(self):
+        """
+        :return:
+            A dict of the cached results keyed by cache key.  Each entry has the size of the file in ``bytes``, the
+            number of ``rows``, the names of the ``columns``, and the times when the result was ``created`` and
+            ``last_used`` and when it ``expires_at``, as Unix timestamps.
+        """
+        with self._lock:
+            return self._load_manifest()
+
+    def _get(self, key):
+        dataframe = super(ArrowCache, self)._get(key)
+
+        if dataframe is not None:
+            with self._lock:
+                now = time.time()
+                self._last_used[key] = now
+                if self.last_used_interval <= now - self._last_used_saved:
+                    self._save_manifest(self._load_manifest())
+
+        return dataframe
+
+    def _set(self, key, dataframe, ttl):
+        import pyarrow as pa
+
+        path = self._path(key)
+        tmp_path = self._tmp_path(path)
+        expires_at = _expires_at(ttl)
+
+        try:
+            self._write(tmp_path, dataframe, expires_at)
+        except (pa.ArrowException, TypeError, ValueError):
+            # Columns of Python objects which Arrow cannot convert are not cached
+            self._remove(tmp_path)
+            return
+
+        nbytes = os.path.getsize(tmp_path)
+
+        with self._lock:
+            manifest = self._load_manifest()
+            self._evict(manifest, key)
+
+            if self.max_bytes < nbytes:
+                self._remove(tmp_path)
+                self._save_manifest(manifest)
+                return
+
+            # Expired results are evicted first
+            for evicted_key in sorted(manifest, key=lambda k: (not _is_expired(manifest[k]['expires_at']),
+                                                                manifest[k]['last_used'])):
+                if sum(entry['bytes'] for entry in manifest.values()) + nbytes <= self.max_bytes:
+                    break
+                self._evict(manifest, evicted_key)
+
+            self._replace(tmp_path, path)
+
+            now = time.time()
+            manifest[key] = {
+                'bytes': nbytes,
+                'rows': len(dataframe),
+                'columns': [str(column) for column in dataframe.columns],
+                'created': now,
+                'last_used': now,
+                'expires_at': expires_at,
+            }
+            self._save_manifest(manifest)
+
+    def _delete(self, key):
+        with self._lock:
+            manifest = self._load_manifest()
+            self._evict(manifest, key)
+            self._save_manifest(manifest)
+
+    def _clear(self):
+        with self._lock:
+            manifest = self._load_manifest()
+            for key in list(manifest):
+                self._evict(manifest, key)
+            self._save_manifest(manifest)
+
+    def _read(self, path):
+        import pyarrow as pa
+
+        source = pa.memory_map(path, 'r')
+        table = pa.ipc.open_file(source).read_all()
+
+        expires_at = (table.schema.metadata or {}).get(self.expires_at_metadata_key)
+        dataframe = table.to_pandas(split_blocks=True)
+        return float(expires_at) if expires_at else None, dataframe
+
+    def _write(self, path, dataframe, expires_at):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(dataframe)
+        if expires_at is not None:
+            metadata = dict(table.schema.metadata or {})
+            metadata[self.expires_at_metadata_key] = repr(expires_at).encode('utf-8')
+            table = table.replace_schema_metadata(metadata)
+
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def _evict(self, manifest, key):
+        manifest.pop(key, None)
+        self._remove(self._path(key))
+
+    def _load_manifest(self):
+        """
+        Loads the manifest and reconciles it with the files in the directory, since the directory can be shared by
+        several processes which do not see each other's changes to the manifest.  Entries of removed files are dropped
+        and files without an entry are added with their size and modification time.  The times when results were last
+        used which have not been saved yet are applied.
+        """
+        try:
+            with open(os.path.join(self.directory, self.manifest_filename)) as f:
+                manifest = json.load(f)
+        except (IOError, OSError, ValueError):
+            manifest = {}
+
+        keys = {filename[:-len(self.extension)]
+                for filename in os.listdir(self.directory)
+                if filename.endswith(self.extension)}
+
+        for key in set(manifest) - keys:
+            del manifest[key]
+
+        for key in keys - set(manifest):
+            stat = os.stat(self._path(key))
+            manifest[key] = {'bytes': stat.st_size, 'rows': None, 'columns': None, 'created': stat.st_mtime,
+                             'last_used': stat.st_mtime, 'expires_at': None}
+
+        for key, last_used in self._last_used.items():
+            if key in manifest:
+                manifest[key]['last_used'] = max(manifest[key]['last_used'], last_used)
+
+        return manifest
+
+    def _save_manifest(self, manifest):
+        path = os.path.join(self.directory, self.manifest_filename)
+        tmp_path = self._tmp_path(path)
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        self._replace(tmp_path, path)
+
+        self._last_used.clear()
+        self._last_used_saved = time.time()
+
+
+class RedisCache(Cache):
+    """
+    A cache which stores pickled results in Redis.  Any client with the same interface as ``redis.StrictRedis`` for
+    the `get`, `set`, `delete` and `scan_iter` commands can be used, for example a local stand-in for tests.
+    """
+
+    def __init__(self, client, prefix='fireant:', ttl=None):
+        """
+        :param client:
+            A Redis client, such as ``redis.StrictRedis``.
+
+        :param prefix:
+            A prefix added to each key, used to separate the cached results from other data in the same database.
+
+        :param ttl:
+            See ``fireant.slicer.cache.Cache``
+        """
+        super(RedisCache, self).__init__(ttl=ttl)
+        self.client = client
+        self.prefix = prefix
+
+    def _get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def _set(self, key, dataframe, ttl):
+        value = pickle.dumps(dataframe, protocol=pickle.HIGHEST_PROTOCOL)
+        # Redis only supports expiry times in whole seconds
+        self.client.set(self.prefix + key, value, ex=max(int(ttl), 1) if ttl else None)
+
+    def _delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def _clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
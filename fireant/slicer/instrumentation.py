@@ -0,0 +1,236 @@
+# coding: utf-8
+"""
+Hooks for measuring the stages of slicer requests made through the transformer managers, for example
+``slicer.highcharts.line_chart(...)``.
+
+A hook is a function which is called with a ``StageEvent`` after each stage of a request.  Hooks can be used to export
+the timings to a metrics system:
+
+.. code-block:: python
+
+    from fireant.slicer import instrumentation
+
+    @instrumentation.add_hook
+    def send_to_statsd(event):
+        statsd.timing('fireant.{}.{}'.format(event.transformer, event.stage), event.seconds * 1000)
+
+The ``trace`` context manager collects the events of the requests made in the current thread instead:
+
+.. code-block:: python
+
+    with instrumentation.trace() as events:
+        slicer.highcharts.line_chart(metrics=['clicks'], dimensions=['date'])
+
+    for event in events:
+        print(event.stage, event.seconds)
+
+When no hooks are registered, the requests are not instrumented.
+"""
+import hashlib
+import logging
+import re
+import threading
+import timeit
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+hooks = []
+_hooks_lock = threading.Lock()
+
+# Literals are removed from queries before computing the fingerprint so that requests which only differ by their filter
+# values have the same fingerprint
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_number_literal = re.compile(r'\b\d+(?:\.\d+)?\b')
+
+
+def add_hook(hook):
+    """
+    Registers a function which is called with a ``StageEvent`` after each stage of a request.  Hooks are called in the
+    thread that executes the request and errors raised by hooks are logged and ignored.
+
+    :return:
+        The hook, so that this can be used as a decorator.
+    """
+    with _hooks_lock:
+        hooks.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    with _hooks_lock:
+        if hook in hooks:
+            hooks.remove(hook)
+
+
+@contextmanager
+def trace():
+    """
+    Collects the events of the requests executed in the current thread for the duration of the context.
+
+    :return:
+        A list to which the ``StageEvent`` of each stage is appended.
+    """
+    events = []
+    thread = threading.current_thread()
+
+    def collect(event):
+        if threading.current_thread() is thread:
+            events.append(event)
+
+    add_hook(collect)
+    try:
+        yield events
+    finally:
+        remove_hook(collect)
+
+
+def query_fingerprint(querystrings):
+    """
+    Returns a hash of the queries of a request with the string and number literals removed.
+    """
+    normalized = [_number_literal.sub('?', _string_literal.sub('?', querystring))
+                  for querystring in querystrings]
+    return hashlib.sha1(u'\n'.join(normalized).encode('utf-8')).hexdigest()[:16]
+
+
+class StageEvent(object):
+    """
+    The measurements of one stage of a request.
+
+    The stages are, in order, `prevalidate`, `data`, `display_schema`, `correct_dimension_level_order` and `transform`.
+    The rows, columns and bytes are set for the stages which return a data frame.  The bytes are the memory used by
+    the data frame as reported by ``DataFrame.memory_usage`` without introspecting objects such as strings.
+    """
+
+    def __init__(self, stage, seconds, table=None, transformer=None, fingerprint=None, rows=None, columns=None,
+                 bytes=None, error=None):
+        self.stage = stage
+        self.seconds = seconds
+        self.table = table
+        self.transformer = transformer
+        self.fingerprint = fingerprint
+        self.rows = rows
+        self.columns = columns
+        self.bytes = bytes
+        self.error = error
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return 'StageEvent({})'.format(', '.join('{}={!r}'.format(key, value)
+                                                 for key, value in sorted(vars(self).items())))
+
+
+class _Stage(object):
+    def __init__(self, request_trace, name):
+        self.request_trace = request_trace
+        self.name = name
+        self.result = None
+        self.start = timeit.default_timer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish(error=exc_value)
+
+    def finish(self, result=None, error=None):
+        seconds = timeit.default_timer() - self.start
+        self.request_trace.emit(self.name, seconds, result if result is not None else self.result, error)
+
+
+class _NullStage(object):
+    """
+    Used instead of a stage when no hooks are registered.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def finish(self, result=None, error=None):
+        pass
+
+    @property
+    def result(self):
+        return None
+
+    @result.setter
+    def result(self, value):
+        pass
+
+
+class RequestTrace(object):
+    """
+    Measures the stages of a single request and passes the events to the registered hooks.
+    """
+
+    def __init__(self, manager, transformer, request):
+        self.manager = manager
+        self.transformer = type(transformer).__name__
+        self.request = request
+        self._fingerprint = None
+
+    def stage(self, name):
+        """
+        Starts measuring a stage.  This can be used as a context manager or finished explicitly with ``finish``.
+        """
+        return _Stage(self, name)
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            try:
+                query_schema = self.manager.data_query_schema(**self.request)
+                query_schema.pop('database')
+                query_schema.pop('dtypes')
+                self._fingerprint = query_fingerprint(self.manager._data_querystrings(**query_schema))
+            except Exception:
+                # The request is invalid, which is reported by the request itself
+                return None
+
+        return self._fingerprint
+
+    def emit(self, stage, seconds, result=None, error=None):
+        event = StageEvent(stage, seconds,
+                           table=getattr(self.manager.slicer.table, 'table_name', None),
+                           transformer=self.transformer,
+                           fingerprint=self.fingerprint,
+                           error=type(error).__name__ if error is not None else None)
+
+        if hasattr(result, 'memory_usage'):
+            import numpy as np
+
+            event.rows = len(result)
+            event.columns = len(getattr(result, 'columns', ())) or 1
+            event.bytes = int(np.sum(result.memory_usage(index=True)))
+
+        for hook in list(hooks):
+            try:
+                hook(event)
+            except Exception:
+                logger.exception('Error in instrumentation hook %r', hook)
+
+
+class _NullRequestTrace(object):
+    _stage = _NullStage()
+
+    def stage(self, name):
+        return self._stage
+
+
+_null_trace = _NullRequestTrace()
+
+
+def request_trace(manager, transformer, request):
+    """
+    :return:
+        A ``RequestTrace`` for a request if any hooks are registered, otherwise a trace which does nothing.
+    """
+    if not hooks:
+        return _null_trace
+    return RequestTrace(manager, transformer, request)
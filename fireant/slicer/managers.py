@@ -5,6 +5,9 @@ from collections import OrderedDict
 
 from fireant import utils
 from pypika import functions as fn
+from . import instrumentation, refresh
+from .cache import cache_key
+from .options import OptionsCache, OptionsIndex
 from .postprocessors import OperationManager
 from .queries import QueryManager
 
@@ -14,15 +17,42 @@ class SlicerException(Exception):
 
 
 class SlicerManager(QueryManager, OperationManager):
+    # The number of schemas and query strings which are kept for repeated requests
+    schema_memo_size = 256
+
+    # The number of request results which are kept for incremental refreshes
+    incremental_memo_size = 32
+
     def __init__(self, slicer):
         """
         :param slicer:
         """
         self.slicer = slicer
+        self._schema_memo = utils.LRUCache(self.schema_memo_size)
+        self._incremental_memo = utils.LRUCache(self.incremental_memo_size)
+        self._options_cache = OptionsCache()
+
+    @property
+    def parallel_references(self):
+        return self.slicer.parallel_references
+
+    @property
+    def query_cls(self):
+        return getattr(self.slicer.database, 'query_cls', QueryManager.query_cls)
+
+    @property
+    def unbounded_limit(self):
+        return getattr(self.slicer.database, 'unbounded_limit', QueryManager.unbounded_limit)
+
+    def _date_add(self, field, date_part, interval):
+        date_add = getattr(self.slicer.database, 'date_add', None)
+        if date_add is None:
+            return super(SlicerManager, self)._date_add(field, date_part, interval)
+        return date_add(field, date_part, interval)
 
     def data(self, metrics=(), dimensions=(),
              metric_filters=(), dimension_filters=(),
-             references=(), operations=()):
+             references=(), operations=(), pagination=None, incremental=False):
         """
         :param metrics:
             Type: list or tuple
@@ -48,27 +78,294 @@ class SlicerManager(QueryManager, OperationManager):
             Type: list or tuple
             A set of operations to perform on the response.
 
+        :param pagination:
+            Type: fireant.slicer.pagination.Paginator
+            (Optional) Limits the response to a page of rows which is selected in the query.  The number of rows of
+            the whole response is returned by ``data_count``.  Operations can only be combined with pagination when
+            they are computed by the database with window functions, since they would otherwise only be computed over
+            the rows of the page.
+
+        :param incremental:
+            Type: bool
+            (Optional) When True, the response is kept and when the same request is made again, possibly with a later
+            stop of the range filter, only the most recent intervals are queried and spliced into the kept response.
+            This requires the first dimension to be a datetime dimension with a range filter, and no references, totals
+            or pagination.  Other requests are queried completely.
+
         :return:
             A transformed response that is queried based on the slicer and the format.
         """
         metrics = utils.filter_duplicates(metrics)
         dimensions = utils.filter_duplicates(dimensions)
 
+        if incremental:
+            dataframe = self._data_incremental(metrics, dimensions, metric_filters, dimension_filters, references,
+                                               operations, pagination)
+            if dataframe is not None:
+                return dataframe
+
         query_schema = self.data_query_schema(metrics=metrics, dimensions=dimensions,
                                               metric_filters=metric_filters, dimension_filters=dimension_filters,
-                                              references=references, operations=operations)
+                                              references=references, operations=operations, pagination=pagination)
         operation_schema = self.operation_schema(operations)
 
         dataframe = self.query_data(**query_schema)
         return self.post_process(dataframe, operation_schema)
 
+    def _data_incremental(self, metrics, dimensions, metric_filters, dimension_filters, references, operations,
+                          pagination):
+        """
+        Executes a request and keeps the response so that it can be refreshed incrementally.  When the response of the
+        request is already kept, only the last intervals of the datetime dimension are queried.  The rows of the last
+        kept interval are replaced with the queried rows, and the cumulative operations are only computed for the
+        replaced rows, continuing from the kept rows.
+
+        The response is kept per request, where the range filter on the datetime dimension is matched by its start, so
+        that a request for the same range which ends later is also refreshed incrementally.
+
+        :return:
+            The post-processed data frame or None if the request cannot be refreshed incrementally.
+        """
+        from .filters import RangeFilter
+        from .schemas import DatetimeDimension
+
+        # The rows of totals and the cumulative operations computed by the database depend on the rows which are not
+        # queried again
+        if (not dimensions or references or pagination is not None
+                or any('totals' == operation.key for operation in operations)
+                or (self.slicer.pushdown_operations
+                    and getattr(self.slicer.database, 'supports_window_functions', False))):
+            return None
+
+        dimension_key = utils.slice_first(dimensions[0])
+        if not isinstance(self.slicer.dimensions.get(dimension_key), DatetimeDimension):
+            return None
+
+        dimension_filters = list(dimension_filters)
+        position = refresh.range_filter_position(dimension_filters, dimension_key)
+        if position is None:
+            return None
+
+        range_filter = dimension_filters[position]
+        other_filters = dimension_filters[:position] + dimension_filters[position + 1:]
+        key = ('incremental', utils.freeze((metrics, dimensions, metric_filters, other_filters, operations,
+                                            range_filter.start)))
+
+        def query(dimension_filters):
+            query_schema = self.data_query_schema(metrics=metrics, dimensions=dimensions,
+                                                  metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                                  operations=operations)
+            return self.query_data(**query_schema)
+
+        operation_schema = self.operation_schema(operations)
+        refreshed = self._incremental_memo.get(key)
+        splice_points = refresh.splice_points(refreshed, range_filter.stop)
+
+        if splice_points is None:
+            data = query(dimension_filters)
+            processed = self.post_process(data, operation_schema)
+
+        else:
+            start, splice = splice_points
+            dimension_filters[position] = RangeFilter(dimension_key, start, range_filter.stop)
+
+            previous = refresh.rows_before(refreshed.data, splice)
+            replaced = refresh.rows_from(query(dimension_filters), splice)
+
+            data = refresh.concat([previous, replaced])
+            processed = refresh.concat([refresh.rows_before(refreshed.processed, splice),
+                                        self.post_process(replaced, operation_schema, previous=previous)])
+
+        self._incremental_memo.set(key, refresh.Refresh(range_filter.stop, data, processed))
+        # The kept data frames are spliced when the request is refreshed, so they must not be modified by the caller.
+        # Without operations, the processed data frame is the queried data frame.
+        return processed.copy()
+
+    def data_async(self, metrics=(), dimensions=(),
+                   metric_filters=(), dimension_filters=(),
+                   references=(), operations=(), pagination=None):
+        """
+        The asynchronous counterpart of ``data``.  The query is executed with ``Database.fetch_dataframe_async`` so that
+        many requests can be in flight at once on a single event loop.  This must be called while an asyncio event
+        loop is running.
+
+        See ``data`` for a description of the parameters.
+
+        :return:
+            An asyncio future which resolves to the same data frame that ``data`` returns.
+        """
+        metrics = utils.filter_duplicates(metrics)
+        dimensions = utils.filter_duplicates(dimensions)
+
+        query_schema = self.data_query_schema(metrics=metrics, dimensions=dimensions,
+                                              metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                              references=references, operations=operations, pagination=pagination)
+        operation_schema = self.operation_schema(operations)
+
+        return utils.then(self.query_data_async(**query_schema),
+                          lambda dataframe: self.post_process(dataframe, operation_schema))
+
+    def data_count(self, metrics=(), dimensions=(),
+                   metric_filters=(), dimension_filters=(),
+                   references=(), operations=()):
+        """
+        Counts the rows of the response of a request without loading them, for example to display the number of pages
+        of a paginated request.  The count query selects only the dimensions of the request.
+
+        See ``data`` for a description of the parameters.
+
+        :return:
+            The number of rows.
+        """
+        query_schema = self.data_query_schema(metrics=utils.filter_duplicates(metrics),
+                                              dimensions=utils.filter_duplicates(dimensions),
+                                              metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                              references=references, operations=operations)
+        return self.query_count(**query_schema)
+
+    def data_count_async(self, metrics=(), dimensions=(),
+                         metric_filters=(), dimension_filters=(),
+                         references=(), operations=()):
+        """
+        The asynchronous counterpart of ``data_count``.
+
+        :return:
+            An asyncio future which resolves to the number of rows.
+        """
+        query_schema = self.data_query_schema(metrics=utils.filter_duplicates(metrics),
+                                              dimensions=utils.filter_duplicates(dimensions),
+                                              metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                              references=references, operations=operations)
+        return self.query_count_async(**query_schema)
+
+    def data_chunks(self, metrics=(), dimensions=(),
+                    metric_filters=(), dimension_filters=(),
+                    references=(), operations=(), chunksize=10000):
+        """
+        Executes a request in the same way as ``data`` but returns a generator of data frames of at most `chunksize`
+        rows instead of a single data frame, so that the memory used is bounded by the chunk size instead of the size
+        of the result.
+
+        Operations which post-process the data, such as cumulative sums, require the complete result and are not
+        supported.  Totals are supported.
+
+        :param chunksize:
+            The maximum number of rows in each data frame.
+
+        See ``data`` for a description of the other parameters.
+        """
+        if self.operation_schema(operations):
+            raise SlicerException('Unable to load data in chunks.  Post-processing operations require the complete '
+                                  'result.')
+
+        query_schema = self.data_query_schema(metrics=utils.filter_duplicates(metrics),
+                                              dimensions=utils.filter_duplicates(dimensions),
+                                              metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                              references=references, operations=operations)
+        return self.query_data_chunks(chunksize=chunksize, **query_schema)
+
+    def export_csv(self, buffer, metrics=(), dimensions=(),
+                   metric_filters=(), dimension_filters=(),
+                   references=(), operations=(), chunksize=10000):
+        """
+        Writes the result of a request as a row indexed CSV to a file-like object.  The data is loaded and written one
+        chunk at a time so that large results can be exported without holding the whole result in memory.
+
+        :param buffer:
+            A file-like object to write the CSV to.
+
+        See ``data_chunks`` for a description of the other parameters.
+        """
+        from .transformers import CSVRowIndexTransformer
+
+        display_schema = self.display_schema(metrics, dimensions, references, operations)
+        chunks = self.data_chunks(metrics=metrics, dimensions=dimensions,
+                                  metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                  references=references, operations=operations, chunksize=chunksize)
+
+        for csv in CSVRowIndexTransformer().transform_chunks((utils.correct_dimension_level_order(df, display_schema)
+                                                              for df in chunks),
+                                                             display_schema):
+            buffer.write(csv)
+
+    def invalidate_cache(self, metrics=(), dimensions=(),
+                         metric_filters=(), dimension_filters=(),
+                         references=(), operations=(), pagination=None):
+        """
+        Removes the cached result of a request from the slicer's cache so that the next identical request is queried
+        from the database.  The parameters are the same as for ``data``.  To remove all cached results, clear the
+        cache itself.
+        """
+        cache = self.slicer.cache
+        if cache is None:
+            return
+
+        query_schema = self.data_query_schema(metrics=utils.filter_duplicates(metrics),
+                                              dimensions=utils.filter_duplicates(dimensions),
+                                              metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                              references=references, operations=operations, pagination=pagination)
+        database = query_schema.pop('database')
+        query_schema.pop('dtypes')
+        for querystring in self._data_querystrings(**query_schema):
+            cache.delete(cache_key(database, querystring))
+
     def dimension_options(self, dimension, filters, limit=None):
+        if getattr(self.slicer, 'dimension_options_ttl', None) is not None:
+            options = self._cached_dimension_options(dimension, filters, limit)
+            if options is not None:
+                return options
+
         dimopt_schema = self.dimension_option_schema(dimension, filters, limit)
         return self.query_dimension_options(**dimopt_schema)
 
+    def invalidate_dimension_options(self):
+        """
+        Removes the cached options of all dimensions so that they are loaded again when they are next requested.
+        """
+        self._options_cache.clear()
+
+    def _cached_dimension_options(self, dimension, filters, limit):
+        """
+        Answers a dimension options request from the cached options of the dimension.  The options of the dimension are
+        loaded once without filters and searched in memory.
+
+        :return:
+            A list of the options or None if the request cannot be answered from the cache, in which case it is queried.
+            Requests with filters on other dimensions and filters other than equality, contains and wildcard filters are
+            queried.  The options of datetime and continuous dimensions are never cached.
+        """
+        from .schemas import ContinuousDimension
+
+        schema_dimension = self.slicer.dimensions.get(dimension)
+        if schema_dimension is None or isinstance(schema_dimension, ContinuousDimension):
+            return None
+
+        column_filters = []
+        for f in filters:
+            element_key, modifier = (f.element_key
+                                     if isinstance(f.element_key, (tuple, list))
+                                     else (f.element_key, None))
+            if element_key != dimension:
+                return None
+
+            has_display = getattr(schema_dimension, 'display_field', None) is not None
+            column_filters.append(('%s_display' % dimension if has_display and 'display' == modifier else dimension,
+                                   f))
+
+        def load():
+            dimopt_schema = self.dimension_option_schema(dimension, [])
+            return OptionsIndex(self.query_dimension_options(**dimopt_schema), list(dimopt_schema['dimensions']),
+                                case_sensitive_like=getattr(self.slicer.database, 'case_sensitive_like', True))
+
+        index = self._options_cache.get(dimension, self.slicer.dimension_options_ttl, load)
+        if not index.can_search(column_filters):
+            return None
+
+        return index.search(column_filters, limit)
+
     def data_query_schema(self, metrics=(), dimensions=(),
                           metric_filters=(), dimension_filters=(),
-                          references=(), operations=()):
+                          references=(), operations=(), pagination=None):
         """
         Builds a `dict` model of the schema parts required for executing a data query given a request.
 
@@ -78,9 +375,22 @@ class SlicerManager(QueryManager, OperationManager):
         :param dimension_filters:
         :param references:
         :param operations:
+        :param pagination:
 
         :return:
         """
+        key = ('data_query_schema', self.slicer.pushdown_operations,
+               utils.freeze((metrics, dimensions, metric_filters, dimension_filters, references, operations,
+                             pagination)))
+        schema = self._memoize(key, lambda: self._build_data_query_schema(metrics, dimensions, metric_filters,
+                                                                          dimension_filters, references, operations,
+                                                                          pagination))
+
+        # Callers may remove items from the schema so the memoized schema is not returned directly
+        return dict(schema)
+
+    def _build_data_query_schema(self, metrics, dimensions, metric_filters, dimension_filters, references, operations,
+                                 pagination=None):
         metrics_schema = self._metrics_schema(metrics, operations)
         dimensions_schema = self._dimensions_schema(dimensions)
 
@@ -93,7 +403,19 @@ class SlicerManager(QueryManager, OperationManager):
                                                  self.slicer.metrics)
         dimension_joins_schema = self._joins_schema(set(dimensions) | {df.element_key for df in dimension_filters},
                                                     self.slicer.dimensions)
-        return {
+        references_schema = self._references_schema(references, dimensions, dimensions_schema)
+        rollup_schema = [level
+                         for operation in operations
+                         if 'totals' == operation.key
+                         for dimension in operation.dimension_keys
+                         for level in self.slicer.dimensions[dimension].levels()]
+
+        if self._can_pushdown_operations(dimensions_schema, references_schema, rollup_schema):
+            # The cumulative operations are selected as extra metrics and skipped when post-processing the data
+            metrics_schema.update(self._window_metrics(metrics_schema, dimensions_schema,
+                                                       self.operation_schema(operations)))
+
+        schema = {
             'database': self.slicer.database,
             'table': self.slicer.table,
 
@@ -104,14 +426,212 @@ class SlicerManager(QueryManager, OperationManager):
             'dfilters': dfilters_schmea,
 
             'joins': list(metric_joins_schema | dimension_joins_schema),
-            'references': self._references_schema(references, dimensions, dimensions_schema),
-            'rollup': [level
-                       for operation in operations
-                       if 'totals' == operation.key
-                       for dimension in operation.dimension_keys
-                       for level in self.slicer.dimensions[dimension].levels()],
+            'references': references_schema,
+            'rollup': rollup_schema,
+            'pagination': self._pagination_schema(pagination, metrics_schema, dimensions_schema, operations),
+            'dtypes': self._dtypes_schema(metrics_schema, dimensions_schema),
         }
 
+        aggregate_table = self._aggregate_table(metrics, dimensions, metric_filters, dimension_filters, operations)
+        if aggregate_table is not None:
+            self._replace_table(schema, aggregate_table.table)
+
+        return schema
+
+    def _aggregate_table(self, metrics, dimensions, metric_filters, dimension_filters, operations):
+        """
+        Finds the smallest aggregate table of the slicer which contains the metrics and dimensions of a request,
+        including the metrics and dimensions which are filtered on and the metrics used by operations.
+
+        :return:
+            The aggregate table or None if the request must be queried from the slicer's table.
+        """
+        if not self.slicer.aggregate_tables:
+            return None
+
+        from .schemas import DatetimeDimension
+
+        metric_keys = ({utils.slice_first(metric) for metric in metrics}
+                       | {metric for operation in operations for metric in operation.metrics()}
+                       | {utils.slice_first(mf.element_key) for mf in metric_filters})
+        dimension_keys = ({utils.slice_first(dimension) for dimension in dimensions}
+                          | {utils.slice_first(df.element_key) for df in dimension_filters})
+
+        intervals = {}
+        for dimension in dimensions:
+            key = utils.slice_first(dimension)
+            schema_dimension = self.slicer.dimensions[key]
+
+            if isinstance(schema_dimension, DatetimeDimension):
+                intervals[key] = (dimension[1]
+                                  if isinstance(dimension, (tuple, list)) and 1 < len(dimension)
+                                  else schema_dimension.default_interval)
+
+        for aggregate_table in self.slicer.aggregate_tables:
+            if aggregate_table.covers(metric_keys, dimension_keys, intervals):
+                return aggregate_table
+
+        return None
+
+    def _replace_table(self, schema, table):
+        """
+        Replaces the slicer's table in a data query schema with an aggregate table, including the fields of the table
+        in the metrics, dimensions, filters and join criteria.
+        """
+        def replace(term):
+            return utils.replace_table(term, self.slicer.table, table)
+
+        schema['table'] = table
+        for key in ['metrics', 'dimensions']:
+            schema[key] = OrderedDict((element_key, replace(definition))
+                                      for element_key, definition in schema[key].items())
+        for key in ['mfilters', 'dfilters']:
+            schema[key] = [replace(criterion) for criterion in schema[key]]
+        schema['joins'] = [(join_table, replace(criterion), join_type)
+                           for join_table, criterion, join_type in schema['joins']]
+
+    def _dtypes_schema(self, metrics_schema, dimensions_schema):
+        """
+        Builds the numpy dtypes of the columns of a data query whose types are known from the slicer, so that the
+        results are loaded into columns of these types without inferring them.  Metrics are loaded with the dtype of the
+        metric and the cumulative operations selected with window functions as floats.  Datetime dimensions are loaded
+        as datetime64 and categorical dimensions as pandas categoricals, which store each distinct value once.  The
+        types of the other dimensions are inferred.
+
+        :return:
+            A dict of dtypes keyed by column.
+        """
+        from .schemas import CategoricalDimension, DatetimeDimension
+
+        dtypes = {}
+        for key in metrics_schema:
+            metric = self.slicer.metrics.get(key)
+            dtypes[key] = metric.dtype if metric is not None else 'float64'
+
+        for key in dimensions_schema:
+            dimension = self.slicer.dimensions.get(key)
+            if isinstance(dimension, DatetimeDimension):
+                dtypes[key] = 'datetime64[ns]'
+            elif isinstance(dimension, CategoricalDimension):
+                dtypes[key] = 'category'
+
+        return dtypes
+
+    def _pagination_schema(self, pagination, metrics_schema, dimensions_schema, operations=()):
+        if pagination is None:
+            return None
+
+        for key, order in pagination.order:
+            if key not in metrics_schema and key not in dimensions_schema:
+                raise SlicerException('Unable to order by [{key}].  Only the metrics and dimensions of the request '
+                                      'can be ordered by.'.format(key=key))
+
+        # Post-processed operations would only be computed over the rows of the page, so only operations which are
+        # selected with window functions are computed over the whole result
+        post_processed = [schema['key']
+                          for schema in self.operation_schema(operations)
+                          if '{}_{}'.format(schema['metric'], schema['key']) not in metrics_schema]
+        if post_processed:
+            raise SlicerException('Unable to paginate a request with operations [{keys}].  Operations can only be '
+                                  'paginated when they are computed with window functions by the database.'
+                                  .format(keys=', '.join(post_processed)))
+
+        return {
+            'offset': pagination.offset,
+            'limit': pagination.limit,
+            'orderby': list(pagination.order),
+        }
+
+    def _can_pushdown_operations(self, dimensions_schema, references_schema, rollup_schema):
+        """
+        Operations are computed with window functions only when enabled for the slicer and supported by the database.
+        Requests without dimensions have nothing to accumulate over, and the rows of references and totals are not
+        partitioned the same way in SQL as in pandas, so these are always post-processed in pandas.
+        """
+        return bool(self.slicer.pushdown_operations
+                    and getattr(self.slicer.database, 'supports_window_functions', False)
+                    and dimensions_schema
+                    and not references_schema
+                    and not rollup_schema)
+
+    def _data_querystring(self, table, joins=None, metrics=None, dimensions=None,
+                          mfilters=None, dfilters=None, references=None, rollup=None, pagination=None):
+        args = (table, joins, metrics, dimensions, mfilters, dfilters, references, rollup, pagination)
+        return self._memoize_querystrings('_data_querystring', args,
+                                          lambda: super(SlicerManager, self)._data_querystring(*args))
+
+    def _data_querystrings(self, table, joins=None, metrics=None, dimensions=None,
+                           mfilters=None, dfilters=None, references=None, rollup=None, pagination=None):
+        args = (table, joins, metrics, dimensions, mfilters, dfilters, references, rollup, pagination)
+        return self._memoize_querystrings('_data_querystrings', args,
+                                          lambda: super(SlicerManager, self)._data_querystrings(*args))
+
+    def _count_querystring(self, table, joins=None, metrics=None, dimensions=None, mfilters=None, dfilters=None,
+                           rollup=None):
+        args = (table, joins, metrics, dimensions, mfilters, dfilters, rollup)
+        return self._memoize_querystrings('_count_querystring', args,
+                                          lambda: super(SlicerManager, self)._count_querystring(*args))
+
+    def _memoize(self, key, build):
+        try:
+            value = self._schema_memo.get(key)
+        except TypeError:
+            # The request contains a value which cannot be hashed, such as a numpy array
+            return build()
+
+        if value is None:
+            value = build()
+            self._schema_memo.set(key, value)
+        return value
+
+    def _memoize_querystrings(self, name, args, build):
+        """
+        Memoizes the query strings built from a query schema.  Since the schemas are memoized, a repeated request passes
+        the same schema objects so they are matched by identity instead of comparing the PyPika terms.  The memo keeps a
+        reference to the schema objects so that their ids cannot be reused by other objects while it is memoized.
+        """
+        key = (name, self.parallel_references) + tuple(id(arg) for arg in args)
+        entry = self._schema_memo.get(key)
+        if entry is not None and all(arg is memo_arg for arg, memo_arg in zip(args, entry[0])):
+            return entry[1]
+
+        querystrings = build()
+        self._schema_memo.set(key, (args, querystrings))
+        return querystrings
+
+    def _fetch_dataframe(self, database, querystring, dtypes=None):
+        cache = self.slicer.cache
+        if cache is None:
+            return super(SlicerManager, self)._fetch_dataframe(database, querystring, dtypes)
+
+        key = cache_key(database, querystring)
+        dataframe = cache.get(key)
+        if dataframe is not None:
+            return dataframe
+
+        dataframe = super(SlicerManager, self)._fetch_dataframe(database, querystring, dtypes)
+        return self._cache_dataframe(key, dataframe)
+
+    def _fetch_dataframe_async(self, database, querystring, dtypes=None):
+        cache = self.slicer.cache
+        if cache is None:
+            return super(SlicerManager, self)._fetch_dataframe_async(database, querystring, dtypes)
+
+        key = cache_key(database, querystring)
+        dataframe = cache.get(key)
+        if dataframe is not None:
+            import asyncio
+            future = asyncio.get_event_loop().create_future()
+            future.set_result(dataframe)
+            return future
+
+        return utils.then(super(SlicerManager, self)._fetch_dataframe_async(database, querystring, dtypes),
+                          lambda dataframe: self._cache_dataframe(key, dataframe))
+
+    def _cache_dataframe(self, key, dataframe):
+        self.slicer.cache.set(key, dataframe, ttl=self.slicer.cache_ttl)
+        return dataframe
+
     def dimension_option_schema(self, dimension, filters, limit=None):
         dimensions = [dimension]
 
@@ -149,6 +669,11 @@ class SlicerManager(QueryManager, OperationManager):
         :return:
             A dictionary describing how to transform the resulting data frame for the same request.
         """
+        key = ('display_schema', utils.freeze((metrics, dimensions, references, operations)))
+        schema = self._memoize(key, lambda: self._build_display_schema(metrics, dimensions, references, operations))
+        return dict(schema)
+
+    def _build_display_schema(self, metrics, dimensions, references, operations):
         return {
             'metrics': self._display_metrics(metrics, operations),
             'dimensions': self._display_dimensions(dimensions),
@@ -338,14 +863,30 @@ class SlicerManager(QueryManager, OperationManager):
 class TransformerManager(object):
     def __init__(self, manager, transformers):
         self.manager = manager
+        self.transformers = transformers
+
+    def __getattr__(self, name):
+        # Creates a function for each transformer and an asynchronous counterpart when they are first used
+        transformers = self.__dict__.get('transformers', {})
+
+        if name in transformers:
+            function = functools.partial(self._get_and_transform_data, transformers[name])
+        elif name.endswith('_async') and name[:-len('_async')] in transformers:
+            function = functools.partial(self._get_and_transform_data_async, transformers[name[:-len('_async')]])
+        else:
+            raise AttributeError("'TransformerManager' object has no attribute '{name}'".format(name=name))
+
+        setattr(self, name, function)
+        return function
 
-        # Creates a function on the slicer for each transformer
-        for tx_key, tx in transformers.items():
-            setattr(self, tx_key, functools.partial(self._get_and_transform_data, tx))
+    def __dir__(self):
+        # Includes the transformer functions which are created lazily so that they can be tab-completed
+        return sorted(set(dir(type(self))) | set(self.__dict__)
+                      | {name + suffix for name in self.transformers for suffix in ('', '_async')})
 
     def _get_and_transform_data(self, tx, metrics=(), dimensions=(),
                                 metric_filters=(), dimension_filters=(),
-                                references=(), operations=()):
+                                references=(), operations=(), pagination=None, as_json=False):
         """
         Handles a request and applies a transformation to the result.  This is the implementation of all of the
         transformer manager methods, which are constructed in the __init__ function of this class for each transformer.
@@ -379,21 +920,136 @@ class TransformerManager(object):
             See ``fireant.slicer.SlicerManager``
             A list of post-operations to apply to the result before transformation.
 
+        :param pagination:
+            See ``fireant.slicer.SlicerManager``
+            A page of rows to include in the result.  The total number of rows is counted with a separate query which
+            is executed concurrently and is added to the display schema, so that transformers can include it.
+
+        :param as_json:
+            If True, the transformed result is serialized into JSON with ``Transformer.transform_json``.
+
         :return:
-            The transformed result of the request.
+            The transformed result of the request, or its JSON as UTF-8 encoded bytes if ``as_json`` is True.
         """
+        trace = instrumentation.request_trace(self.manager, tx, dict(metrics=metrics, dimensions=dimensions,
+                                                                     metric_filters=metric_filters,
+                                                                     dimension_filters=dimension_filters,
+                                                                     references=references, operations=operations,
+                                                                     pagination=pagination))
+
+        with trace.stage('prevalidate'):
+            self._prevalidate_request(tx, metrics, dimensions, metric_filters, dimension_filters, references,
+                                      operations)
+
+        # Loads data and transforms it with a given transformer.
+        with trace.stage('data') as stage:
+            count = None
+            if pagination is not None:
+                # The rows are counted in another thread while the page is loaded
+                executor = self.manager.slicer.database.executor
+                count = executor.submit(self.manager.data_count, metrics=metrics, dimensions=dimensions,
+                                        metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                        references=references, operations=operations)
+
+            df = stage.result = self.manager.data(metrics=metrics, dimensions=dimensions,
+                                                  metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                                  references=references, operations=operations, pagination=pagination)
+            page = self._page(pagination, count.result() if count is not None else None)
+
+        return self._transform(tx, df, metrics, dimensions, references, operations, trace, as_json, page)
+
+    def _get_and_transform_data_async(self, tx, metrics=(), dimensions=(),
+                                      metric_filters=(), dimension_filters=(),
+                                      references=(), operations=(), pagination=None, as_json=False):
+        """
+        The asynchronous counterpart of ``_get_and_transform_data``.  This is the implementation of the ``*_async``
+        transformer manager methods.  The request is executed with ``SlicerManager.data_async``.
+
+        :return:
+            An asyncio future which resolves to the transformed result of the request.
+        """
+        trace = instrumentation.request_trace(self.manager, tx, dict(metrics=metrics, dimensions=dimensions,
+                                                                     metric_filters=metric_filters,
+                                                                     dimension_filters=dimension_filters,
+                                                                     references=references, operations=operations,
+                                                                     pagination=pagination))
+
+        with trace.stage('prevalidate'):
+            self._prevalidate_request(tx, metrics, dimensions, metric_filters, dimension_filters, references,
+                                      operations)
+
+        import asyncio
+
+        # The data stage is measured until the data has been loaded
+        data_stage = trace.stage('data')
+        try:
+            future = self.manager.data_async(metrics=metrics, dimensions=dimensions,
+                                             metric_filters=metric_filters, dimension_filters=dimension_filters,
+                                             references=references, operations=operations, pagination=pagination)
+            if pagination is not None:
+                count = self.manager.data_count_async(metrics=metrics, dimensions=dimensions,
+                                                      metric_filters=metric_filters,
+                                                      dimension_filters=dimension_filters,
+                                                      references=references, operations=operations)
+                future = asyncio.gather(future, count)
+        except Exception as e:
+            data_stage.finish(error=e)
+            raise
+
+        future.add_done_callback(functools.partial(self._finish_failed_stage, data_stage))
+
+        if pagination is None:
+            def transform(df):
+                data_stage.finish(df)
+                return self._transform(tx, df, metrics, dimensions, references, operations, trace, as_json)
+
+            return utils.then(future, transform)
+
+        def transform_page(results):
+            df, total = results
+            data_stage.finish(df)
+            return self._transform(tx, df, metrics, dimensions, references, operations, trace, as_json,
+                                   self._page(pagination, total))
+
+        return utils.then(future, transform_page)
+
+    @staticmethod
+    def _finish_failed_stage(stage, future):
+        # Stages of successful requests are finished with their data frame when it is transformed
+        if future.cancelled():
+            import asyncio
+            stage.finish(error=asyncio.CancelledError())
+        elif future.exception() is not None:
+            stage.finish(error=future.exception())
+
+    def _prevalidate_request(self, tx, metrics, dimensions, metric_filters, dimension_filters, references, operations):
         tx.prevalidate_request(self.manager.slicer, metrics=metrics, dimensions=[utils.slice_first(dimension)
                                                                                  for dimension in dimensions],
                                metric_filters=metric_filters, dimension_filters=dimension_filters,
                                references=references, operations=operations)
 
-        # Loads data and transforms it with a given transformer.
-        df = self.manager.data(metrics=metrics, dimensions=dimensions,
-                               metric_filters=metric_filters, dimension_filters=dimension_filters,
-                               references=references, operations=operations)
+    @staticmethod
+    def _page(pagination, total):
+        if pagination is None:
+            return None
+
+        return {
+            'offset': pagination.offset,
+            'limit': pagination.limit,
+            'total': total,
+        }
+
+    def _transform(self, tx, df, metrics, dimensions, references, operations, trace, as_json=False, page=None):
+        with trace.stage('display_schema'):
+            display_schema = self.manager.display_schema(metrics, dimensions, references, operations)
 
-        display_schema = self.manager.display_schema(metrics, dimensions, references, operations)
+        if page is not None:
+            display_schema['pagination'] = page
 
-        df = utils.correct_dimension_level_order(df, display_schema)
+        with trace.stage('correct_dimension_level_order') as stage:
+            df = stage.result = utils.correct_dimension_level_order(df, display_schema)
 
-        return tx.transform(df, display_schema)
+        with trace.stage('transform'):
+            if as_json:
+                return tx.transform_json(df, display_schema)
+            return tx.transform(df, display_schema)
@@ -0,0 +1,282 @@
+# coding: utf-8
+import re
+import threading
+import time
+from collections import defaultdict
+
+import six
+
+from .filters import ContainsFilter, EqualityFilter, WildcardFilter
+
+# Joins the values of a column into a single string for substring searches.  Values cannot contain it since the
+# matches of a needle that does not contain the separator never span two values.
+SEPARATOR = u'\0'
+
+
+def like_regex(pattern):
+    """
+    Converts a SQL LIKE pattern into an equivalent regular expression, where `%` matches any number of characters and
+    `_` matches a single character.
+    """
+    regex = ''.join('.*' if '%' == char else '.' if '_' == char else re.escape(char)
+                    for char in pattern)
+    return re.compile(regex + r'\Z', re.DOTALL)
+
+
+class ColumnIndex(object):
+    """
+    A search index for the values of one column of dimension options.  The string values are sorted and joined into a
+    single string with an array of the offsets of the values, so that prefix searches are a binary search and substring
+    searches are a scan of one string with ``str.find``.
+    """
+
+    def __init__(self, values, case_sensitive=True):
+        """
+        :param values:
+            The values of the column, one for each option.
+        :param case_sensitive:
+            Whether LIKE patterns match the values case-sensitively, as in the database the options are loaded from.
+            Equal values are always matched case-sensitively.
+        """
+        import numpy as np
+
+        self.lookup = defaultdict(list)
+        for position, value in enumerate(values):
+            self.lookup[value].append(position)
+
+        self.case_sensitive = case_sensitive
+        folded = {position: self._fold(value)
+                  for position, value in enumerate(values)
+                  if isinstance(value, six.string_types)}
+        order = sorted(folded, key=lambda position: (folded[position], position))
+
+        # Columns with values other than strings and NULL can only be searched for equal values
+        self.searchable = (len(order) == len([value for value in values if value is not None])
+                           and not any(SEPARATOR in value for value in folded.values()))
+
+        self.positions = np.array(order, dtype=np.int64)
+        self.text = SEPARATOR.join(folded[position] for position in order)
+        self.starts = np.cumsum([0] + [len(folded[position]) + 1 for position in order], dtype=np.int64)
+
+    def _fold(self, value):
+        return value if self.case_sensitive else value.lower()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _value(self, i):
+        return self.text[self.starts[i]:self.starts[i + 1] - 1]
+
+    def _lower_bound(self, prefix):
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._value(mid) < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def equal(self, values):
+        """
+        :return:
+            A sorted list of the positions of the options which are equal to one of the values.
+        """
+        return sorted(position
+                      for value in set(values)
+                      for position in self.lookup.get(value, ()))
+
+    def like(self, pattern):
+        """
+        Finds the options which match a SQL LIKE pattern.  Patterns without wildcards and patterns with a literal
+        prefix are answered with a binary search, other patterns with a substring search for their longest literal
+        part.  Escaped wildcards are not supported.
+
+        :return:
+            A generator of the positions of the matching options in the order of their values.
+        """
+        import numpy as np
+
+        pattern = self._fold(pattern)
+        literals = re.split('[%_]', pattern)
+        if 1 == len(literals):
+            # The separator sorts before any other character, so the values equal to the pattern come before it
+            start, stop = self._lower_bound(pattern), self._lower_bound(pattern + SEPARATOR)
+            for position in self.positions[start:stop]:
+                yield int(position)
+            return
+
+        if pattern.endswith('%') and pattern.index('%') == len(pattern) - 1 and '_' not in pattern:
+            prefix = literals[0]
+            start = self._lower_bound(prefix)
+            stop = self._lower_bound(prefix + u'\U0010ffff') if prefix else len(self)
+            for position in self.positions[start:stop]:
+                yield int(position)
+            return
+
+        regex = like_regex(pattern)
+        needle = max(literals, key=len)
+        if not needle:
+            for i in range(len(self)):
+                if regex.match(self._value(i)):
+                    yield int(self.positions[i])
+            return
+
+        offset = self.text.find(needle)
+        while -1 != offset:
+            i = int(np.searchsorted(self.starts, offset, side='right')) - 1
+            if regex.match(self._value(i)):
+                yield int(self.positions[i])
+
+            # Continues after the value so that each value is matched at most once
+            offset = self.text.find(needle, self.starts[i + 1])
+
+
+class OptionsIndex(object):
+    """
+    The options of a dimension with an index for each column.
+    """
+
+    def __init__(self, options, keys, case_sensitive_like=True):
+        """
+        :param options:
+            A list of dicts with the values of the columns of each option, as returned by
+            ``QueryManager.query_dimension_options``.
+        :param keys:
+            The keys of the columns.
+        :param case_sensitive_like:
+            See ``ColumnIndex``.
+        """
+        self.options = options
+        self.columns = {key: ColumnIndex([option[key] for option in options], case_sensitive=case_sensitive_like)
+                        for key in keys}
+
+    def can_search(self, filters):
+        """
+        :param filters:
+            A list of tuples of a column key and a filter.
+        :return:
+            True if the filters can be answered by the index.
+        """
+        for key, f in filters:
+            column = self.columns.get(key)
+            if column is None:
+                return False
+
+            if isinstance(f, EqualityFilter):
+                if 'eq' != f.operator or isinstance(f.value, (list, tuple)):
+                    return False
+            elif isinstance(f, WildcardFilter):
+                # Backslashes escape wildcards in the LIKE patterns of most databases
+                if not column.searchable or '\\' in f.value:
+                    return False
+            elif not isinstance(f, ContainsFilter):
+                return False
+
+        return True
+
+    def search(self, filters, limit=None):
+        """
+        :param filters:
+            A list of tuples of a column key and a filter.  The options must match all of the filters.
+        :param limit:
+            An optional limit to the number of options returned.
+        :return:
+            A list of the matching options.
+        """
+        if not filters:
+            return self.options[:limit]
+
+        matches = [self._match(key, f) for key, f in filters]
+
+        if 1 == len(matches):
+            # The matches of a single filter are generated lazily, so that only as many as required are searched
+            positions = matches[0]
+        else:
+            positions = sorted(set.intersection(*[set(positions) for positions in matches]))
+
+        options = []
+        for position in positions:
+            if limit and len(options) == limit:
+                break
+            options.append(self.options[position])
+        return options
+
+    def _match(self, key, f):
+        column = self.columns[key]
+
+        if isinstance(f, WildcardFilter):
+            return column.like(f.value)
+        if isinstance(f, ContainsFilter):
+            return column.equal(f.values)
+        return column.equal([f.value])
+
+
+class OptionsCache(object):
+    """
+    Keeps an ``OptionsIndex`` for each dimension of a slicer.  The options of a dimension are loaded the first time they
+    are requested and are loaded again after a TTL expires.  Each dimension is loaded once at a time, while the options
+    of other dimensions can be loaded or looked up concurrently.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl, load):
+        """
+        :param key:
+            The key of the dimension.
+        :param ttl:
+            The number of seconds before the options of the dimension are loaded again.
+        :param load:
+            A function which loads the options of the dimension and returns an ``OptionsIndex``.  It is called when the
+            options are not loaded yet or have expired.  Concurrent requests for the same dimension wait for a single
+            call and raise its exception if it fails.
+        :return:
+            The ``OptionsIndex`` of the dimension.
+        """
+        from concurrent.futures import Future
+
+        with self._lock:
+            entry = self._indexes.get(key)
+            if entry is not None and time.time() < entry[0]:
+                return entry[1]
+
+            future = self._loading.get(key)
+            if future is not None:
+                loading = False
+            else:
+                loading, future = True, Future()
+                self._loading[key] = future
+
+        if not loading:
+            return future.result()
+
+        try:
+            index = load()
+        except BaseException as e:
+            with self._lock:
+                self._finish_loading(key, future)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # The options are not kept if the cache was cleared while they were loaded
+            if self._finish_loading(key, future):
+                self._indexes[key] = (time.time() + ttl, index)
+        future.set_result(index)
+        return index
+
+    def _finish_loading(self, key, future):
+        if self._loading.get(key) is not future:
+            return False
+
+        del self._loading[key]
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            self._loading.clear()
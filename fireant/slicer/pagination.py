@@ -0,0 +1,30 @@
+# coding: utf-8
+from pypika import Order
+
+
+class Paginator(object):
+    """
+    Limits the results of a request to a page of rows.  The page is selected in the query with LIMIT and OFFSET, so only
+    the rows of the page are loaded from the database.
+
+    For example, the ten accounts with the most clicks:
+
+    .. code-block:: python
+
+        Paginator(limit=10, order=[('clicks', Order.desc)])
+    """
+
+    def __init__(self, offset=0, limit=None, order=()):
+        """
+        :param offset:
+            The number of rows to skip.
+        :param limit:
+            The maximum number of rows to return or None to return all of the rows after the offset.
+        :param order:
+            A list of tuples of a metric or dimension key and a ``pypika.Order`` which the rows are sorted by.  The rows
+            are then sorted by the dimensions of the request.  A key without a tuple is sorted in ascending order.
+        """
+        self.offset = offset
+        self.limit = limit
+        self.order = [key if isinstance(key, tuple) else (key, Order.asc)
+                      for key in order]
@@ -1,5 +1,5 @@
 # coding: utf-8
-import pandas as pd
+from collections import OrderedDict
 
 
 def get_cum_metric(dataframe, schema, reference=None):
@@ -29,17 +29,120 @@ value_functions = {
     'l1loss': get_loss_metric,
     'l2loss': get_loss_metric,
 }
+
+# Each operation is the expanding sum or mean of the values given by the value function after applying a numpy function
+# to them
 operation_functions = {
-    'cumsum': lambda x: x.expanding(min_periods=1).sum(),
-    'cummean': lambda x: x.expanding(min_periods=1).mean(),
-    'l1loss': lambda x: x.abs().expanding(min_periods=1).mean(),
-    'l2loss': lambda x: x.pow(2).expanding(min_periods=1).mean(),
+    'cumsum': (None, 'sum'),
+    'cummean': (None, 'mean'),
+    'l1loss': ('abs', 'mean'),
+    'l2loss': ('square', 'mean'),
 }
 
 
+def _sums_and_counts(values):
+    """
+    Returns a 2D array with the values, where NaN values are replaced by zero, followed by a column for each column of
+    the values which is one where the value is not NaN.
+    """
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    observed = ~np.isnan(values)
+    return np.hstack([np.where(observed, values, 0.), observed.astype(float)])
+
+
+def carried_totals(values, index, groupby_levels, target_index):
+    """
+    Computes the sums and the counts of the values which are not NaN in each group of the rows of a previous data frame,
+    for each row of the data frame following it, so that the expanding sums and means of the following rows continue
+    from the previous rows instead of being computed for all rows again.
+
+    :param values:
+        A 2D array with the values of one or more columns of the previous rows.
+    :param index:
+        The index of the previous rows.
+    :param groupby_levels:
+        The levels of the index which split the rows into groups or None if all rows are in the same group.
+    :param target_index:
+        The index of the following rows.
+    :return:
+        A 2D array with the sums followed by the counts of each column, with a row for each row of the target index.
+    """
+    import numpy as np
+    import pandas as pd
+
+    totals = _sums_and_counts(values)
+
+    if groupby_levels is None:
+        return np.tile(totals.sum(axis=0), (len(target_index), 1))
+
+    grouped = pd.DataFrame(totals, index=index).groupby(level=groupby_levels).sum()
+    return grouped.reindex(target_index.droplevel(0)).fillna(0.).values
+
+
+def expanding(values, index, groupby_levels, aggregation, initial=None):
+    """
+    Computes the expanding sum or mean of each column of an array in the order of the rows.  This is the same as
+    ``expanding(min_periods=1).sum()`` or ``.mean()`` in each group, which skips NaN values.  The running sums of the
+    values and the running counts of the values which are not NaN are computed for all of the columns in one pass.
+
+    :param values:
+        A 2D array with the values of one or more columns.
+    :param index:
+        The index of the rows.
+    :param groupby_levels:
+        The levels of the index which split the rows into groups or None if all rows are in the same group.
+    :param aggregation:
+        Either 'sum' or 'mean'.
+    :param initial:
+        (Optional) The sums and counts of previous rows, as returned by ``carried_totals``, which the running sums and
+        counts start from.
+    :return:
+        A 2D array of floats with the same shape as the values.
+    """
+    import numpy as np
+    import pandas as pd
+
+    values = np.asarray(values, dtype=float)
+    running = _sums_and_counts(values)
+
+    if groupby_levels is None:
+        running = np.cumsum(running, axis=0)
+    else:
+        # Rows with NaN in the grouped levels do not belong to a group and are NaN in the result
+        running = pd.DataFrame(running, index=index).groupby(level=groupby_levels).cumsum().values
+
+    if initial is not None:
+        running = running + initial
+
+    n_columns = values.shape[1]
+    sums, counts = running[:, :n_columns], running[:, n_columns:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = sums / counts if 'mean' == aggregation else sums
+    return np.where(counts > 0, result, np.nan)
+
+
 class OperationManager(object):
-    def post_process(self, dataframe, operation_schema):
-        dataframe = dataframe.copy()
+    def post_process(self, dataframe, operation_schema, previous=None):
+        """
+        Adds a column to the data frame for each operation and each reference.  A new data frame is returned and the
+        given data frame is not modified.  If there are no operations to perform, the given data frame is returned.
+
+        Operations which were already computed by the database, in which case their columns are already in the data
+        frame, are skipped.
+
+        :param previous:
+            (Optional) A data frame with the same columns containing the rows which precede the rows of the data frame
+            along the first dimension, such as the rows kept when a time series is refreshed incrementally.  The
+            operations continue from these rows and are only computed for the rows of the data frame.  The previous rows
+            are not included in the result.
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns = OrderedDict()
 
         for schema in operation_schema:
             key = schema['key']
@@ -48,26 +151,63 @@ class OperationManager(object):
             if not value_func or not operation_func:
                 continue
 
-            self._perform_operation(dataframe, key, schema, value_func, operation_func)
+            if '{}_{}'.format(schema['metric'], key) in dataframe.columns:
+                # The operation was computed in the query
+                continue
+
+            columns.update(self._perform_operation(dataframe, key, schema, value_func, operation_func, previous))
 
-        return dataframe
+        if not columns:
+            return dataframe
+
+        operation_keys = list(columns.keys())
+        operations_df = pd.DataFrame(np.column_stack(list(columns.values())), index=dataframe.index,
+                                     columns=(pd.MultiIndex.from_tuples(operation_keys)
+                                              if isinstance(dataframe.columns, pd.MultiIndex)
+                                              else operation_keys))
+        return pd.concat([dataframe, operations_df], axis=1)
+
+    def _perform_operation(self, dataframe, key, schema, value_func, operation, previous=None):
+        """
+        Computes an operation for the metric of each reference at once.
+
+        :return:
+            A list of the operation column keys and their values.
+        """
+        import numpy as np
+        import pandas as pd
 
-    def _perform_operation(self, dataframe, key, schema, value_func, operation):
         # Check for references
-        references = (dataframe.columns.get_level_values(0).tolist()
+        references = (list(OrderedDict.fromkeys(dataframe.columns.get_level_values(0)))
                       if isinstance(dataframe.columns, pd.MultiIndex)
                       else [None])
 
-        for reference in references:
-            metric_df = value_func(dataframe, schema, reference=reference)
+        metric_dfs = [value_func(dataframe, schema, reference=reference)
+                      for reference in references]
+
+        operation_keys = [('{}_{}'.format(metric_df.name, key)
+                           if reference is None
+                           else (reference, '{}_{}'.format(metric_df.name[1], key)))
+                          for reference, metric_df in zip(references, metric_dfs)]
+
+        transform, aggregation = operation
+
+        def operation_values(metric_dfs):
+            values = np.column_stack([metric_df.values for metric_df in metric_dfs]).astype(float)
+            return getattr(np, transform)(values) if transform is not None else values
+
+        values = operation_values(metric_dfs)
 
-            operation_key = ('{}_{}'.format(metric_df.name, key)
-                             if reference is None
-                             else (reference, '{}_{}'.format(metric_df.name[1], key)))
+        groupby_levels = (list(range(1, len(dataframe.index.levels)))
+                          if isinstance(dataframe.index, pd.MultiIndex)
+                          else None)
 
-            if isinstance(dataframe.index, pd.MultiIndex):
-                unstack_levels = list(range(1, len(dataframe.index.levels)))
-                dataframe[operation_key] = metric_df.groupby(level=unstack_levels).apply(operation)
+        initial = None
+        if previous is not None and len(previous):
+            previous_values = operation_values([value_func(previous, schema, reference=reference)
+                                                for reference in references])
+            initial = carried_totals(previous_values, previous.index, groupby_levels, dataframe.index)
 
-            else:
-                dataframe[operation_key] = operation(metric_df)
+        results = expanding(values, dataframe.index, groupby_levels, aggregation, initial)
+        return [(operation_key, results[:, i])
+                for i, operation_key in enumerate(operation_keys)]
@@ -1,30 +1,89 @@
 # coding: utf-8
 import copy
+import functools
 import logging
+import operator
+from collections import OrderedDict
 
-import pandas as pd
-
+from fireant import utils
 from pypika import Query, Interval, JoinType, functions as fn
+from pypika.terms import BasicCriterion, ComplexCriterion, Function
 
 logger = logging.Logger('fireant')
 
-reference_dimension_mappers = {
-    'yoy': lambda join_key: join_key + Interval(weeks=52),
-    'qoq': lambda join_key: join_key + Interval(quarters=1),
-    'mom': lambda join_key: join_key + Interval(weeks=4),
-    'wow': lambda join_key: join_key + Interval(weeks=1),
+# The intervals which the dates of each reference are shifted by, as the unit and number of units
+reference_intervals = {
+    'yoy': ('weeks', 52),
+    'qoq': ('quarters', 1),
+    'mom': ('weeks', 4),
+    'wow': ('weeks', 1),
 }
 reference_metric_mappers = {
     'd': lambda field, join_field: (field - join_field),
     'p': lambda field, join_field: ((field - join_field) / fn.NullIf(join_field, 0)),
 }
+reference_dataframe_mappers = {
+    'd': lambda dataframe, ref_dataframe: (dataframe - ref_dataframe),
+    'p': lambda dataframe, ref_dataframe: ((dataframe - ref_dataframe) / ref_dataframe.replace(0, float('nan'))),
+}
+
+# The window functions used to compute the cumulative operations in the database, see ``QueryManager._window_metrics``
+operation_window_functions = {
+    'cumsum': 'SUM',
+    'cummean': 'AVG',
+}
+
+
+class WindowFunction(Function):
+    """
+    An aggregate function over the rows from the first row of a partition until the current row, for example
+    ``SUM(SUM("clicks")) OVER (PARTITION BY "device" ORDER BY "dt" ROWS UNBOUNDED PRECEDING)``.
+    """
+
+    def __init__(self, name, term, partition_by=(), order_by=(), alias=None):
+        super(WindowFunction, self).__init__(name, term, alias=alias)
+        self.partition_by = list(partition_by)
+        self.order_by = list(order_by)
+
+    def get_sql(self, with_alias=False, with_namespace=False, **kwargs):
+        def terms_sql(terms):
+            return ','.join(term.get_sql(with_quotes=True, with_alias=False, with_namespace=with_namespace)
+                            for term in terms)
+
+        window = []
+        if self.partition_by:
+            window.append('PARTITION BY {}'.format(terms_sql(self.partition_by)))
+        if self.order_by:
+            window.append('ORDER BY {}'.format(terms_sql(self.order_by)))
+        window.append('ROWS UNBOUNDED PRECEDING')
+
+        return '{function} OVER ({window}){alias}'.format(
+            function=super(WindowFunction, self).get_sql(with_alias=False, with_namespace=with_namespace),
+            window=' '.join(window),
+            alias=' "{}"'.format(self.alias) if self.alias is not None and with_alias else ''
+        )
+
+    def fields(self):
+        return super(WindowFunction, self).fields() + [field
+                                                       for term in self.partition_by + self.order_by
+                                                       for field in term.fields()]
 
 
 class QueryManager(object):
+    # When enabled, each reference is executed as a separate query in parallel and joined to the results in pandas
+    # instead of being joined in a single query.
+    parallel_references = False
+
+    # The PyPika query class used to build queries, see ``Database.query_cls``
+    query_cls = Query
+
+    # The LIMIT added to an OFFSET without a limit, see ``Database.unbounded_limit``
+    unbounded_limit = None
+
     def query_data(self, database, table, joins=None,
                    metrics=None, dimensions=None,
                    mfilters=None, dfilters=None,
-                   references=None, rollup=None):
+                   references=None, rollup=None, pagination=None, dtypes=None):
         """
         Loads a pandas data frame given a table and a description of the request.
 
@@ -108,16 +167,137 @@ class QueryManager(object):
                 When using rollup for less than all of the dimensions, the dimensions included in the ROLLUP will be
                 moved after the non-ROLLUP dimensions.
 
+        :param pagination:
+            Type: dict
+            (Optional) Limits the results to a page of rows with the keys `offset`, `limit` and `orderby`.  The
+            `orderby` value is a list of tuples of a metric or dimension key and a ``pypika.Order``.  When it is not
+            empty, the rows are returned in this order followed by the order of the dimensions instead of being sorted
+            by the dimensions.
+
+        :param dtypes:
+            Type: dict[str: str]
+            (Optional) The numpy dtypes of the metrics and dimensions whose types are known in advance, keyed by column.
+            The results are loaded into columns of these types instead of inferring the types from the values.
+
         :return:
             A pd.DataFrame indexed by the provided dimensions paramaters containing columns for each metrics parameter.
         """
-        query = self._build_data_query(table, joins or dict(), metrics or dict(), dimensions or dict(),
-                                       dfilters or dict(), mfilters or dict(), references or dict(), rollup or dict())
+        if references and self.parallel_references:
+            querystrings = self._data_querystrings(table, joins, metrics, dimensions, mfilters, dfilters, references,
+                                                   rollup, pagination)
+            for querystring in querystrings:
+                logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
+
+            dataframes = database.executor.map(functools.partial(self._fetch_dataframe, database, dtypes=dtypes),
+                                               querystrings)
+            return self._join_references(list(dataframes), metrics, dimensions, references,
+                                         sort=self._sort_by_dimensions(pagination))
+
+        querystring = self._data_querystring(table, joins, metrics, dimensions, mfilters, dfilters, references, rollup,
+                                             pagination)
+        logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
 
-        querystring = str(query)
+        dataframe = self._fetch_dataframe(database, querystring, self._reference_dtypes(dtypes, metrics, references))
+        return self._format_dataframe(dataframe, metrics, dimensions, references,
+                                      sort=self._sort_by_dimensions(pagination))
+
+    def query_data_async(self, database, table, joins=None,
+                         metrics=None, dimensions=None,
+                         mfilters=None, dfilters=None,
+                         references=None, rollup=None, pagination=None, dtypes=None):
+        """
+        Loads data in the same way as ``query_data`` but executes the query asynchronously using
+        ``Database.fetch_dataframe_async``.  This must be called while an asyncio event loop is running.
+
+        See ``query_data`` for a description of the parameters.
+
+        :return:
+            An asyncio future which resolves to the pd.DataFrame returned by ``query_data``.
+        """
+        if references and self.parallel_references:
+            import asyncio
+
+            querystrings = self._data_querystrings(table, joins, metrics, dimensions, mfilters, dfilters, references,
+                                                   rollup, pagination)
+            for querystring in querystrings:
+                logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
+
+            return utils.then(asyncio.gather(*[self._fetch_dataframe_async(database, querystring, dtypes)
+                                               for querystring in querystrings]),
+                              lambda dataframes: self._join_references(list(dataframes), metrics, dimensions,
+                                                                       references,
+                                                                       sort=self._sort_by_dimensions(pagination)))
+
+        querystring = self._data_querystring(table, joins, metrics, dimensions, mfilters, dfilters, references, rollup,
+                                             pagination)
+        logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
+
+        return utils.then(self._fetch_dataframe_async(database, querystring,
+                                                      self._reference_dtypes(dtypes, metrics, references)),
+                          lambda dataframe: self._format_dataframe(dataframe, metrics, dimensions, references,
+                                                                   sort=self._sort_by_dimensions(pagination)))
+
+    def query_count(self, database, table, joins=None,
+                    metrics=None, dimensions=None,
+                    mfilters=None, dfilters=None,
+                    references=None, rollup=None, pagination=None, dtypes=None):
+        """
+        Counts the rows of the result of a request without loading them, for example to display the number of pages
+        of a paginated request.  The pagination and dtypes are ignored and the references are not queried since they do
+        not change the number of rows.
+
+        See ``query_data`` for a description of the parameters.
+
+        :return:
+            The number of rows.
+        """
+        querystring = self._count_querystring(table, joins, metrics, dimensions, mfilters, dfilters, rollup)
         logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
 
-        dataframe = database.fetch_dataframe(querystring)
+        return self._format_count(self._fetch_dataframe(database, querystring))
+
+    def query_count_async(self, database, table, joins=None,
+                          metrics=None, dimensions=None,
+                          mfilters=None, dfilters=None,
+                          references=None, rollup=None, pagination=None, dtypes=None):
+        """
+        The asynchronous counterpart of ``query_count``.
+
+        :return:
+            An asyncio future which resolves to the number of rows.
+        """
+        querystring = self._count_querystring(table, joins, metrics, dimensions, mfilters, dfilters, rollup)
+        logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
+
+        return utils.then(self._fetch_dataframe_async(database, querystring), self._format_count)
+
+    def query_data_chunks(self, database, table, joins=None,
+                          metrics=None, dimensions=None,
+                          mfilters=None, dfilters=None,
+                          references=None, rollup=None, pagination=None, chunksize=10000, dtypes=None):
+        """
+        Loads data in the same way as ``query_data`` but yields the results as several pandas data frames of at most
+        `chunksize` rows instead of a single data frame.  This bounds the memory used for loading large results.
+
+        The chunks are in the order of the dimensions, as returned by the database, but are not sorted in pandas.
+
+        See ``query_data`` for a description of the parameters.
+        """
+        querystring = self._data_querystring(table, joins, metrics, dimensions, mfilters, dfilters, references, rollup,
+                                             pagination)
+        logger.info("Executing query:\n----START----\n{query}\n-----END-----".format(query=querystring))
+
+        dtypes = self._reference_dtypes(dtypes, metrics, references)
+        chunks = (database.fetch_dataframe_chunks(querystring, chunksize=chunksize, dtypes=dtypes)
+                  if dtypes
+                  else database.fetch_dataframe_chunks(querystring, chunksize=chunksize))
+        for dataframe in chunks:
+            yield self._format_dataframe(dataframe, metrics, dimensions, references)
+
+    @staticmethod
+    def _format_dataframe(dataframe, metrics, dimensions, references, sort=False):
+        import pandas as pd
+
         dataframe.columns = [col.decode('utf-8') if isinstance(col, bytes) else col
                              for col in dataframe.columns]
 
@@ -125,11 +305,61 @@ class QueryManager(object):
             dataframe = dataframe.set_index(
                 # Removed the reference keys for now
                 list(dimensions.keys())  # + ['{1}_{0}'.format(*ref) for ref in references.items()]
-            ).sort_index()
+            )
+        else:
+            # Results read from a memory-mapped cache are read-only and are otherwise copied by set_index
+            dataframe = dataframe.copy()
 
         if references:
             dataframe.columns = pd.MultiIndex.from_product([[''] + list(references.keys()), list(metrics.keys())])
 
+        if sort and dimensions:
+            dataframe = dataframe.sort_index()
+
+        return dataframe
+
+    @staticmethod
+    def _sort_by_dimensions(pagination):
+        # Paginated results which are ordered by metrics keep the order of the query
+        return not (pagination and pagination['orderby'])
+
+    @staticmethod
+    def _format_count(dataframe):
+        return int(dataframe.iloc[0, 0])
+
+    def _join_references(self, dataframes, metrics, dimensions, references, sort=True):
+        """
+        Joins the results of the reference queries to the results of the base query when references are executed as
+        separate queries.  The result is the same as when the references are joined in SQL.
+
+        :param dataframes:
+            A list of data frames returned by the database, the base query followed by one for each reference in the
+            order of the references dict.
+        """
+        import numpy as np
+        import pandas as pd
+
+        metric_keys = list(metrics.keys())
+        dataframes = [self._format_dataframe(dataframe, metrics, dimensions, None)[metric_keys]
+                      for dataframe in dataframes]
+        dataframe, ref_dataframes = dataframes[0], dataframes[1:]
+
+        # Rows with NULL dimension values, such as rollup totals, are never matched by a join in SQL
+        null_index = pd.DataFrame(index=dataframe.index).reset_index().isnull().any(axis=1).values
+
+        columns = [dataframe]
+        for reference_key, ref_dataframe in zip(references.keys(), ref_dataframes):
+            ref_dataframe = ref_dataframe.reindex(dataframe.index)
+            ref_dataframe[null_index] = np.nan
+
+            metric_f = self._get_reference_dataframe_mapper(reference_key)
+            columns.append(metric_f(dataframe, ref_dataframe))
+
+        dataframe = pd.concat(columns, axis=1, keys=[''] + list(references.keys()))
+
+        if sort and dimensions:
+            dataframe = dataframe.sort_index()
+
         return dataframe
 
     def query_dimension_options(self, database, table, joins=None, dimensions=None, filters=None, limit=None):
@@ -160,47 +390,124 @@ class QueryManager(object):
         return [{k: v for k, v in zip(dimensions.keys(), result)}
                 for result in results]
 
-    def _build_data_query(self, table, joins, metrics, dimensions, dfilters, mfilters, references, rollup):
+    def _data_querystring(self, table, joins=None, metrics=None, dimensions=None,
+                          mfilters=None, dfilters=None, references=None, rollup=None, pagination=None):
+        query = self._build_data_query(table, joins or dict(), metrics or dict(), dimensions or dict(),
+                                       dfilters or dict(), mfilters or dict(), references or dict(), rollup or dict(),
+                                       pagination)
+        return self._add_pagination(str(query), pagination)
+
+    def _data_querystrings(self, table, joins=None, metrics=None, dimensions=None,
+                           mfilters=None, dfilters=None, references=None, rollup=None, pagination=None):
+        """
+        :return:
+            The list of query strings executed for a request.  This is a single query unless the references are executed
+            in parallel, in which case the base query is followed by a query for each reference.
+        """
+        if not (references and self.parallel_references):
+            return [self._data_querystring(table, joins, metrics, dimensions, mfilters, dfilters, references, rollup,
+                                           pagination)]
+
+        args = (table, joins or dict(), metrics or dict(), dimensions or dict(), dfilters or dict(), mfilters or dict(),
+                rollup or dict())
+        query = self._add_sorting(self._build_query_inner(*args), list(args[3].values()),
+                                  self._orderby_terms(args[2], args[3], pagination))
+        return [self._add_pagination(str(query), pagination)] + [str(ref_query)
+                               for _, _, ref_query in self._build_reference_subqueries(references, *args)]
+
+    def _fetch_dataframe(self, database, querystring, dtypes=None):
+        # The dtypes are only passed when there are any so that databases which override fetch_dataframe without the
+        # dtypes parameter can still be used
+        if dtypes:
+            return database.fetch_dataframe(querystring, dtypes=dtypes)
+        return database.fetch_dataframe(querystring)
+
+    def _fetch_dataframe_async(self, database, querystring, dtypes=None):
+        if dtypes:
+            return database.fetch_dataframe_async(querystring, dtypes=dtypes)
+        return database.fetch_dataframe_async(querystring)
+
+    @classmethod
+    def _reference_dtypes(cls, dtypes, metrics, references):
+        """
+        Adds the columns of the references, which are joined in the query, to the dtypes of a request.  These are always
+        floats since the values are missing for the rows which are not matched by the join.
+        """
+        if not (dtypes and references):
+            return dtypes
+
+        dtypes = dict(dtypes)
+        for reference_key in references.keys():
+            for key in metrics.keys():
+                dtypes[cls._suffix(key, reference_key)] = 'float64'
+        return dtypes
+
+    def _count_querystring(self, table, joins=None, metrics=None, dimensions=None, mfilters=None, dfilters=None,
+                           rollup=None):
+        # Only the dimensions are selected since the metrics do not change the number of rows
+        query = self._build_query_inner(table, joins or dict(), dict() if dimensions else metrics or dict(),
+                                        dimensions or dict(), dfilters or dict(), mfilters or dict(), rollup or dict())
+
+        # PyPika does not alias a subquery in the FROM clause without joins, which is required by most databases
+        return 'SELECT COUNT(*) "count" FROM ({query}) "rows"'.format(query=query)
+
+    def _build_data_query(self, table, joins, metrics, dimensions, dfilters, mfilters, references, rollup,
+                          pagination=None):
         args = (table, joins, metrics, dimensions, dfilters, mfilters, rollup)
         query = self._build_query_inner(*args)
 
         if references:
-            return self._build_reference_query(query, references, *args)
+            return self._build_reference_query(query, references, *args, pagination=pagination)
 
-        return self._add_sorting(query, list(dimensions.values()))
+        return self._add_sorting(query, list(dimensions.values()), self._orderby_terms(metrics, dimensions, pagination))
 
-    def _build_reference_query(self, query, references, table, joins, metrics, dimensions, dfilters, mfilters, rollup):
-        wrapper_query = Query.from_(query).select(*[query.field(key).as_(key)
-                                                    for key in list(dimensions.keys()) + list(metrics.keys())])
+    def _build_reference_query(self, query, references, table, joins, metrics, dimensions, dfilters, mfilters, rollup,
+                               pagination=None):
+        # Each PyPika builder call copies the whole query including the subqueries, so all of the terms are selected
+        # with a single call after the reference queries have been joined.
+        wrapper_query = self.query_cls.from_(query)
+        terms = [query.field(key).as_(key)
+                 for key in list(dimensions.keys()) + list(metrics.keys())]
 
-        for reference_key, dimension_key in references.items():
+        for reference_key, dimension_key, ref_query in self._build_reference_subqueries(references, table, joins,
+                                                                                        metrics, dimensions, dfilters,
+                                                                                        mfilters, rollup):
             dimension_f, metric_f = self._get_reference_mappers(reference_key)
 
-            dimensions, dfilters = self._replace_dim_for_ref(dfilters, dimension_key, dimensions,
-                                                             dimension_f)
-            ref_query = self._build_query_inner(table, joins, metrics, dimensions,
-                                                dfilters, mfilters, rollup)
-
             ref_criteria = query.field(dimension_key) == ref_query.field(dimension_key)
-            for dkey in set(dimensions.keys()) - {dimension_key}:
-                ref_criteria &= query.field(dkey) == ref_query.field(dkey)
+            for dkey in dimensions.keys():
+                if dkey != dimension_key:
+                    ref_criteria &= query.field(dkey) == ref_query.field(dkey)
 
             # Join the reference query and select the reference dimension and all metrics
             # This ignores additional dimensions since they are identical to the primary results
-            wrapper_query = (
-                wrapper_query.join(ref_query, JoinType.left)
-                    .on(ref_criteria)
-                    # Don't select this for now
-                    # .select(ref_dimension.as_(self._suffix(dimension_key, reference_key)))
-                    .select(
-                    *[metric_f(query.field(key), ref_query.field(key)).as_(self._suffix(key, reference_key))
-                      for key in metrics.keys()])
-            )
+            wrapper_query = wrapper_query.join(ref_query, JoinType.left).on(ref_criteria)
+            terms += [metric_f(query.field(key), ref_query.field(key)).as_(self._suffix(key, reference_key))
+                      for key in metrics.keys()]
+
+        wrapper_query = wrapper_query.select(*terms)
+        return self._add_sorting(wrapper_query, [query.field(dkey) for dkey in dimensions.keys()],
+                                 [(query.field(key), order)
+                                  for key, order in (pagination or {}).get('orderby', ())])
+
+    def _build_reference_subqueries(self, references, table, joins, metrics, dimensions, dfilters, mfilters, rollup):
+        """
+        Builds a copy of the query for each reference with the reference dimension and the filters on it shifted by the
+        reference interval.  Each reference is shifted from the original dimensions and filters.
+
+        :return:
+            A generator of tuples containing the reference key, the reference dimension key and the reference query.
+        """
+        for reference_key, dimension_key in references.items():
+            dimension_f, metric_f = self._get_reference_mappers(reference_key)
 
-        return self._add_sorting(wrapper_query, [query.field(dkey) for dkey in dimensions.keys()])
+            ref_dimensions, ref_dfilters = self._replace_dim_for_ref(dfilters, dimension_key, dimensions, dimension_f)
+            ref_query = self._build_query_inner(table, joins, metrics, ref_dimensions, ref_dfilters, mfilters, rollup)
+
+            yield reference_key, dimension_key, ref_query
 
     def _build_dimension_query(self, table, joins, dimensions, filters, limit=None):
-        query = Query.from_(table).distinct()
+        query = self.query_cls.from_(table).distinct()
         query = self._add_joins(joins, query)
         query = self._add_filters(query, filters, [])
 
@@ -213,7 +520,7 @@ class QueryManager(object):
         return query
 
     def _build_query_inner(self, table, joins, metrics, dimensions, dfilters, mfilters, rollup):
-        query = Query.from_(table)
+        query = self.query_cls.from_(table)
         query = self._add_joins(joins, query)
         query = self._select_dimensions(query, dimensions, rollup)
         query = self._select_metrics(query, metrics)
@@ -248,28 +555,87 @@ class QueryManager(object):
 
     @staticmethod
     def _add_filters(query, dfilters, mfilters):
+        # The filters are combined before adding them to the query since each PyPika builder call copies the query
         if dfilters:
-            for dfx in dfilters:
-                query = query.where(dfx)
+            query = query.where(functools.reduce(operator.and_, dfilters))
 
         if mfilters:
-            for mfx in mfilters:
-                query = query.having(mfx)
+            query = query.having(functools.reduce(operator.and_, mfilters))
 
         return query
 
     @staticmethod
-    def _add_sorting(query, dimensions):
+    def _add_sorting(query, dimensions, orderby=()):
+        """
+        :param orderby:
+            A list of tuples of a term and a ``pypika.Order`` to sort by before the dimensions.
+        """
+        for term, order in orderby:
+            query = query.orderby(term, order=order)
+
         if dimensions:
             return query.orderby(*dimensions)
         return query
 
+    @staticmethod
+    def _orderby_terms(metrics, dimensions, pagination):
+        return [(metrics[key] if key in metrics else dimensions[key], order)
+                for key, order in (pagination or {}).get('orderby', ())]
+
+    def _add_pagination(self, querystring, pagination):
+        # PyPika renders OFFSET before LIMIT, which is not supported by all databases, so they are added to the SQL here
+        if not pagination:
+            return querystring
+
+        limit = pagination.get('limit')
+        if limit is None and pagination.get('offset'):
+            limit = self.unbounded_limit
+        if limit is not None:
+            querystring += ' LIMIT {:d}'.format(limit)
+        if pagination.get('offset'):
+            querystring += ' OFFSET {:d}'.format(pagination['offset'])
+        return querystring
+
+    @staticmethod
+    def _window_metrics(metrics, dimensions, operation_schema):
+        """
+        Builds a window function for each cumulative operation so that the operations can be selected as metrics and
+        computed by the database.  The windows are partitioned by all of the dimensions except the first, which orders
+        the rows, the same way the operations are computed in pandas.
+
+        :param metrics:
+            The metrics schema of the request.
+        :param dimensions:
+            The dimensions schema of the request, which must contain at least one dimension.
+        :param operation_schema:
+            The operation schema of the request.
+        :return:
+            An OrderedDict of the window functions keyed by the column of each operation.  Operations which cannot be
+            computed with a window function are not included.
+        """
+        dimension_terms = list(dimensions.values())
+        partition_by, order_by = dimension_terms[1:], dimension_terms[:1]
+
+        windows = OrderedDict()
+        for schema in operation_schema:
+            function = operation_window_functions.get(schema['key'])
+            metric = metrics.get(schema.get('metric'))
+            if function is None or metric is None:
+                continue
+
+            key = '{}_{}'.format(schema['metric'], schema['key'])
+            windows[key] = WindowFunction(function, metric, partition_by=partition_by, order_by=order_by)
+
+        return windows
+
     @staticmethod
     def _suffix(key, suffix):
         return '%s_%s' % (key, suffix) if suffix else key
 
-    @staticmethod
-    def _get_reference_mappers(reference_key):
+    def _date_add(self, field, date_part, interval):
+        return field + Interval(**{date_part: interval})
+
+    def _get_reference_mappers(self, reference_key):
         """
         Selects the mapper functions for a reference operation.
 
@@ -301,11 +667,27 @@ class QueryManager(object):
         else:
             reference_key, opt_parts = split_ref[0], None
 
+        def dimension_mapper(join_key):
+            if reference_key not in reference_intervals:
+                return join_key
+            return self._date_add(join_key, *reference_intervals[reference_key])
+
         return (
-            reference_dimension_mappers.get(reference_key, lambda join_key: join_key),
+            dimension_mapper,
             reference_metric_mappers.get(opt_parts, lambda field, join_field: join_field)
         )
 
+    @staticmethod
+    def _get_reference_dataframe_mapper(reference_key):
+        """
+        Selects the function which computes the values of a reference from the base and reference data frames when
+        references are joined in pandas.  This is the equivalent of the metric mapper from ``_get_reference_mappers``.
+        """
+        split_ref = reference_key.split('_')
+        opt_parts = split_ref[1] if 1 < len(split_ref) else None
+
+        return reference_dataframe_mappers.get(opt_parts, lambda dataframe, ref_dataframe: ref_dataframe)
+
     @staticmethod
     def _build_reference_join_criterion(query, dimensions, criterion_f, dimension_key):
         """
@@ -334,25 +716,47 @@ class QueryManager(object):
         """
         Replaces the dimension used by a reference in the dimension schema and dimension filter schema.
 
-        We do this in order to build the same query with a shifted date instead of the actual date.
+        We do this in order to build the same query with a shifted date instead of the actual date.  The schemas are
+        not copied, instead only the reference dimension and the filters on it are replaced and all other terms are
+        shared with the original schemas.
         """
         target_dimension = dimensions[dimension_key]
 
-        new_dimensions = copy.deepcopy(dimensions)
+        new_dimensions = copy.copy(dimensions)
         new_dimensions[dimension_key] = dimension_f(target_dimension)
 
-        new_dfilters = []
-        for dfilter in dfilters:
-            # This is a very hack way of doing this.  This expects the dfilter to use the exact same reference to
-            # the dimension's definition, which the slicer manager guarentees and the unit tests simulate.
-            # TODO provide a utility in pypika for checking if these are the same
-            try:
-                if dfilter.term.fields()[0] is target_dimension.fields()[0]:
-                    dfilter = copy.deepcopy(dfilter)
-                    dfilter.term = dimension_f(dfilter.term)
-            except (AttributeError, IndexError):
-                pass  # If the above if-expression cannot be evaluated, then its not the filter we are looking for
-
-            new_dfilters.append(dfilter)
+        target_field = target_dimension.fields()[0]
+        new_dfilters = [QueryManager._replace_filter_term(dfilter, target_field, dimension_f)
+                        for dfilter in dfilters]
 
         return new_dimensions, new_dfilters
+
+    @staticmethod
+    def _replace_filter_term(criterion, target_field, dimension_f):
+        """
+        Returns the criterion with each term on the target field replaced by the result of `dimension_f`.  Only the
+        criteria which contain the target field are copied and the criterion itself is returned if it does not.
+        """
+        if isinstance(criterion, ComplexCriterion):
+            left = QueryManager._replace_filter_term(criterion.left, target_field, dimension_f)
+            right = QueryManager._replace_filter_term(criterion.right, target_field, dimension_f)
+            if left is criterion.left and right is criterion.right:
+                return criterion
+
+            criterion = copy.copy(criterion)
+            criterion.left, criterion.right = left, right
+            return criterion
+
+        # Criteria such as BETWEEN, IN and IS NULL have a term while comparisons have the term on the left side
+        attr = 'term' if hasattr(criterion, 'term') else 'left' if isinstance(criterion, BasicCriterion) else None
+        term = getattr(criterion, attr, None) if attr else None
+
+        try:
+            if not utils.terms_equal(term.fields()[0], target_field):
+                return criterion
+        except (AttributeError, IndexError):
+            return criterion  # If the term has no fields, then it is not the filter we are looking for
+
+        criterion = copy.copy(criterion)
+        setattr(criterion, attr, dimension_f(term))
+        return criterion
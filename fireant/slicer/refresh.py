@@ -0,0 +1,94 @@
+# coding: utf-8
+"""
+Helpers for refreshing the results of time series requests incrementally.  The results of a request are kept and when
+the request is repeated, only the most recent intervals of the datetime dimension are queried again and spliced into
+the kept results.
+"""
+from collections import OrderedDict, namedtuple
+
+from .filters import RangeFilter
+
+# The results kept for a request: the stop of its range filter, the data frame returned by the query and the data
+# frame after post-processing
+Refresh = namedtuple('Refresh', ['stop', 'data', 'processed'])
+
+
+def range_filter_position(dimension_filters, dimension_key):
+    """
+    :return:
+        The position of the range filter on a dimension in a list of dimension filters or None if there is not exactly
+        one such filter.
+    """
+    positions = [i
+                 for i, dimension_filter in enumerate(dimension_filters)
+                 if isinstance(dimension_filter, RangeFilter) and dimension_key == dimension_filter.element_key]
+    return positions[0] if 1 == len(positions) else None
+
+
+def splice_points(refresh, stop):
+    """
+    Determines which rows of the kept results are queried again.  The last interval of the results may be incomplete
+    and is replaced.  The query starts from the interval before it, since the rows of the last interval are not always
+    after its start, for example when dates are rounded to the nearest day.
+
+    :param refresh:
+        The kept results of the request or None.
+    :param stop:
+        The stop of the range filter of the repeated request.
+    :return:
+        A tuple of the start of the refresh query and the first interval which is replaced, or None if the whole range
+        must be queried.  This is the case when there are fewer than two intervals or the range ends before the kept
+        results.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if refresh is None or pd.Timestamp(stop) < pd.Timestamp(refresh.stop):
+        return None
+
+    intervals = np.unique(refresh.data.index.get_level_values(0).dropna().values)
+    if len(intervals) < 2:
+        return None
+
+    return pd.Timestamp(intervals[-2]).to_pydatetime(), pd.Timestamp(intervals[-1])
+
+
+def rows_before(dataframe, splice):
+    return dataframe[dataframe.index.get_level_values(0) < splice]
+
+
+def rows_from(dataframe, splice):
+    return dataframe[dataframe.index.get_level_values(0) >= splice]
+
+
+def concat(dataframes):
+    """
+    Concatenates data frames along their rows.  pandas converts categorical index levels to objects when their
+    categories differ between the data frames, so the categories of these levels are unioned first.
+    """
+    import pandas as pd
+
+    levels = [[dataframe.index.get_level_values(i) for dataframe in dataframes]
+              for i in range(dataframes[0].index.nlevels)]
+    if not any('category' == str(values[0].dtype) for values in levels):
+        return pd.concat(dataframes)
+
+    for i, values in enumerate(levels):
+        if 'category' != str(values[0].dtype):
+            continue
+
+        categories = list(OrderedDict.fromkeys(category
+                                               for level in values
+                                               for category in level.categories))
+        levels[i] = [pd.CategoricalIndex(level, categories=categories, name=level.name)
+                     for level in values]
+
+    unioned = []
+    for dataframe, index_levels in zip(dataframes, zip(*levels)):
+        dataframe = dataframe.copy(deep=False)
+        dataframe.index = (pd.MultiIndex.from_arrays(list(index_levels), names=dataframe.index.names)
+                           if 1 < len(index_levels)
+                           else index_levels[0])
+        unioned.append(dataframe)
+
+    return pd.concat(unioned)
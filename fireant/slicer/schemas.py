@@ -1,13 +1,63 @@
 # coding: utf-8
-from fireant.slicer import transformers
+import weakref
+
+from fireant import utils
 from fireant.slicer.managers import SlicerManager, TransformerManager
 from pypika import JoinType, functions as fn
 from pypika.terms import Mod
 
+_record_slots = {}
+_interned = weakref.WeakValueDictionary()
+
+
+def _slots(cls):
+    slots = _record_slots.get(cls)
+    if slots is None:
+        slots = _record_slots[cls] = tuple(slot
+                                           for klass in reversed(cls.__mro__)
+                                           for slot in klass.__dict__.get('__slots__', ())
+                                           if slot not in ('__weakref__', '__dict__'))
+    return slots
+
+
+def intern(record):
+    """
+    Returns a record which is equal to the given record and was interned before, or interns the record and returns it
+    if there is none.  Interned records are kept as long as they are used, so that slicers created from the same
+    definitions share a single copy of each metric, dimension and join.  Interned records must not be modified.
+
+    Records are looked up by the structure of their attributes, so records with the same key but different definitions,
+    such as the metrics of the slicers of different tenants, do not need to be compared with each other.
+    """
+    return _interned.setdefault((type(record), utils.terms_key(record._values())), record)
+
+
+class SchemaRecord(object):
+    """
+    The base class of the schema objects of a slicer which have a key.  The declared attributes are stored in slots
+    instead of a dict, which uses less memory, and records are compared by the values of their attributes so that they
+    can be interned and used as dictionary keys.  Other attributes, such as those set by subclasses, are stored in a
+    dict and compared as well.  PyPika terms are compared by their structure.
+    """
+    __slots__ = ('__weakref__', '__dict__')
+
+    def _values(self):
+        return tuple(getattr(self, slot) for slot in _slots(type(self))) + tuple(sorted(vars(self).items()))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and utils.terms_equal(self._values(), other._values())
 
-class SlicerElement(object):
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self.key))
+
+
+class SlicerElement(SchemaRecord):
     """The `SlicerElement` class represents an element of the slicer, either a metric or dimension, which contains
     information about such as how to query it from the database."""
+    __slots__ = ('key', 'label', 'definition', 'joins')
 
     def __init__(self, key, label=None, definition=None, joins=None):
         """
@@ -44,18 +94,29 @@ class Metric(SlicerElement):
     """
     The `Metric` class represents a metric in the `Slicer` object.
     """
+    __slots__ = ('precision', 'prefix', 'suffix', 'dtype')
 
-    def __init__(self, key, label=None, definition=None, joins=None, precision=None, prefix=None, suffix=None):
+    def __init__(self, key, label=None, definition=None, joins=None, precision=None, prefix=None, suffix=None,
+                 dtype='float64'):
+        """
+        :param dtype:
+            The numpy dtype that the values of the metric are loaded as.  Metrics which are never NULL, such as counts,
+            can use 'int64'.  Results containing NULL values are loaded as 'float64' instead.
+
+        See ``SlicerElement`` for a description of the other parameters.
+        """
         super(Metric, self).__init__(key, label, definition, joins)
         self.precision = precision
         self.prefix = prefix
         self.suffix = suffix
+        self.dtype = dtype
 
 
 class Dimension(SlicerElement):
     """
     The `Dimension` class represents a dimension in the `Slicer` object.
     """
+    __slots__ = ()
 
     def __init__(self, key, label=None, definition=None, joins=None):
         super(Dimension, self).__init__(key, label, definition, joins)
@@ -65,6 +126,8 @@ class Dimension(SlicerElement):
 
 
 class NumericInterval(object):
+    __slots__ = ('size', 'offset')
+
     def __init__(self, size=1, offset=0):
         self.size = size
         self.offset = offset
@@ -80,6 +143,8 @@ class NumericInterval(object):
 
 
 class ContinuousDimension(Dimension):
+    __slots__ = ('default_interval',)
+
     def __init__(self, key, label=None, definition=None, default_interval=NumericInterval(1, 0), joins=None):
         super(ContinuousDimension, self).__init__(key=key, label=label, definition=definition, joins=joins)
         self.default_interval = default_interval
@@ -90,6 +155,8 @@ class ContinuousDimension(Dimension):
 
 
 class DatetimeInterval(object):
+    __slots__ = ('size',)
+
     def __init__(self, size):
         self.size = size
 
@@ -104,6 +171,8 @@ class DatetimeInterval(object):
 
 
 class DatetimeDimension(ContinuousDimension):
+    __slots__ = ()
+
     hour = DatetimeInterval('HH')
     day = DatetimeInterval('DD')
     week = DatetimeInterval('WW')
@@ -121,12 +190,16 @@ class DatetimeDimension(ContinuousDimension):
 
 
 class CategoricalDimension(Dimension):
+    __slots__ = ('display_options',)
+
     def __init__(self, key, label=None, definition=None, display_options=tuple(), joins=None):
         super(CategoricalDimension, self).__init__(key=key, label=label, definition=definition, joins=joins)
         self.display_options = display_options
 
 
 class UniqueDimension(Dimension):
+    __slots__ = ('display_field',)
+
     def __init__(self, key, label=None, definition=None, display_field=None, joins=None):
         super(UniqueDimension, self).__init__(key=key, label=label, definition=definition, joins=joins)
         self.display_field = display_field
@@ -144,21 +217,26 @@ class UniqueDimension(Dimension):
 
 
 class BooleanDimension(Dimension):
+    __slots__ = ()
+
     def __init__(self, key, label=None, definition=None, joins=None):
         super(BooleanDimension, self).__init__(key=key, label=label, definition=definition, joins=joins)
 
 
-class DimensionValue(object):
+class DimensionValue(SchemaRecord):
     """
     An option belongs to a categorical dimension which specifies a fixed set of values
     """
+    __slots__ = ('key', 'label')
 
     def __init__(self, key, label=None):
         self.key = key
         self.label = label or ' '.join(key.capitalize().split('_'))
 
 
-class Join(object):
+class Join(SchemaRecord):
+    __slots__ = ('key', 'table', 'criterion', 'join_type')
+
     def __init__(self, key, table, criterion, join_type=JoinType.inner):
         self.key = key
         self.table = table
@@ -166,8 +244,63 @@ class Join(object):
         self.join_type = join_type
 
 
+class AggregateTable(object):
+    """
+    A pre-aggregated copy of the table of a slicer which contains a subset of its metrics and dimensions, such as a table
+    of daily totals.  Requests which only use these metrics and dimensions are queried from the aggregate table instead
+    of the slicer's table.
+    """
+
+    def __init__(self, table, metrics=tuple(), dimensions=tuple(), intervals=None, rows=None):
+        """
+        :param table:
+            A PyPika Table reference.  The columns of the metrics and dimensions must have the same names as in the
+            slicer's table and the metric definitions must give the same results when applied to the aggregated rows,
+            for example SUM, MIN or MAX but not AVG or COUNT.
+
+        :param metrics:
+            The keys of the metrics which can be queried from this table.
+
+        :param dimensions:
+            The keys of the dimensions which can be queried or filtered from this table.
+
+        :param intervals: (Optional)
+            A dict mapping the keys of datetime dimensions to a list of the intervals which can be queried from this
+            table.  For example, a table of daily totals can answer requests for days, weeks, months, quarters and
+            years but not hours.  Dimensions which are not included can be queried with any interval.
+
+        :param rows: (Optional)
+            An estimate of the number of rows in the table.  When several aggregate tables can answer a request, the
+            one with the fewest rows is used.  Tables without an estimate are used after those with one.
+        """
+        self.table = table
+        self.metrics = set(metrics)
+        self.dimensions = set(dimensions)
+        self.intervals = intervals or {}
+        self.rows = rows
+
+    def covers(self, metrics, dimensions, intervals):
+        """
+        :param metrics:
+            The keys of the metrics of a request.
+        :param dimensions:
+            The keys of the dimensions of a request.
+        :param intervals:
+            A dict mapping the keys of the datetime dimensions of a request to the requested interval.
+        :return:
+            True if the request can be queried from this table.
+        """
+        return (set(metrics) <= self.metrics
+                and set(dimensions) <= self.dimensions
+                and all(interval in self.intervals[key]
+                        for key, interval in intervals.items()
+                        if key in self.intervals))
+
+
 class Slicer(object):
-    def __init__(self, table, database, metrics=tuple(), dimensions=tuple(), joins=tuple(), hint_table=None):
+    def __init__(self, table, database, metrics=tuple(), dimensions=tuple(), joins=tuple(), hint_table=None,
+                 cache=None, cache_ttl=None, parallel_references=False, pushdown_operations=False,
+                 aggregate_tables=tuple(), dimension_options_ttl=None):
         """
         Constructor for a slicer.  Contains all the fields to initialize the slicer.
 
@@ -192,18 +325,73 @@ class Slicer(object):
             A hint table used for querying dimension options.  If not present, the table will be used.  The hint_table
             must have the same definition as the table omitting dimensions which do not have a set of options (such as
             datetime dimensions) and the metrics.  This is provided to more efficiently query dimension options.
+
+        :param cache: (Optional)
+            A ``fireant.slicer.cache.Cache`` used to store query results.  When set, identical queries are served from
+            the cache instead of being executed again.  A cache can be shared by several slicers.
+
+        :param cache_ttl: (Optional)
+            The number of seconds before results of this slicer expire in the cache.  Defaults to the TTL of the cache.
+
+        :param parallel_references: (Optional)
+            When True, each reference (WoW, MoM, QoQ, YoY) is executed as a separate query in parallel using the
+            database's thread pool and joined to the results in pandas, instead of being joined in a single query.
+            This is usually faster for large tables since the database does not have to join the subqueries.
+
+        :param pushdown_operations: (Optional)
+            When True, the cumulative operations (CumSum, CumMean) are computed by the database with window functions
+            instead of in pandas.  This is only used when the database supports window functions and the request has
+            at least one dimension and no references or totals, otherwise the operations are computed in pandas.
+
+        :param aggregate_tables: (Optional)
+            A list of ``AggregateTable`` references.  Each request is queried from the smallest aggregate table which
+            contains all of its metrics and dimensions, including those used in filters.  If there is none, the request
+            is queried from the table.
+
+        :param dimension_options_ttl: (Optional)
+            When set, the options of each dimension are loaded once and kept in memory for this number of seconds.
+            Requests for dimension options filtered on the same dimension, such as the wildcard searches of an
+            autocomplete, are then answered from memory without querying the database.
         """
         self.table = table
         self.database = database
 
-        self.metrics = {metric.key: metric for metric in metrics}
-        self.dimensions = {dimension.key: dimension for dimension in dimensions}
-        self.joins = {join.key: join for join in joins}
+        # Equal metrics, dimensions and joins are shared between slicers
+        self.metrics = {metric.key: intern(metric) for metric in metrics}
+        self.dimensions = {dimension.key: intern(dimension) for dimension in dimensions}
+        self.joins = {join.key: intern(join) for join in joins}
         self.hint_table = hint_table
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self.parallel_references = parallel_references
+        self.pushdown_operations = pushdown_operations
+        self.dimension_options_ttl = dimension_options_ttl
+        self.aggregate_tables = sorted(aggregate_tables, key=lambda aggregate_table: (aggregate_table.rows is None,
+                                                                                      aggregate_table.rows or 0))
 
         self.manager = SlicerManager(self)
-        for name, bundle in transformers.bundles.items():
-            setattr(self, name, TransformerManager(self.manager, bundle))
+
+    def __getattr__(self, name):
+        # The transformer managers of the bundles, such as `slicer.highcharts`, are created when they are first used so
+        # that the transformers and their dependencies are only imported when needed
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        from fireant.slicer import transformers
+
+        bundle = transformers.bundles.get(name)
+        if bundle is None:
+            raise AttributeError("'Slicer' object has no attribute '{name}'".format(name=name))
+
+        transformer_manager = TransformerManager(self.manager, bundle)
+        setattr(self, name, transformer_manager)
+        return transformer_manager
+
+    def __dir__(self):
+        # Includes the bundles which are created lazily so that they can be tab-completed
+        from fireant.slicer import transformers
+
+        return sorted(set(dir(type(self))) | set(self.__dict__) | set(transformers.bundles))
 
 
 class EqualityOperator(object):
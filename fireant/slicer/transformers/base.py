@@ -1,4 +1,5 @@
 # coding: utf-8
+from . import serialization
 
 
 class Transformer(object):
@@ -10,6 +11,15 @@ class Transformer(object):
     def transform(self, dataframe, display_schema):
         raise NotImplementedError
 
+    def transform_json(self, dataframe, display_schema):
+        """
+        Transforms the data frame in the same way as ``transform`` and serializes the result into JSON.
+
+        :return:
+            The JSON as UTF-8 encoded bytes.
+        """
+        return serialization.dumps(self.transform(dataframe, display_schema))
+
 
 class TransformationException(Exception):
     pass
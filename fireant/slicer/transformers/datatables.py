@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 
 from fireant import settings
-from fireant.slicer.transformers import Transformer
+from fireant.slicer.transformers import Transformer, TransformationException
 
 NO_TIME = time(0)
 
@@ -38,15 +38,82 @@ def _pretty(value, schema):
     )
 
 
+def _safe_column(values):
+    """
+    Converts an array of values into a list of JSON serializable values, in the same way as applying ``_safe`` to each
+    value but converting all values of a column at once.
+    """
+    if values.dtype.kind == 'M':
+        index = pd.DatetimeIndex(values)
+        is_date = np.asarray(index == index.normalize())
+        strings = np.where(is_date, index.strftime('%Y-%m-%d'), index.strftime('%Y-%m-%dT%H:%M:%S'))
+        return [string if not is_nat else pd.NaT
+                for string, is_nat in zip(strings.tolist(), np.asarray(index.isnull()).tolist())]
+
+    if values.dtype == np.float64:
+        return _mask_nan(values.tolist(), np.isnan(values))
+
+    if values.dtype in (np.int64, np.bool_):
+        return values.tolist()
+
+    return [_safe(value) for value in values]
+
+
+def _mask_nan(values, mask):
+    if not mask.any():
+        return values
+
+    for i in np.flatnonzero(mask).tolist():
+        values[i] = None
+    return values
+
+
+def _format_column(values, schema):
+    """
+    Formats an array of metric values into a list of dicts containing the raw value and the display value.  This is
+    equivalent to applying ``_safe`` and ``_pretty`` to each value but converts all values of a column at once.
+    """
+    prefix, suffix = schema.get('prefix', ''), schema.get('suffix', '')
+
+    if values.dtype == np.float64:
+        nan_mask = np.isnan(values)
+        raw = _mask_nan(values.tolist(), nan_mask)
+
+        if 'precision' in schema:
+            # Zero and NaN values are not rounded
+            rounded = np.where(nan_mask | (values == 0), values, np.round(values, schema['precision']))
+            display = _mask_nan(rounded.tolist(), nan_mask)
+        else:
+            display = raw
+
+    elif values.dtype == np.int64:
+        raw = display = values.tolist()
+
+    else:
+        raw = [_safe(value) for value in values]
+        return [{'value': value, 'display': _pretty(value, schema)}
+                for value in raw]
+
+    return [{'value': value, 'display': prefix + str(display_value) + suffix}
+            for value, display_value in zip(raw, display)]
+
+
 class DataTablesRowIndexTransformer(Transformer):
     def transform(self, dataframe, display_schema):
         dataframe = self._prepare_dataframe(dataframe, display_schema['dimensions'])
 
-        return {
+        result = {
             'columns': self._render_columns(dataframe, display_schema),
             'data': self._render_data(dataframe, display_schema),
         }
 
+        if 'pagination' in display_schema:
+            # The data of paginated requests is one page of the rows, so the total number of rows is included for the
+            # DataTables pagination controls
+            result['recordsTotal'] = result['recordsFiltered'] = display_schema['pagination']['total']
+
+        return result
+
     def _prepare_dataframe(self, dataframe, dimensions):
         # Replaces invalid values and unstacks the data frame for column_index tables.
         return dataframe.replace([np.inf, -np.inf], np.nan)
@@ -111,6 +178,86 @@ class DataTablesRowIndexTransformer(Transformer):
         }
 
     def _render_data(self, dataframe, display_schema):
+        """
+        Renders the rows of the data table.  Each column of the data frame is converted at once and then the rows are
+        assembled from the converted columns.  The result is the same as ``_render_data_by_row``.
+        """
+        n = len(dataframe.index.levels) if isinstance(dataframe.index, pd.MultiIndex) else 1
+        dimensions = list(display_schema['dimensions'].items())[:n]
+
+        columns = list(self._render_dimension_columns(dataframe.index, dimensions))
+        columns += list(self._render_metric_columns(dataframe, display_schema['metrics'],
+                                                    display_schema.get('references')))
+
+        keys = [key for key, _ in columns]
+        return [dict(zip(keys, cells))
+                for cells in zip(*[cells for _, cells in columns])]
+
+    def _render_dimension_columns(self, index, dimensions):
+        levels = ([index.get_level_values(i) for i in range(index.nlevels)]
+                  if isinstance(index, pd.MultiIndex)
+                  else [index])
+
+        i = 0
+        for key, dimension in dimensions:
+            values = _safe_column(self._level_values(levels[i]))
+
+            if 'display_field' in dimension:
+                i += 1
+                display = _safe_column(self._level_values(levels[i]))
+                yield key, [{'display': display_value, 'value': value}
+                            for display_value, value in zip(display, values)]
+
+            elif 'display_options' in dimension:
+                display_options = dimension['display_options']
+                yield key, [{'display': display_options.get(value, value) or 'Total', 'value': value}
+                            for value in values]
+
+            else:
+                yield key, [{'value': value}
+                            for value in values]
+
+            i += 1
+
+    @staticmethod
+    def _level_values(level):
+        if isinstance(level, pd.DatetimeIndex) and level.tz is None:
+            return level.values
+
+        # Boxes timezone aware dates and time deltas the same way as iterating through the index does
+        return np.asarray(level.astype(object) if level.dtype.kind in 'mM' else level)
+
+    def _render_metric_columns(self, dataframe, metrics, references):
+        # Uses the values of the whole data frame so that the values are cast to the same type as the rows would be
+        values = dataframe.values
+
+        if references:
+            for reference in [''] + list(references):
+                cells = [self._metric_column(dataframe, values, (reference, metric_key), metric)
+                         for metric_key, metric in metrics.items()]
+
+                if not reference:
+                    for metric_key, metric_cells in zip(metrics, cells):
+                        yield metric_key, metric_cells
+                    continue
+
+                metric_keys = list(metrics)
+                yield reference, [dict(zip(metric_keys, reference_cells))
+                                  for reference_cells in zip(*cells)]
+            return
+
+        for metric_key, metric in metrics.items():
+            yield metric_key, self._metric_column(dataframe, values, metric_key, metric)
+
+    @staticmethod
+    def _metric_column(dataframe, values, column_key, metric):
+        i = dataframe.columns.get_loc(column_key)
+        return _format_column(values[:, i], metric)
+
+    def _render_data_by_row(self, dataframe, display_schema):
+        """
+        Renders the rows of the data table by iterating through each row of the data frame.
+        """
         n = len(dataframe.index.levels) if isinstance(dataframe.index, pd.MultiIndex) else 1
         dimensions = list(display_schema['dimensions'].items())
         row_dimensions, column_dimensions = dimensions[:n], dimensions[n:]
@@ -181,6 +328,10 @@ class DataTablesRowIndexTransformer(Transformer):
 
 
 class DataTablesColumnIndexTransformer(DataTablesRowIndexTransformer):
+    def _render_data(self, dataframe, display_schema):
+        # The pivoted dimensions are nested in each row, so the rows are rendered one at a time
+        return self._render_data_by_row(dataframe, display_schema)
+
     def _prepare_dataframe(self, dataframe, dimensions):
         # Replaces invalid values and unstacks the data frame for column_index tables.
         dataframe = super(DataTablesColumnIndexTransformer, self)._prepare_dataframe(dataframe, dimensions)
@@ -259,16 +410,27 @@ class DataTablesColumnIndexTransformer(DataTablesRowIndexTransformer):
 
 class CSVRowIndexTransformer(DataTablesRowIndexTransformer):
     def transform(self, dataframe, display_schema):
+        return self._to_csv(dataframe, display_schema)
+
+    def transform_chunks(self, dataframes, display_schema):
+        """
+        Transforms a sequence of data frames, such as the chunks of a large result, into CSV.  One CSV string is yielded
+        for each data frame and only the first includes the header.
+        """
+        for i, dataframe in enumerate(dataframes):
+            yield self._to_csv(dataframe, display_schema, header=0 == i)
+
+    def _to_csv(self, dataframe, display_schema, header=True):
         csv_df = self._format_columns(dataframe, display_schema['metrics'], display_schema['dimensions'])
 
         if isinstance(dataframe.index, pd.RangeIndex):
             # If there are no dimensions, just serialize to csv without the index
-            return csv_df.to_csv(index=False)
+            return csv_df.to_csv(index=False, header=header)
 
         csv_df = self._format_index(csv_df, display_schema['dimensions'])
 
         row_dimension_labels = self._row_dimension_labels(display_schema['dimensions'])
-        return csv_df.to_csv(index_label=row_dimension_labels)
+        return csv_df.to_csv(index_label=row_dimension_labels, header=header)
 
     def _format_index(self, csv_df, dimensions):
         levels = list(dimensions.items())[:None if isinstance(csv_df.index, pd.MultiIndex) else 1]
@@ -318,6 +480,10 @@ class CSVRowIndexTransformer(DataTablesRowIndexTransformer):
 
 
 class CSVColumnIndexTransformer(DataTablesColumnIndexTransformer, CSVRowIndexTransformer):
+    def transform_chunks(self, dataframes, display_schema):
+        raise TransformationException('Column index CSVs require the complete result to pivot the dimensions and cannot '
+                                      'be transformed in chunks.')
+
     def _format_columns(self, dataframe, metrics, dimensions):
         if 1 < len(dimensions):
             csv_df = self._prepare_dataframe(dataframe, dimensions)
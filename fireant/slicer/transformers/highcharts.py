@@ -1,8 +1,11 @@
 # coding: utf-8
+from itertools import compress
+
 import numpy as np
 import pandas as pd
 
 from fireant import settings, utils
+from . import serialization
 from .base import Transformer, TransformationException
 
 colors = {
@@ -35,6 +38,68 @@ def _format_data_point(value):
     return value
 
 
+def _format_data_points(values):
+    """
+    Converts an array of values into a list of JSON serializable values, in the same way as applying
+    ``_format_data_point`` to each value but converting the whole array at once.
+    """
+    if isinstance(values, pd.DatetimeIndex) or values.dtype.kind == 'M':
+        index = pd.DatetimeIndex(values)
+        millis = (index.asi8 // int(1e6)).tolist()
+        return _mask(millis, np.asarray(pd.isnull(index)), pd.NaT)
+
+    if values.dtype == np.float64:
+        values = np.asarray(values)
+        return _mask(values.tolist(), np.isnan(values), None)
+
+    if values.dtype == np.int64:
+        return np.asarray(values).tolist()
+
+    return [_format_data_point(value) for value in values]
+
+
+def _data_points_array(values):
+    """
+    Converts an array of values into a numeric array which serializes to the same JSON as ``_format_data_points``, or
+    None if the values are not numeric.
+    """
+    if isinstance(values, pd.DatetimeIndex) or values.dtype.kind == 'M':
+        index = pd.DatetimeIndex(values)
+        if np.asarray(pd.isnull(index)).any():
+            return None
+        return index.asi8 // int(1e6)
+
+    if values.dtype in (np.float64, np.int64):
+        return np.ascontiguousarray(values)
+
+    return None
+
+
+def _nan_mask(values):
+    """
+    Returns a boolean array which is true for the values which are skipped in the series data or None if there are no
+    such values.
+    """
+    if values.dtype == np.float64:
+        mask = np.isnan(values)
+    elif values.dtype.kind in 'iuM':
+        return None
+    else:
+        mask = np.array([isinstance(value, (float, int)) and np.isnan(value)
+                         for value in values], dtype=bool)
+
+    return mask if mask.any() else None
+
+
+def _mask(values, mask, replacement):
+    if not mask.any():
+        return values
+
+    for i in np.flatnonzero(mask).tolist():
+        values[i] = replacement
+    return values
+
+
 class HighchartsLineTransformer(Transformer):
     """
     Transforms data frames into Highcharts format for several chart types, particularly line or bar charts.
@@ -58,6 +123,16 @@ class HighchartsLineTransformer(Transformer):
                                           'your request.')
 
     def transform(self, dataframe, display_schema):
+        return self._make_chart(dataframe, display_schema)
+
+    def transform_json(self, dataframe, display_schema):
+        """
+        Transforms the data frame into the same chart as ``transform`` serialized into JSON.  The data of the series
+        are serialized directly from numpy arrays when possible rather than being converted into lists first.
+        """
+        return serialization.dumps(self._make_chart(dataframe, display_schema, arrays=True))
+
+    def _make_chart(self, dataframe, display_schema, arrays=False):
         has_references = isinstance(dataframe.columns, pd.MultiIndex)
 
         dim_ordinal = {name: ordinal
@@ -66,13 +141,14 @@ class HighchartsLineTransformer(Transformer):
 
         if has_references:
             series = sum(
-                [self._make_series(dataframe[level], dim_ordinal, display_schema, reference=level or None)
+                [self._make_series(dataframe[level], dim_ordinal, display_schema, reference=level or None,
+                                   arrays=arrays)
                  for level in dataframe.columns.levels[0]],
                 []
             )
 
         else:
-            series = self._make_series(dataframe, dim_ordinal, display_schema)
+            series = self._make_series(dataframe, dim_ordinal, display_schema, arrays=arrays)
 
         result = {
             'chart': {'type': self.chart_type, 'zoomType': 'x'},
@@ -95,7 +171,7 @@ class HighchartsLineTransformer(Transformer):
             'title': None
         }] * len(display_schema['metrics'])
 
-    def _make_series(self, dataframe, dim_ordinal, display_schema, reference=None):
+    def _make_series(self, dataframe, dim_ordinal, display_schema, reference=None, arrays=False):
         metrics = list(dataframe.columns.levels[0]
                        if isinstance(dataframe.columns, pd.MultiIndex)
                        else dataframe.columns)
@@ -103,14 +179,23 @@ class HighchartsLineTransformer(Transformer):
         color = colors.get(settings.highcharts_colors, 'grid')
         n_colors = len(color)
 
-        return [self._make_series_item(idx, item, dim_ordinal, display_schema, metrics, reference, color[i % n_colors])
-                for i, (idx, item) in enumerate(dataframe.iteritems())]
+        # The x values are shared by all of the series so the index is only converted once
+        x_values = _data_points_array(dataframe.index) if arrays else None
+        if x_values is None:
+            x_values = _format_data_points(dataframe.index)
 
-    def _make_series_item(self, idx, item, dim_ordinal, display_schema, metrics, reference, color='#000'):
+        return [self._make_series_item(idx, dataframe.iloc[:, i], dim_ordinal, display_schema, metrics, reference,
+                                       color[i % n_colors], x_values=x_values, arrays=arrays)
+                for i, idx in enumerate(dataframe.columns)]
+
+    def _make_series_item(self, idx, item, dim_ordinal, display_schema, metrics, reference, color='#000',
+                          x_values=None, arrays=False):
         metric_key = utils.slice_first(idx)
         return {
             'name': self._format_label(idx, dim_ordinal, display_schema, reference),
-            'data': self._format_data(item),
+            'data': (self._format_data_array(item, x_values)
+                     if arrays
+                     else self._format_data(item, x_values)),
             'tooltip': self._format_tooltip(display_schema['metrics'][metric_key]),
             'yAxis': metrics.index(utils.slice_first(idx)),
             'color': color,
@@ -136,8 +221,11 @@ class HighchartsLineTransformer(Transformer):
     def _prepare_dataframe(self, dataframe, dim_ordinal, dimensions):
         # Replaces invalid values and unstacks the data frame for line charts.
 
-        # Force all fields to be float (Safer for highcharts)
-        dataframe = dataframe.astype(np.float).replace([np.inf, -np.inf], np.nan)
+        # Force all fields to be float (Safer for highcharts).  Metrics are loaded as floats so they are only cast when
+        # the slicer declares another dtype or the data frame was not loaded by the slicer.
+        if any(np.float64 != dtype for dtype in dataframe.dtypes):
+            dataframe = dataframe.astype(np.float64)
+        dataframe = dataframe.replace([np.inf, -np.inf], np.nan)
 
         # Unstack multi-indices
         if 1 < len(dimensions):
@@ -190,13 +278,50 @@ class HighchartsLineTransformer(Transformer):
             dimension_value = dimension['display_options'].get(dimension_value, dimension_value)
         return dimension_value
 
-    def _format_data(self, column):
+    def _format_data(self, column, x_values=None):
+        """
+        Converts a column of the data frame into a list of (x, y) points, skipping the points without a value.  The
+        index and values are converted at once rather than point by point.
+
+        :param column:
+            A series of the y values indexed by the x values.
+        :param x_values:
+            Optionally, the x values already converted with ``_format_data_points``.
+        """
         if isinstance(column, float):
             return [_format_data_point(column)]
 
-        return [self._format_point(key, value)
-                for key, value in column.iteritems()
-                if not (isinstance(value, (float, int)) and np.isnan(value))]
+        if x_values is None:
+            x_values = _format_data_points(column.index)
+
+        points = zip(x_values, _format_data_points(column.values))
+
+        nan_mask = _nan_mask(column.values)
+        if nan_mask is None:
+            return list(points)
+        return list(compress(points, (~nan_mask).tolist()))
+
+    def _format_data_array(self, column, x_values):
+        """
+        Converts a column of the data frame into an array of (x, y) points, skipping the points without a value.  Falls
+        back to ``_format_data`` when the x or y values are not numeric.  Integer x values, such as the timestamps of
+        time series, are kept separate from the y values since an array would convert them to floats.
+
+        :param column:
+            A series of the y values indexed by the x values.
+        :param x_values:
+            The x values converted with either ``_data_points_array`` or ``_format_data_points``.
+        """
+        if not isinstance(x_values, np.ndarray) or column.dtype != np.float64:
+            if isinstance(x_values, np.ndarray):
+                x_values = _format_data_points(x_values)
+            return self._format_data(column, x_values)
+
+        y_values = column.values
+        keep = ~np.isnan(y_values)
+        if x_values.dtype != np.float64:
+            return serialization.IntegerPoints(x_values[keep], y_values[keep])
+        return np.column_stack((x_values[keep], y_values[keep]))
 
     @staticmethod
     def _format_point(x, y):
@@ -232,13 +357,18 @@ class HighchartsColumnTransformer(HighchartsLineTransformer):
                                           'Request included %d metrics and %d dimensions.' % (len(metrics),
                                                                                               len(dimensions)))
 
-    def _make_series_item(self, idx, item, dim_ordinal, display_schema, metrics, reference, color='#000'):
+    def _make_series_item(self, idx, item, dim_ordinal, display_schema, metrics, reference, color='#000',
+                          x_values=None, arrays=False):
         metric_key = utils.slice_first(idx)
+        values = item.values
+        nan_mask = _nan_mask(values)
+        if nan_mask is not None:
+            values = values[~nan_mask]
+
+        data = _data_points_array(values) if arrays else None
         return {
             'name': self._format_label(idx, dim_ordinal, display_schema, reference),
-            'data': [_format_data_point(x)
-                     for x in item
-                     if not (isinstance(x, (float, int)) and np.isnan(x))],
+            'data': data if data is not None else _format_data_points(values),
             'tooltip': self._format_tooltip(display_schema['metrics'][metric_key]),
             'yAxis': metrics.index(metric_key),
             'color': color,
@@ -0,0 +1,84 @@
+# coding: utf-8
+"""
+Serializes the results of transformers into JSON.  The orjson_ library is used when it is installed, which serializes
+numpy arrays and scalars directly, otherwise the ``json`` module of the standard library is used.
+
+.. _orjson: https://github.com/ijl/orjson
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def has_fast_encoder():
+    """
+    :return:
+        True if the orjson library is installed.
+    """
+    return orjson is not None
+
+
+class IntegerPoints(object):
+    """
+    An array of (x, y) points with integer x values, such as the timestamps of a time series, and float y values.  A
+    numpy array of the points would convert the x values to floats, so orjson serializes the points as an array of
+    floats and the fractional part is then removed from the x values in the JSON.
+    """
+    # Integers up to this magnitude are converted to floats exactly and written by orjson without an exponent
+    max_exact = 2 ** 53
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def tolist(self):
+        return list(zip(self.x.tolist(), self.y.tolist()))
+
+    def to_json(self):
+        """
+        :return:
+            The points serialized by orjson, or None if they cannot be serialized from an array.
+        """
+        if not hasattr(orjson, 'Fragment') or (len(self.x) and self.max_exact <= np.abs(self.x).max()):
+            return None
+
+        data = orjson.dumps(np.column_stack((self.x, self.y)), option=orjson.OPT_SERIALIZE_NUMPY)
+        # Each x value is followed by a comma and each y value by a bracket, so only the x values end with '.0,'
+        return data.replace(b'.0,', b',')
+
+
+def _default(value):
+    if isinstance(value, IntegerPoints):
+        data = value.to_json() if orjson is not None else None
+        return orjson.Fragment(data) if data is not None else value.tolist()
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == 'f':
+            value = value.astype(object)
+            value[pd.isnull(value)] = None
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NaT:
+        return None
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+
+def dumps(value):
+    """
+    Serializes a transformer result into JSON.  Numpy arrays are serialized as lists and NaN values as null.
+
+    :param value:
+        The result of a transformer.
+    :return:
+        The JSON as UTF-8 encoded bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(value, default=_default, separators=(',', ':')).encode('utf-8')
@@ -0,0 +1,147 @@
+# coding: utf-8
+import threading
+from unittest import TestCase, skipIf
+
+import pandas as pd
+import six
+from mock import patch
+
+from fireant.dashboards import *
+from fireant.slicer import *
+from fireant.tests.database.mock_database import TestDatabase
+from pypika import Table
+
+
+class DashboardManagerTests(TestCase):
+    def setUp(self):
+        test_table = Table('test_table')
+        self.slicer = Slicer(
+            table=test_table,
+            database=TestDatabase(),
+
+            metrics=[
+                Metric('clicks', 'Clicks'),
+                Metric('conversions', 'Conversions'),
+                Metric('cost', 'Cost'),
+            ],
+
+            dimensions=[
+                CategoricalDimension('locale', 'Locale', definition=test_table.locale),
+                CategoricalDimension('device', 'Device', definition=test_table.device),
+            ]
+        )
+
+    @staticmethod
+    def _fetch_dataframe(query, **kwargs):
+        # Returns a row for each metric and dimension selected in the query
+        columns = [column
+                   for column in ['locale', 'device', 'clicks', 'conversions', 'cost']
+                   if '"{}"'.format(column) in query]
+        return pd.DataFrame([[1] * len(columns)], columns=columns)
+
+    def _widget_columns(self, result):
+        return [[list(df.columns) for df in widget_group_result]
+                for widget_group_result in result]
+
+    @patch('fireant.dashboards.LineChartWidget.transformer')
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_widget_groups_with_the_same_request_are_queried_once(self, mock_fetch_dataframe, mock_transformer):
+        mock_fetch_dataframe.side_effect = self._fetch_dataframe
+        mock_transformer.transform.side_effect = lambda dataframe, display_schema: dataframe
+
+        dashboard = Dashboard([
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])], dimensions=['locale']),
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['conversions']),
+                                              LineChartWidget(metrics=['clicks', 'cost'])], dimensions=['locale']),
+        ])
+
+        result = dashboard.manager.render()
+
+        self.assertEqual(1, mock_fetch_dataframe.call_count)
+        query = mock_fetch_dataframe.call_args[0][0]
+        self.assertEqual(1, query.count('SUM("clicks")'))
+        self.assertIn('SUM("conversions")', query)
+        self.assertIn('SUM("cost")', query)
+
+        self.assertListEqual([[['clicks']], [['conversions'], ['clicks', 'cost']]], self._widget_columns(result))
+
+    @patch('fireant.dashboards.LineChartWidget.transformer')
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_render_parameters_apply_to_all_widget_groups(self, mock_fetch_dataframe, mock_transformer):
+        mock_fetch_dataframe.side_effect = self._fetch_dataframe
+        mock_transformer.transform.side_effect = lambda dataframe, display_schema: dataframe
+
+        dashboard = Dashboard([
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])]),
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['cost'])]),
+        ])
+
+        dashboard.manager.render(dimensions=['device'],
+                                 dimension_filters=[EqualityFilter('locale', EqualityOperator.eq, 'de')])
+
+        self.assertEqual(1, mock_fetch_dataframe.call_count)
+        query = mock_fetch_dataframe.call_args[0][0]
+        self.assertIn('"device" "device"', query)
+        self.assertIn('"locale"=\'de\'', query)
+
+    @patch('fireant.dashboards.LineChartWidget.transformer')
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_widget_groups_with_different_requests_are_queried_separately(self, mock_fetch_dataframe,
+                                                                          mock_transformer):
+        mock_fetch_dataframe.side_effect = self._fetch_dataframe
+        mock_transformer.transform.side_effect = lambda dataframe, display_schema: dataframe
+
+        dashboard = Dashboard([
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])], dimensions=['locale']),
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])], dimensions=['device']),
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['cost'])], dimensions=['locale'],
+                        dimension_filters=[EqualityFilter('device', EqualityOperator.eq, 'mobile')]),
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['conversions'])], dimensions=['locale']),
+        ])
+
+        result = dashboard.manager.render()
+
+        self.assertEqual(3, mock_fetch_dataframe.call_count)
+
+        # The results are returned in the order of the widget groups
+        self.assertListEqual([['locale'], ['device'], ['locale'], ['locale']],
+                             [[df.index.name for df in widget_group_result] for widget_group_result in result])
+        self.assertListEqual([[['clicks']], [['clicks']], [['cost']], [['conversions']]], self._widget_columns(result))
+
+    @patch('fireant.dashboards.LineChartWidget.transformer')
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_widget_groups_with_different_slicers_are_queried_separately(self, mock_fetch_dataframe,
+                                                                         mock_transformer):
+        mock_fetch_dataframe.side_effect = self._fetch_dataframe
+        other_slicer = Slicer(self.slicer.table, self.slicer.database, metrics=[Metric('clicks', 'Clicks')])
+
+        dashboard = Dashboard([
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])]),
+            WidgetGroup(other_slicer, widgets=[LineChartWidget(metrics=['clicks'])]),
+        ])
+
+        dashboard.manager.render()
+
+        self.assertEqual(2, mock_fetch_dataframe.call_count)
+
+    @skipIf(six.PY2, 'concurrent.futures is not available in Python 2')
+    @patch('fireant.dashboards.LineChartWidget.transformer')
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_distinct_requests_are_executed_concurrently(self, mock_fetch_dataframe, mock_transformer):
+        # Each query blocks until all of them have started, which only works if they are executed concurrently
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fetch_dataframe(query, **kwargs):
+            barrier.wait()
+            return self._fetch_dataframe(query)
+
+        mock_fetch_dataframe.side_effect = fetch_dataframe
+
+        dashboard = Dashboard([
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])], dimensions=['locale']),
+            WidgetGroup(self.slicer, widgets=[LineChartWidget(metrics=['clicks'])], dimensions=['device']),
+        ])
+
+        result = dashboard.manager.render()
+
+        self.assertEqual(2, len(result))
@@ -1,20 +1,25 @@
 # coding: utf-8
+from datetime import date
 from unittest import TestCase
 
+import numpy as np
+import pandas as pd
 from mock import patch, MagicMock
 
-from fireant.database import Database
+from fireant.database import Database, columnar
 from pypika import Field
 
 
 class DatabaseTests(TestCase):
     @patch('fireant.database.Database.connect', name='mock_connect')
     def test_fetch(self, mock_connect):
-        mock_cursor_func = mock_connect.return_value.__enter__.return_value.cursor
+        mock_cursor_func = mock_connect.return_value.cursor
         mock_cursor = mock_cursor_func.return_value = MagicMock(name='mock_cursor')
         mock_cursor.fetchall.return_value = 'OK'
 
-        result = Database().fetch('SELECT 1')
+        db = Database()
+        db.ping = MagicMock(return_value=True)
+        result = db.fetch('SELECT 1')
 
         self.assertEqual(mock_cursor.fetchall.return_value, result)
         mock_cursor_func.assert_called_once_with()
@@ -31,7 +36,93 @@ class DatabaseTests(TestCase):
 
         self.assertEqual(mock_read_sql.return_value, result)
 
-        mock_read_sql.assert_called_once_with(query, mock_connect().__enter__())
+        mock_read_sql.assert_called_once_with(query, mock_connect())
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_dataframe_with_dtypes(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.description = [(b'date',), ('locale',), ('clicks',)]
+        mock_cursor.fetchall.return_value = [(date(2000, 1, 1), 'de', 1), (date(2000, 1, 2), 'en', None)]
+
+        result = Database().fetch_dataframe('SELECT 1', dtypes={'date': 'datetime64[ns]', 'clicks': 'float64'})
+
+        self.assertListEqual(['date', 'locale', 'clicks'], list(result.columns))
+        self.assertEqual('datetime64[ns]', result['date'].dtype)
+        self.assertEqual('float64', result['clicks'].dtype)
+        self.assertListEqual(['de', 'en'], list(result['locale']))
+        self.assertTrue(np.isnan(result['clicks'][1]))
+        mock_cursor.execute.assert_called_once_with('SELECT 1')
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_dataframe_with_categorical_and_int_dtypes(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.description = [('locale',), ('clicks',), ('visits',)]
+        mock_cursor.fetchall.return_value = [('de', 1, 1), ('en', 2, None), ('de', 3, 2)]
+
+        result = Database().fetch_dataframe('SELECT 1', dtypes={'locale': 'category', 'clicks': 'int64',
+                                                                'visits': 'int64'})
+
+        self.assertEqual('category', result['locale'].dtype)
+        self.assertListEqual(['de', 'en'], list(result['locale'].cat.categories))
+        self.assertEqual('int64', result['clicks'].dtype)
+        # NULL values cannot be stored as integers
+        self.assertEqual('float64', result['visits'].dtype)
+
+    @patch('fireant.database.columnar.arrow_available', return_value=True)
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_dataframe_with_arrow(self, mock_connect, mock_arrow_available):
+        mock_table = mock_connect.return_value.cursor.return_value.fetch_arrow_table.return_value
+        mock_table.to_pandas.return_value = pd.DataFrame({'clicks': [1, 2]})
+
+        db = Database()
+        db.supports_arrow = True
+        result = db.fetch_dataframe('SELECT 1', dtypes={'clicks': 'float64'})
+
+        self.assertEqual('float64', result['clicks'].dtype)
+        mock_table.to_pandas.assert_called_once_with(date_as_object=False, split_blocks=True, self_destruct=True)
+
+    @patch('fireant.database.columnar.arrow_available', return_value=False)
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_dataframe_without_arrow_support(self, mock_connect, mock_arrow_available):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.description = [('clicks',)]
+        mock_cursor.fetchall.return_value = [(1,), (2,)]
+
+        db = Database()
+        db.supports_arrow = True
+        result = db.fetch_dataframe('SELECT 1', dtypes={'clicks': 'float64'})
+
+        self.assertListEqual([1., 2.], list(result['clicks']))
+        mock_cursor.fetch_arrow_table.assert_not_called()
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_connections_are_reused(self, mock_connect):
+        db = Database()
+        db.ping = MagicMock(return_value=True)
+
+        db.fetch('SELECT 1')
+        db.fetch('SELECT 2')
+
+        mock_connect.assert_called_once_with()
+        db.ping.assert_called_once_with(mock_connect.return_value)
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_transaction_is_rolled_back_on_release(self, mock_connect):
+        db = Database()
+
+        db.fetch('SELECT 1')
+
+        mock_connect.return_value.rollback.assert_called_once_with()
+        self.assertEqual(1, db.pool.idle)
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_close_closes_pooled_connections(self, mock_connect):
+        db = Database()
+        db.fetch('SELECT 1')
+
+        db.close()
+
+        mock_connect.return_value.close.assert_called_once_with()
 
     def test_database_api(self):
         db = Database()
@@ -41,3 +132,64 @@ class DatabaseTests(TestCase):
 
         with self.assertRaises(NotImplementedError):
             db.round_date(Field('abc'), 'DAY')
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_chunks(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        result = list(Database().fetch_chunks('SELECT 1', chunksize=2))
+
+        self.assertEqual([[(1,), (2,)], [(3,)]], result)
+        mock_cursor.execute.assert_called_once_with('SELECT 1')
+        mock_cursor.fetchmany.assert_called_with(2)
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_dataframe_chunks(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.description = [('clicks',)]
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        result = list(Database().fetch_dataframe_chunks('SELECT 1', chunksize=2))
+
+        self.assertListEqual([[1, 2], [3]], [list(chunk['clicks']) for chunk in result])
+        mock_cursor.execute.assert_called_once_with('SELECT 1')
+        mock_cursor.fetchmany.assert_called_with(2)
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_fetch_dataframe_chunks_with_dtypes(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.description = [('clicks',)]
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        result = list(Database().fetch_dataframe_chunks('SELECT 1', chunksize=2, dtypes={'clicks': 'float64'}))
+
+        self.assertListEqual([[1., 2.], [3.]], [list(chunk['clicks']) for chunk in result])
+        self.assertEqual('float64', result[0]['clicks'].dtype)
+
+    @patch('fireant.database.Database.connect', name='mock_connect')
+    def test_closing_chunks_early_discards_connection(self, mock_connect):
+        mock_cursor = mock_connect.return_value.cursor.return_value
+        mock_cursor.fetchmany.side_effect = [[(1,)], [(2,)], []]
+
+        db = Database()
+        chunks = db.fetch_chunks('SELECT 1', chunksize=1)
+        next(chunks)
+        chunks.close()
+
+        mock_connect.return_value.close.assert_called_once_with()
+        self.assertEqual(0, db.pool.size)
+
+
+class ArrowAvailableTests(TestCase):
+    def test_version_tuple(self):
+        self.assertEqual((0, 18), columnar.version_tuple('0.18.1'))
+        self.assertEqual((1, 0), columnar.version_tuple('1.0.0rc1'))
+
+    def test_not_available_with_old_pandas(self):
+        with patch('pandas.__version__', '0.18.1'):
+            self.assertFalse(columnar.arrow_available())
+
+    def test_not_available_without_pyarrow(self):
+        with patch.dict('sys.modules', pyarrow=None):
+            self.assertFalse(columnar.arrow_available())
@@ -0,0 +1,106 @@
+# coding: utf-8
+from unittest import TestCase
+
+from mock import patch, Mock, ANY
+
+from fireant.database.mysql import MySQL, MySQLQuery
+from pypika import Field, RollupException, Table
+
+
+class TestMySQL(TestCase):
+    def test_defaults(self):
+        mysql = MySQL()
+
+        self.assertEqual('localhost', mysql.host)
+        self.assertEqual(3306, mysql.port)
+        self.assertEqual('mysql', mysql.database)
+        self.assertEqual('root', mysql.user)
+        self.assertIsNone(mysql.password)
+        self.assertEqual('utf8mb4', mysql.charset)
+        self.assertIs(MySQLQuery, mysql.query_cls)
+        self.assertEqual(18446744073709551615, mysql.unbounded_limit)
+
+    def test_connect(self):
+        mock_pymysql = Mock()
+        with patch.dict('sys.modules', pymysql=mock_pymysql):
+            mock_pymysql.connect.return_value = 'OK'
+
+            mysql = MySQL('test_host', 1234, 'test_database',
+                          'test_user', 'password')
+            result = mysql.connect()
+
+        self.assertEqual('OK', result)
+        mock_pymysql.connect.assert_called_once_with(
+            host='test_host', port=1234, database='test_database',
+            user='test_user', password='password', charset='utf8mb4',
+            connect_timeout=10, autocommit=True, init_command=ANY,
+        )
+        self.assertIn('ANSI_QUOTES', mock_pymysql.connect.call_args[1]['init_command'])
+
+    def test_identity(self):
+        self.assertEqual('mysql://test_user@test_host:1234/test_database',
+                         MySQL('test_host', 1234, 'test_database', 'test_user', 'password').identity)
+
+    def test_round_date(self):
+        field = Field('date')
+
+        self.assertEqual('DATE("date")', str(MySQL().round_date(field, 'DD')))
+        self.assertEqual('SUBDATE(DATE("date"),WEEKDAY("date"))', str(MySQL().round_date(field, 'WW')))
+        self.assertEqual('SUBDATE(DATE("date"),DAYOFMONTH("date")-1)', str(MySQL().round_date(field, 'MM')))
+        self.assertEqual('MAKEDATE(YEAR("date"),1)', str(MySQL().round_date(field, 'IY')))
+
+    def test_round_date_alias(self):
+        result = MySQL().round_date(Field('date'), 'DD').as_('day')
+
+        self.assertEqual('SELECT DATE("date") "day"', str(MySQLQuery.select(result)))
+
+    def test_round_date_unsupported_interval(self):
+        with self.assertRaises(ValueError):
+            MySQL().round_date(Field('date'), 'XX')
+
+    def test_date_add(self):
+        field = Field('date')
+
+        self.assertEqual('DATE_ADD("date",INTERVAL 1 WEEK)', str(MySQL().date_add(field, 'weeks', 1)))
+        self.assertEqual('DATE_ADD("date",INTERVAL 52 WEEK)', str(MySQL().date_add(field, 'weeks', 52)))
+        self.assertEqual('DATE_ADD("date",INTERVAL 1 QUARTER)', str(MySQL().date_add(field, 'quarters', 1)))
+        self.assertEqual('DATE_ADD(DATE("date"),INTERVAL 1 WEEK)',
+                         str(MySQL().date_add(MySQL().round_date(field, 'DD'), 'weeks', 1)))
+
+    def test_date_add_unsupported_date_part(self):
+        with self.assertRaises(ValueError):
+            MySQL().date_add(Field('date'), 'microseconds', 1)
+
+    def test_rollup(self):
+        table = Table('abc')
+        query = MySQLQuery.from_(table).select(table.a, table.b).rollup(table.a, table.b)
+
+        self.assertEqual('SELECT "a","b" FROM "abc" GROUP BY "a","b" WITH ROLLUP', str(query))
+
+    def test_partial_rollup(self):
+        table = Table('abc')
+
+        with self.assertRaises(RollupException):
+            MySQLQuery.from_(table).select(table.a, table.b).groupby(table.a).rollup(table.b)
+
+    def test_ping_closed_connection(self):
+        mock_connection = Mock()
+        mock_connection.open = False
+
+        self.assertFalse(MySQL().ping(mock_connection))
+
+    @patch.object(MySQL, 'connect')
+    def test_fetch_chunks_uses_unbuffered_cursor(self, mock_connect):
+        mock_pymysql = Mock()
+        mock_connection = mock_connect.return_value
+        mock_connection.open = True
+        mock_cursor = mock_connection.cursor.return_value
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        with patch.dict('sys.modules', {'pymysql': mock_pymysql, 'pymysql.cursors': mock_pymysql.cursors}):
+            result = list(MySQL().fetch_chunks('SELECT 1', chunksize=2))
+
+        self.assertEqual([[(1,), (2,)], [(3,)]], result)
+        mock_connection.cursor.assert_called_once_with(mock_pymysql.cursors.SSCursor)
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.close.assert_called_once_with()
@@ -0,0 +1,176 @@
+# coding: utf-8
+import threading
+from unittest import TestCase
+
+from mock import MagicMock, patch
+
+from fireant.database import ConnectionPool, ConnectionPoolException
+
+
+class ConnectionPoolTests(TestCase):
+    def setUp(self):
+        self.mock_connect = MagicMock(name='mock_connect', side_effect=lambda: MagicMock(name='connection'))
+
+    def test_reuse_released_connection(self):
+        pool = ConnectionPool(self.mock_connect)
+
+        with pool.connection() as connection1:
+            pass
+        with pool.connection() as connection2:
+            pass
+
+        self.assertIs(connection1, connection2)
+        self.assertEqual(1, self.mock_connect.call_count)
+        self.assertEqual(1, pool.size)
+        self.assertEqual(1, pool.idle)
+
+    def test_opens_new_connections_while_in_use(self):
+        pool = ConnectionPool(self.mock_connect, max_size=2)
+
+        with pool.connection() as connection1:
+            with pool.connection() as connection2:
+                self.assertIsNot(connection1, connection2)
+
+        self.assertEqual(2, pool.size)
+        self.assertEqual(2, pool.idle)
+
+    def test_timeout_when_exhausted(self):
+        pool = ConnectionPool(self.mock_connect, max_size=1)
+
+        with pool.connection():
+            with self.assertRaises(ConnectionPoolException):
+                pool.acquire(timeout=0.01)
+
+    def test_waits_for_released_connection(self):
+        pool = ConnectionPool(self.mock_connect, max_size=1)
+        connection = pool.acquire()
+
+        timer = threading.Timer(0.01, pool.release, args=[connection])
+        timer.start()
+        result = pool.acquire(timeout=5)
+        timer.join()
+
+        self.assertIs(connection, result)
+
+    def test_discard_connection_on_error(self):
+        pool = ConnectionPool(self.mock_connect)
+
+        with self.assertRaises(ValueError):
+            with pool.connection() as connection:
+                raise ValueError()
+
+        connection.close.assert_called_once_with()
+        self.assertEqual(0, pool.size)
+        self.assertEqual(0, pool.idle)
+
+    def test_keep_connection_on_error(self):
+        mock_reset = MagicMock(name='mock_reset')
+        pool = ConnectionPool(self.mock_connect, reset=mock_reset, keep_on_error=True)
+
+        with self.assertRaises(ValueError):
+            with pool.connection() as connection1:
+                raise ValueError()
+        with pool.connection() as connection2:
+            pass
+
+        self.assertIs(connection1, connection2)
+        mock_reset.assert_called_with(connection1)
+        connection1.close.assert_not_called()
+        self.assertEqual(1, pool.size)
+
+    def test_failed_connect_frees_slot(self):
+        self.mock_connect.side_effect = IOError()
+        pool = ConnectionPool(self.mock_connect, max_size=1)
+
+        with self.assertRaises(IOError):
+            pool.acquire()
+
+        self.assertEqual(0, pool.size)
+
+    def test_ping_on_checkout(self):
+        mock_ping = MagicMock(name='mock_ping', side_effect=[False, True])
+        pool = ConnectionPool(self.mock_connect, ping=mock_ping)
+
+        with pool.connection() as connection1:
+            pass
+        with pool.connection() as connection2:
+            pass
+
+        self.assertIsNot(connection1, connection2)
+        connection1.close.assert_called_once_with()
+        mock_ping.assert_called_once_with(connection1)
+        self.assertEqual(1, pool.size)
+
+    def test_reset_on_release(self):
+        mock_reset = MagicMock(name='mock_reset')
+        pool = ConnectionPool(self.mock_connect, reset=mock_reset)
+
+        with pool.connection() as connection:
+            mock_reset.assert_not_called()
+
+        mock_reset.assert_called_once_with(connection)
+        self.assertEqual(1, pool.idle)
+
+    def test_reset_error_discards_connection(self):
+        mock_reset = MagicMock(name='mock_reset', side_effect=IOError())
+        pool = ConnectionPool(self.mock_connect, reset=mock_reset)
+
+        with pool.connection() as connection1:
+            pass
+        with pool.connection() as connection2:
+            pass
+
+        self.assertIsNot(connection1, connection2)
+        connection1.close.assert_called_once_with()
+        self.assertEqual(0, pool.size)
+        self.assertEqual(0, pool.idle)
+
+    def test_ping_error_discards_connection(self):
+        mock_ping = MagicMock(name='mock_ping', side_effect=IOError())
+        pool = ConnectionPool(self.mock_connect, ping=mock_ping)
+
+        with pool.connection() as connection1:
+            pass
+        with pool.connection() as connection2:
+            pass
+
+        self.assertIsNot(connection1, connection2)
+        connection1.close.assert_called_once_with()
+
+    @patch('fireant.database.pool.time.time')
+    def test_idle_timeout(self, mock_time):
+        mock_time.return_value = 100
+        pool = ConnectionPool(self.mock_connect, idle_timeout=10)
+
+        with pool.connection() as connection1:
+            pass
+
+        mock_time.return_value = 111
+        with pool.connection() as connection2:
+            pass
+
+        self.assertIsNot(connection1, connection2)
+        connection1.close.assert_called_once_with()
+        self.assertEqual(1, pool.size)
+
+    def test_close(self):
+        pool = ConnectionPool(self.mock_connect)
+
+        in_use_connection = pool.acquire()
+        with pool.connection() as idle_connection:
+            pass
+        pool.close()
+
+        idle_connection.close.assert_called_once_with()
+        in_use_connection.close.assert_not_called()
+
+        pool.release(in_use_connection)
+        in_use_connection.close.assert_called_once_with()
+        self.assertEqual(0, pool.size)
+
+        with self.assertRaises(ConnectionPoolException):
+            pool.acquire()
+
+    def test_invalid_max_size(self):
+        with self.assertRaises(ConnectionPoolException):
+            ConnectionPool(self.mock_connect, max_size=0)
@@ -0,0 +1,87 @@
+# coding: utf-8
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from fireant.database.postgresql import PostgreSQL
+from pypika import Field
+
+
+class TestPostgreSQL(TestCase):
+    def test_defaults(self):
+        postgresql = PostgreSQL()
+
+        self.assertEqual('localhost', postgresql.host)
+        self.assertEqual(5432, postgresql.port)
+        self.assertEqual('postgres', postgresql.database)
+        self.assertEqual('postgres', postgresql.user)
+        self.assertIsNone(postgresql.password)
+        self.assertIsNone(postgresql.connect_timeout)
+        self.assertTrue(postgresql.supports_window_functions)
+
+    def test_connect(self):
+        mock_psycopg2 = Mock()
+        with patch.dict('sys.modules', psycopg2=mock_psycopg2):
+            mock_connection = Mock(autocommit=False)
+            mock_psycopg2.connect.return_value = mock_connection
+
+            postgresql = PostgreSQL('test_host', 1234, 'test_database',
+                                    'test_user', 'password')
+            result = postgresql.connect()
+
+        self.assertIs(mock_connection, result)
+        mock_psycopg2.connect.assert_called_once_with(
+            host='test_host', port=1234, dbname='test_database',
+            user='test_user', password='password', connect_timeout=None,
+        )
+
+    def test_connect_with_autocommit(self):
+        mock_psycopg2 = Mock()
+        with patch.dict('sys.modules', psycopg2=mock_psycopg2):
+            mock_psycopg2.connect.return_value = Mock(autocommit=False)
+
+            connection = PostgreSQL().connect()
+
+        self.assertTrue(connection.autocommit)
+
+    def test_identity(self):
+        self.assertEqual('postgresql://test_user@test_host:1234/test_database',
+                         PostgreSQL('test_host', 1234, 'test_database', 'test_user', 'password').identity)
+
+    def test_round_date(self):
+        result = PostgreSQL().round_date(Field('date'), 'DD')
+
+        self.assertEqual('DATE_TRUNC(\'day\',"date")', str(result))
+
+    def test_round_date_other_date_part(self):
+        result = PostgreSQL().round_date(Field('date'), 'minute')
+
+        self.assertEqual('DATE_TRUNC(\'minute\',"date")', str(result))
+
+    def test_pool_settings(self):
+        postgresql = PostgreSQL(max_connections=2, idle_timeout=10)
+
+        self.assertEqual(2, postgresql.pool.max_size)
+        self.assertEqual(10, postgresql.pool.idle_timeout)
+
+    def test_ping_closed_connection(self):
+        mock_connection = Mock()
+        mock_connection.closed = 1
+
+        self.assertFalse(PostgreSQL().ping(mock_connection))
+
+    @patch.object(PostgreSQL, 'connect')
+    def test_fetch_chunks_uses_named_cursor(self, mock_connect):
+        mock_connection = mock_connect.return_value
+        mock_connection.closed = 0
+        mock_connection.autocommit = True
+        mock_cursor = mock_connection.cursor.return_value
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,)], [(3,)], []]
+
+        result = list(PostgreSQL().fetch_chunks('SELECT 1', chunksize=2))
+
+        self.assertEqual([[(1,), (2,)], [(3,)]], result)
+        self.assertIn('name', mock_connection.cursor.call_args[1])
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.close.assert_called_once_with()
+        self.assertTrue(mock_connection.autocommit)
@@ -0,0 +1,176 @@
+# coding: utf-8
+import sqlite3
+from datetime import date
+from unittest import TestCase
+
+import pandas as pd
+
+from fireant.database.sqlite import SQLite, SQLiteQuery
+from fireant.slicer import *
+from fireant.slicer.operations import CumSum, Totals
+from fireant.slicer.pagination import Paginator
+from fireant.slicer.references import WoW
+from pypika import Field, RollupException, Table, functions as fn
+
+
+class TestSQLite(TestCase):
+    def test_defaults(self):
+        sqlite = SQLite()
+
+        self.assertEqual(':memory:', sqlite.path)
+        self.assertIs(SQLiteQuery, sqlite.query_cls)
+
+    def test_memory_database_uses_single_connection(self):
+        sqlite = SQLite(max_connections=5, idle_timeout=10)
+
+        self.assertEqual(1, sqlite.pool.max_size)
+        self.assertIsNone(sqlite.pool.idle_timeout)
+
+    def test_pool_settings(self):
+        sqlite = SQLite('test.db', max_connections=2, idle_timeout=10)
+
+        self.assertEqual(2, sqlite.pool.max_size)
+        self.assertEqual(10, sqlite.pool.idle_timeout)
+
+    def test_identity(self):
+        self.assertEqual('sqlite:///test.db', SQLite('test.db').identity)
+
+    def test_in_memory_databases_have_different_identities(self):
+        self.assertNotEqual(SQLite().identity, SQLite().identity)
+
+    def test_in_memory_database_is_kept_after_failed_query(self):
+        sqlite = SQLite()
+        with sqlite.pool.connection() as connection:
+            connection.execute('CREATE TABLE t (a INTEGER)')
+            connection.execute('INSERT INTO t VALUES (1)')
+            connection.commit()
+
+        with self.assertRaises(sqlite3.OperationalError):
+            sqlite.fetch('SELECT b FROM t')
+
+        self.assertListEqual([(1,)], sqlite.fetch('SELECT a FROM t'))
+        sqlite.close()
+
+    def test_round_date(self):
+        field = Field('date')
+
+        self.assertEqual('DATE("date")', str(SQLite().round_date(field, 'DD')))
+        self.assertEqual('DATE("date",\'start of month\')', str(SQLite().round_date(field, 'MM')))
+
+    def test_round_date_unsupported_interval(self):
+        with self.assertRaises(ValueError):
+            SQLite().round_date(Field('date'), 'XX')
+
+    def test_date_add(self):
+        field = Field('date')
+
+        self.assertEqual('DATETIME("date",\'+7 days\')', str(SQLite().date_add(field, 'weeks', 1)))
+        self.assertEqual('DATETIME("date",\'+3 months\')', str(SQLite().date_add(field, 'quarters', 1)))
+        self.assertEqual('DATE(DATE("date"),\'+364 days\')',
+                         str(SQLite().date_add(SQLite().round_date(field, 'DD'), 'weeks', 52)))
+        self.assertEqual('DATETIME(STRFTIME(\'%Y-%m-%d %H:00:00\',"date"),\'+7 days\')',
+                         str(SQLite().date_add(SQLite().round_date(field, 'HH'), 'weeks', 1)))
+
+    def test_date_add_unsupported_date_part(self):
+        with self.assertRaises(ValueError):
+            SQLite().date_add(Field('date'), 'microseconds', 1)
+
+    def test_rollup(self):
+        table = Table('abc')
+
+        with self.assertRaises(RollupException):
+            SQLiteQuery.from_(table).select(table.a).rollup(table.a)
+
+
+class TestSQLiteSlicer(TestCase):
+    intervals = {
+        'HH': ['2000-01-03 10:00:00', '2000-01-03 10:00:00', '2000-01-16 12:00:00', '2000-05-31 00:00:00'],
+        'DD': ['2000-01-03', '2000-01-03', '2000-01-16', '2000-05-31'],
+        'WW': ['2000-01-03', '2000-01-03', '2000-01-10', '2000-05-29'],
+        'MM': ['2000-01-01', '2000-01-01', '2000-01-01', '2000-05-01'],
+        'Q': ['2000-01-01', '2000-01-01', '2000-01-01', '2000-04-01'],
+        'IY': ['2000-01-01', '2000-01-01', '2000-01-01', '2000-01-01'],
+    }
+
+    def setUp(self):
+        self.database = SQLite()
+        with self.database.pool.connection() as connection:
+            connection.execute('CREATE TABLE clicks (dt TIMESTAMP, device TEXT, clicks INTEGER)')
+            connection.executemany('INSERT INTO clicks VALUES (?,?,?)', [
+                ('2000-01-03 10:15:00', 'desktop', 1),
+                ('2000-01-03 10:45:00', 'mobile', 2),
+                ('2000-01-16 12:00:00', 'desktop', 3),
+                ('2000-05-31 00:00:00', 'mobile', 4),
+            ])
+            connection.commit()
+
+        table = Table('clicks')
+        self.slicer = Slicer(
+            table,
+            self.database,
+            metrics=[Metric('clicks', definition=fn.Sum(table.clicks), dtype='int64')],
+            dimensions=[DatetimeDimension('date', definition=table.dt),
+                        CategoricalDimension('device', definition=table.device)],
+        )
+
+    def tearDown(self):
+        self.database.close()
+
+    def test_round_date(self):
+        with self.database.pool.connection() as connection:
+            for interval, expected in self.intervals.items():
+                query = SQLiteQuery.from_(Table('clicks')) \
+                    .select(self.database.round_date(Field('dt'), interval)) \
+                    .orderby(Field('dt'))
+                self.assertListEqual(expected, [row[0] for row in connection.execute(str(query))], interval)
+
+    def test_data(self):
+        result = self.slicer.manager.data(metrics=['clicks'], dimensions=[('date', DatetimeDimension.month), 'device'],
+                                          dimension_filters=[RangeFilter('date', date(2000, 1, 1), date(2001, 1, 1))],
+                                          operations=[CumSum('clicks')])
+
+        self.assertListEqual([(pd.Timestamp('2000-01-01'), 'desktop'),
+                              (pd.Timestamp('2000-01-01'), 'mobile'),
+                              (pd.Timestamp('2000-05-01'), 'mobile')], list(result.index))
+        self.assertListEqual([4, 2, 4], list(result['clicks']))
+        self.assertListEqual([4, 2, 6], list(result['clicks_cumsum']))
+        self.assertEqual('int64', result['clicks'].dtype)
+
+    def test_paginated_cumsum_continues_from_previous_page(self):
+        self.slicer.pushdown_operations = True
+        request = dict(metrics=['clicks'], dimensions=[('date', DatetimeDimension.month), 'device'],
+                       operations=[CumSum('clicks')])
+
+        first_page = self.slicer.manager.data(pagination=Paginator(offset=0, limit=2), **request)
+        second_page = self.slicer.manager.data(pagination=Paginator(offset=2, limit=2), **request)
+
+        self.assertListEqual([4, 2], list(first_page['clicks_cumsum']))
+        self.assertListEqual([(pd.Timestamp('2000-05-01'), 'mobile')], list(second_page.index))
+        self.assertListEqual([6], list(second_page['clicks_cumsum']))
+
+    def test_week_over_week_reference(self):
+        result = self.slicer.manager.data(metrics=['clicks'], dimensions=[('date', DatetimeDimension.day)],
+                                          references=[WoW('date')])
+
+        self.assertListEqual([pd.Timestamp('2000-01-03'), pd.Timestamp('2000-01-16'), pd.Timestamp('2000-05-31')],
+                             list(result.index))
+        self.assertListEqual([3, 3, 4], list(result[('', 'clicks')]))
+        self.assertTrue(result[('wow', 'clicks')].isnull().all())
+
+    def test_week_over_week_reference_with_filter(self):
+        result = self.slicer.manager.data(metrics=['clicks'], dimensions=[('date', DatetimeDimension.week)],
+                                          dimension_filters=[RangeFilter('date', date(2000, 1, 9), date(2000, 1, 17))],
+                                          references=[WoW('date')])
+
+        self.assertListEqual([pd.Timestamp('2000-01-10')], list(result.index))
+        self.assertListEqual([3], list(result[('', 'clicks')]))
+        self.assertListEqual([3], list(result[('wow', 'clicks')]))
+
+    def test_offset_without_limit(self):
+        result = self.slicer.manager.data(metrics=['clicks'], dimensions=['device'], pagination=Paginator(offset=1))
+
+        self.assertListEqual(['mobile'], list(result.index))
+
+    def test_totals_are_not_supported(self):
+        with self.assertRaises(RollupException):
+            self.slicer.manager.data(metrics=['clicks'], dimensions=['device'], operations=[Totals('device')])
@@ -37,3 +37,15 @@ class TestVertica(TestCase):
         result = Vertica().round_date(Field('date'), 'XX')
 
         self.assertEqual('ROUND("date",\'XX\')', str(result))
+
+    def test_pool_settings(self):
+        vertica = Vertica(max_connections=2, idle_timeout=10)
+
+        self.assertEqual(2, vertica.pool.max_size)
+        self.assertEqual(10, vertica.pool.idle_timeout)
+
+    def test_ping_closed_connection(self):
+        mock_connection = Mock()
+        mock_connection.closed.return_value = True
+
+        self.assertFalse(Vertica().ping(mock_connection))
@@ -0,0 +1,212 @@
+# coding: utf-8
+import threading
+from unittest import TestCase, skipIf
+
+import pandas as pd
+import six
+from mock import patch
+
+from fireant import utils
+from fireant.slicer import *
+from fireant.slicer import instrumentation
+from fireant.slicer.cache import MemoryCache
+from fireant.slicer.managers import SlicerManager
+from fireant.slicer.operations import CumSum
+from fireant.slicer.pagination import Paginator
+from fireant.slicer.references import WoW
+from fireant.slicer.transformers import DataTablesRowIndexTransformer
+from fireant.tests.database.mock_database import TestDatabase
+from pypika import Table
+
+
+def run(awaitable_func):
+    import asyncio
+
+    loop = asyncio.new_event_loop()
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(asyncio.ensure_future(awaitable_func()))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def resolved(value):
+    import asyncio
+
+    future = asyncio.get_event_loop().create_future()
+    future.set_result(value)
+    return future
+
+
+@skipIf(six.PY2, 'asyncio requires Python 3')
+class ThenTests(TestCase):
+    def test_result(self):
+        result = run(lambda: utils.then(resolved(1), lambda x: x + 1))
+
+        self.assertEqual(2, result)
+
+    def test_error_in_awaitable(self):
+        import asyncio
+
+        def failed():
+            future = asyncio.get_event_loop().create_future()
+            future.set_exception(ValueError())
+            return utils.then(future, lambda x: x)
+
+        with self.assertRaises(ValueError):
+            run(failed)
+
+    def test_error_in_func(self):
+        def func(x):
+            raise KeyError()
+
+        with self.assertRaises(KeyError):
+            run(lambda: utils.then(resolved(1), func))
+
+
+@skipIf(six.PY2, 'asyncio requires Python 3')
+class AsyncDatabaseTests(TestCase):
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_fetch_dataframe_async_uses_thread_pool(self, mock_fetch_dataframe):
+        threads = []
+        mock_fetch_dataframe.side_effect = lambda query: threads.append(threading.current_thread()) or 'OK'
+        db = TestDatabase()
+
+        result = run(lambda: db.fetch_dataframe_async('SELECT 1'))
+
+        self.assertEqual('OK', result)
+        mock_fetch_dataframe.assert_called_once_with('SELECT 1')
+        self.assertIsNot(threading.current_thread(), threads[0])
+        db.close()
+
+    def test_executor_size_matches_connection_pool(self):
+        db = TestDatabase()
+        db.max_connections = 3
+
+        self.assertEqual(3, db.executor._max_workers)
+        db.close()
+
+
+@skipIf(six.PY2, 'asyncio requires Python 3')
+class AsyncManagerTests(TestCase):
+    def setUp(self):
+        test_table = Table('test')
+        self.slicer = Slicer(
+            test_table,
+            TestDatabase(),
+
+            metrics=[
+                Metric('foo', label='Foo'),
+            ],
+
+            dimensions=[
+                ContinuousDimension('cont', label='Cont', definition=test_table.cont),
+            ]
+        )
+
+    @patch.object(TestDatabase, 'fetch_dataframe_async')
+    def test_data_async(self, mock_fetch_dataframe_async):
+        mock_fetch_dataframe_async.side_effect = lambda query, **kwargs: resolved(
+            pd.DataFrame([[1, 1], [0, 2]], columns=['cont', 'foo']))
+
+        result = run(lambda: self.slicer.manager.data_async(metrics=['foo'], dimensions=['cont'],
+                                                            operations=[CumSum('foo')]))
+
+        self.assertListEqual([0, 1], list(result.index))
+        self.assertListEqual([2, 1], list(result['foo']))
+        self.assertListEqual([2, 3], list(result['foo_cumsum']))
+
+    @patch.object(TestDatabase, 'fetch_dataframe_async')
+    def test_data_async_with_cache(self, mock_fetch_dataframe_async):
+        mock_fetch_dataframe_async.side_effect = lambda query, **kwargs: resolved(pd.DataFrame([[1]], columns=['foo']))
+        self.slicer.cache = MemoryCache()
+
+        run(lambda: self.slicer.manager.data_async(metrics=['foo']))
+        result = run(lambda: self.slicer.manager.data_async(metrics=['foo']))
+
+        self.assertEqual(1, mock_fetch_dataframe_async.call_count)
+        self.assertListEqual([1], list(result['foo']))
+
+    @patch.object(TestDatabase, 'fetch_dataframe_async')
+    def test_data_async_with_parallel_references(self, mock_fetch_dataframe_async):
+        test_table = Table('test')
+        slicer = Slicer(test_table, TestDatabase(),
+                        metrics=[Metric('foo', label='Foo')],
+                        dimensions=[DatetimeDimension('date', definition=test_table.dt)],
+                        parallel_references=True)
+
+        mock_fetch_dataframe_async.side_effect = lambda query, **kwargs: resolved(
+            pd.DataFrame([[pd.Timestamp('2000-01-08'), 1 if 'INTERVAL' in query else 3]], columns=['date', 'foo']))
+
+        result = run(lambda: slicer.manager.data_async(metrics=['foo'], dimensions=['date'],
+                                                       references=[WoW('date')]))
+
+        self.assertEqual(2, mock_fetch_dataframe_async.call_count)
+        self.assertListEqual([3], list(result[('', 'foo')]))
+        self.assertListEqual([1], list(result[('wow', 'foo')]))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_many_requests_in_flight(self, mock_fetch_dataframe):
+        import asyncio
+
+        # Each query blocks until all of them have started, which only works if they are executed concurrently
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch_dataframe(query, **kwargs):
+            barrier.wait()
+            return pd.DataFrame([[1]], columns=['foo'])
+
+        mock_fetch_dataframe.side_effect = fetch_dataframe
+
+        result = run(lambda: asyncio.gather(*[self.slicer.manager.data_async(metrics=['foo'])
+                                              for _ in range(3)]))
+
+        self.assertEqual(3, len(result))
+        self.slicer.database.close()
+
+    @patch.object(DataTablesRowIndexTransformer, 'transform')
+    @patch.object(SlicerManager, 'data_async')
+    def test_transformer_async(self, mock_data_async, mock_transform):
+        mock_data_async.side_effect = lambda **kwargs: resolved(pd.DataFrame([[0, 1]], columns=['cont', 'foo'])
+                                                                .set_index('cont'))
+        mock_transform.return_value = 'OK'
+
+        result = run(lambda: self.slicer.datatables.row_index_table_async(metrics=['foo'], dimensions=['cont']))
+
+        self.assertEqual('OK', result)
+        mock_data_async.assert_called_once_with(metrics=['foo'], dimensions=['cont'],
+                                                metric_filters=(), dimension_filters=(),
+                                                references=(), operations=(), pagination=None)
+        self.assertEqual('Foo', mock_transform.call_args[0][1]['metrics']['foo']['label'])
+
+    @patch.object(SlicerManager, 'data_count_async')
+    @patch.object(SlicerManager, 'data_async')
+    def test_transformer_async_with_pagination(self, mock_data_async, mock_data_count_async):
+        mock_data_async.side_effect = lambda **kwargs: resolved(pd.DataFrame([[0, 1]], columns=['cont', 'foo'])
+                                                                .set_index('cont'))
+        mock_data_count_async.side_effect = lambda **kwargs: resolved(100)
+
+        result = run(lambda: self.slicer.datatables.row_index_table_async(metrics=['foo'], dimensions=['cont'],
+                                                                          pagination=Paginator(limit=1)))
+
+        self.assertEqual(100, result['recordsTotal'])
+        self.assertEqual(1, len(result['data']))
+
+    @patch.object(SlicerManager, 'data_async')
+    def test_transformer_async_error_is_traced(self, mock_data_async):
+        def failed(**kwargs):
+            import asyncio
+
+            future = asyncio.get_event_loop().create_future()
+            future.set_exception(ValueError())
+            return future
+
+        mock_data_async.side_effect = failed
+
+        with instrumentation.trace() as events:
+            with self.assertRaises(ValueError):
+                run(lambda: self.slicer.datatables.row_index_table_async(metrics=['foo'], dimensions=['cont']))
+
+        self.assertListEqual(['prevalidate', 'data'], [event.stage for event in events])
+        self.assertEqual('ValueError', events[1].error)
@@ -0,0 +1,347 @@
+# coding: utf-8
+import fnmatch
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase, skipIf
+
+import pandas as pd
+from mock import patch
+
+from fireant.database.columnar import arrow_available
+from fireant.slicer import *
+from fireant.slicer.cache import ArrowCache, MemoryCache, DiskCache, RedisCache, cache_key
+from fireant.tests.database.mock_database import TestDatabase
+from pypika import Table
+
+
+
+class LocalRedis(object):
+    """A minimal stand-in for a Redis client which keeps values in a dict."""
+
+    def __init__(self):
+        self.values, self.expiry = {}, {}
+
+    def get(self, key):
+        if key in self.expiry and self.expiry[key] <= time.time():
+            self.delete(key)
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+        if ex is not None:
+            self.expiry[key] = time.time() + ex
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+
+    def scan_iter(self, match='*'):
+        return [key for key in list(self.values) if fnmatch.fnmatch(key, match)]
+
+
+class CacheKeyTests(TestCase):
+    def test_same_query_same_database(self):
+        self.assertEqual(cache_key(TestDatabase(), 'SELECT 1'), cache_key(TestDatabase(), 'SELECT 1'))
+
+    def test_different_query(self):
+        self.assertNotEqual(cache_key(TestDatabase(), 'SELECT 1'), cache_key(TestDatabase(), 'SELECT 2'))
+
+    def test_different_database(self):
+        self.assertNotEqual(cache_key(TestDatabase(host='a'), 'SELECT 1'),
+                            cache_key(TestDatabase(host='b'), 'SELECT 1'))
+
+
+class CacheBackendTests(object):
+    df = pd.DataFrame({'a': [1, 2, 3], 'b': [4.0, 5.0, 6.0]})
+
+    def make_cache(self, ttl=None):
+        raise NotImplementedError
+
+    def test_miss(self):
+        cache = self.make_cache()
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual({'hits': 0, 'misses': 1, 'hit_ratio': 0.0},
+                         {k: v for k, v in cache.stats().items() if k in ('hits', 'misses', 'hit_ratio')})
+
+    def test_hit(self):
+        cache = self.make_cache()
+        cache.set('key', self.df)
+
+        result = cache.get('key')
+
+        self.assertTrue(self.df.equals(result))
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(0, cache.misses)
+
+    def test_delete(self):
+        cache = self.make_cache()
+        cache.set('key', self.df)
+        cache.delete('key')
+
+        self.assertIsNone(cache.get('key'))
+
+    def test_clear(self):
+        cache = self.make_cache()
+        cache.set('key1', self.df)
+        cache.set('key2', self.df)
+        cache.clear()
+
+        self.assertIsNone(cache.get('key1'))
+        self.assertIsNone(cache.get('key2'))
+
+    @patch('fireant.slicer.cache.time.time')
+    def test_expiry(self, mock_time):
+        mock_time.return_value = 100
+        cache = self.make_cache(ttl=10)
+        cache.set('key', self.df)
+
+        mock_time.return_value = 109
+        self.assertIsNotNone(cache.get('key'))
+
+        mock_time.return_value = 110
+        self.assertIsNone(cache.get('key'))
+
+    def test_result_is_not_shared(self):
+        cache = self.make_cache()
+        cache.set('key', self.df)
+
+        cache.get('key')['a'] = 0
+
+        self.assertTrue(self.df.equals(cache.get('key')))
+
+
+class MemoryCacheTests(CacheBackendTests, TestCase):
+    def make_cache(self, ttl=None):
+        return MemoryCache(ttl=ttl)
+
+    def test_evict_least_recently_used(self):
+        nbytes = int(self.df.memory_usage(index=True, deep=True).sum())
+        cache = MemoryCache(max_bytes=2 * nbytes)
+        cache.set('key1', self.df)
+        cache.set('key2', self.df)
+        cache.get('key1')
+        cache.set('key3', self.df)
+
+        self.assertIsNotNone(cache.get('key1'))
+        self.assertIsNone(cache.get('key2'))
+        self.assertIsNotNone(cache.get('key3'))
+        self.assertEqual(2 * nbytes, cache.nbytes)
+
+    def test_do_not_cache_results_larger_than_budget(self):
+        cache = MemoryCache(max_bytes=1)
+        cache.set('key', self.df)
+
+        self.assertEqual(0, len(cache))
+        self.assertEqual(0, cache.nbytes)
+
+
+class DiskCacheTests(CacheBackendTests, TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, ttl=None):
+        return DiskCache(self.directory, ttl=ttl)
+
+
+@skipIf(not arrow_available(), 'pyarrow 0.17 and pandas 0.23 are required')
+class ArrowCacheTests(CacheBackendTests, TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_cache(self, ttl=None, max_bytes=2 ** 20):
+        return ArrowCache(self.directory, max_bytes=max_bytes, ttl=ttl)
+
+    def file_size(self):
+        cache = self.make_cache()
+        cache.set('size', self.df)
+        nbytes = cache.manifest()['size']['bytes']
+        cache.clear()
+        return nbytes
+
+    def test_dtypes_are_preserved(self):
+        df = pd.DataFrame({'date': pd.date_range('2000-01-01', periods=3),
+                           'cat': pd.Categorical(['a', 'b', 'a']),
+                           'count': [1, 2, 3],
+                           'value': [1.5, None, 2.5]})
+        cache = self.make_cache()
+        cache.set('key', df)
+
+        result = cache.get('key')
+
+        self.assertTrue(df.equals(result))
+        self.assertListEqual(list(df.dtypes), list(result.dtypes))
+
+    def test_manifest(self):
+        cache = self.make_cache()
+        cache.set('key', self.df)
+
+        entry = cache.manifest()['key']
+
+        self.assertEqual(3, entry['rows'])
+        self.assertListEqual(['a', 'b'], entry['columns'])
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, 'key.arrow')), entry['bytes'])
+        self.assertEqual(entry['bytes'], cache.stats()['bytes'])
+
+    def test_evict_least_recently_used(self):
+        nbytes = self.file_size()
+        cache = self.make_cache(max_bytes=2 * nbytes)
+        cache.set('key1', self.df)
+        cache.set('key2', self.df)
+        time.sleep(0.01)
+        cache.get('key1')
+        cache.set('key3', self.df)
+
+        self.assertIsNotNone(cache.get('key1'))
+        self.assertIsNone(cache.get('key2'))
+        self.assertIsNotNone(cache.get('key3'))
+        self.assertEqual(2 * nbytes, cache.nbytes)
+
+    def test_do_not_cache_results_larger_than_budget(self):
+        cache = self.make_cache(max_bytes=1)
+        cache.set('key', self.df)
+
+        self.assertEqual(0, len(cache))
+        self.assertListEqual(['manifest.json'], os.listdir(self.directory))
+
+    def test_result_is_memory_mapped(self):
+        cache = self.make_cache()
+        cache.set('key', self.df)
+
+        result = cache.get('key')
+
+        self.assertFalse(result['a'].values.flags.writeable)
+        self.assertFalse(result['a'].values.flags.owndata)
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_slicer_results_are_writable(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = pd.DataFrame({'device': ['desktop', 'mobile'], 'foo': [1, 2]})
+        slicer = Slicer(Table('test'), TestDatabase(), metrics=[Metric('foo')],
+                        dimensions=[CategoricalDimension('device')], cache=self.make_cache())
+
+        for dimensions in [[], ['device']]:
+            slicer.manager.data(metrics=['foo'], dimensions=dimensions)
+            result = slicer.manager.data(metrics=['foo'], dimensions=dimensions)
+
+            self.assertTrue(result['foo'].values.flags.writeable)
+        self.assertEqual(2, mock_fetch_dataframe.call_count)
+
+    def test_get_does_not_write_manifest(self):
+        cache = self.make_cache()
+        cache.set('key', self.df)
+        created = cache.manifest()['key']['last_used']
+        time.sleep(0.01)
+
+        with patch.object(ArrowCache, '_save_manifest') as mock_save_manifest:
+            cache.get('key')
+
+        mock_save_manifest.assert_not_called()
+        self.assertLess(created, cache.manifest()['key']['last_used'])
+
+    def test_last_used_is_saved_after_interval(self):
+        cache = ArrowCache(self.directory, last_used_interval=0)
+        cache.set('key', self.df)
+
+        cache.get('key')
+        last_used = cache.manifest()['key']['last_used']
+
+        self.assertEqual(last_used, self.make_cache().manifest()['key']['last_used'])
+
+    @patch('fireant.database.columnar.arrow_available', return_value=False)
+    def test_requires_supported_arrow(self, mock_arrow_available):
+        with self.assertRaises(ImportError):
+            self.make_cache()
+
+    def test_files_missing_from_manifest_are_added(self):
+        self.make_cache().set('key', self.df)
+        os.remove(os.path.join(self.directory, ArrowCache.manifest_filename))
+
+        cache = self.make_cache()
+
+        self.assertListEqual(['key'], list(cache.manifest()))
+        self.assertTrue(self.df.equals(cache.get('key')))
+
+
+class RedisCacheTests(CacheBackendTests, TestCase):
+    def make_cache(self, ttl=None):
+        return RedisCache(LocalRedis(), ttl=ttl)
+
+    def test_clear_only_removes_prefixed_keys(self):
+        client = LocalRedis()
+        client.set('other', b'value')
+        cache = RedisCache(client)
+        cache.set('key', self.df)
+        cache.clear()
+
+        self.assertEqual(['other'], list(client.values))
+
+    def test_ttl_passed_to_redis(self):
+        cache = RedisCache(LocalRedis())
+
+        with patch.object(LocalRedis, 'set') as mock_set:
+            cache.set('key', self.df, ttl=1.5)
+
+        self.assertEqual(1, mock_set.call_args[1]['ex'])
+
+
+class SlicerCacheTests(TestCase):
+    df = pd.DataFrame({'foo': [1, 2]})
+
+    def setUp(self):
+        self.cache = MemoryCache()
+        self.slicer = Slicer(
+            Table('test'),
+            TestDatabase(),
+            metrics=[Metric('foo'), Metric('bar')],
+            cache=self.cache,
+            cache_ttl=60,
+        )
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_repeated_request_served_from_cache(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = self.df
+
+        self.slicer.manager.data(metrics=['foo'])
+        result = self.slicer.manager.data(metrics=['foo'])
+
+        self.assertEqual(1, mock_fetch_dataframe.call_count)
+        self.assertTrue(self.df.equals(result))
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_different_requests_are_cached_separately(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = self.df
+
+        self.slicer.manager.data(metrics=['foo'])
+        self.slicer.manager.data(metrics=['bar'])
+
+        self.assertEqual(2, mock_fetch_dataframe.call_count)
+
+    @patch.object(MemoryCache, 'set')
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_slicer_ttl(self, mock_fetch_dataframe, mock_set):
+        mock_fetch_dataframe.return_value = self.df
+
+        self.slicer.manager.data(metrics=['foo'])
+
+        self.assertEqual(60, mock_set.call_args[1]['ttl'])
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_invalidate_cache(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = self.df
+
+        self.slicer.manager.data(metrics=['foo'])
+        self.slicer.manager.invalidate_cache(metrics=['foo'])
+        self.slicer.manager.data(metrics=['foo'])
+
+        self.assertEqual(2, mock_fetch_dataframe.call_count)
@@ -0,0 +1,108 @@
+# coding: utf-8
+from unittest import TestCase
+
+import pandas as pd
+from mock import patch, MagicMock
+
+from fireant.slicer import *
+from fireant.slicer import instrumentation
+from fireant.slicer.transformers import TransformationException
+from fireant.tests.database.mock_database import TestDatabase
+from pypika import Table
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        test_table = Table('test_table')
+        self.slicer = Slicer(
+            test_table,
+            TestDatabase(),
+
+            metrics=[
+                Metric('foo', label='Foo'),
+                Metric('bar', label='Bar'),
+            ],
+
+            dimensions=[
+                ContinuousDimension('cont', label='Cont', definition=test_table.cont),
+                CategoricalDimension('cat', label='Cat', definition=test_table.cat),
+            ]
+        )
+
+        patcher = patch.object(TestDatabase, 'fetch_dataframe')
+        self.mock_fetch_dataframe = patcher.start()
+        self.mock_fetch_dataframe.side_effect = lambda query, **kwargs: pd.DataFrame([[0, 1, 2], [1, 3, 4]],
+                                                                                     columns=['cont', 'foo', 'bar'])
+        self.addCleanup(patcher.stop)
+
+    def test_no_hooks_registered(self):
+        self.assertListEqual([], instrumentation.hooks)
+        self.assertIs(instrumentation._null_trace, instrumentation.request_trace(self.slicer.manager, None, {}))
+
+    def test_trace_stages(self):
+        with instrumentation.trace() as events:
+            self.slicer.datatables.row_index_table(metrics=['foo', 'bar'], dimensions=['cont'])
+
+        self.assertListEqual(['prevalidate', 'data', 'display_schema', 'correct_dimension_level_order', 'transform'],
+                             [event.stage for event in events])
+        self.assertListEqual([], instrumentation.hooks)
+
+        for event in events:
+            self.assertEqual('test_table', event.table)
+            self.assertEqual('DataTablesRowIndexTransformer', event.transformer)
+            self.assertEqual(events[0].fingerprint, event.fingerprint)
+            self.assertLessEqual(0, event.seconds)
+            self.assertIsNone(event.error)
+
+        data_event = events[1]
+        self.assertEqual(2, data_event.rows)
+        self.assertEqual(2, data_event.columns)
+        self.assertLess(0, data_event.bytes)
+        self.assertIsNone(events[0].rows)
+
+    def test_fingerprint_ignores_filter_values(self):
+        def fingerprint(value):
+            with instrumentation.trace() as events:
+                self.slicer.datatables.row_index_table(metrics=['foo'], dimensions=['cont'], dimension_filters=[
+                    EqualityFilter('cat', EqualityOperator.eq, value)])
+            return events[0].fingerprint
+
+        self.assertEqual(fingerprint('a'), fingerprint('b'))
+
+        with instrumentation.trace() as events:
+            self.slicer.datatables.row_index_table(metrics=['bar'], dimensions=['cont'])
+        self.assertNotEqual(fingerprint('a'), events[0].fingerprint)
+
+    def test_error_in_stage(self):
+        self.mock_fetch_dataframe.side_effect = ValueError
+
+        with instrumentation.trace() as events:
+            with self.assertRaises(ValueError):
+                self.slicer.datatables.row_index_table(metrics=['foo'], dimensions=['cont'])
+
+        self.assertListEqual(['prevalidate', 'data'], [event.stage for event in events])
+        self.assertEqual('ValueError', events[1].error)
+
+    def test_prevalidation_error(self):
+        with instrumentation.trace() as events:
+            with self.assertRaises(TransformationException):
+                self.slicer.highcharts.line_chart(metrics=['foo'], dimensions=['cat'])
+
+        self.assertEqual(1, len(events))
+        self.assertEqual('TransformationException', events[0].error)
+
+    def test_error_in_hook_is_ignored(self):
+        hook = instrumentation.add_hook(MagicMock(side_effect=ValueError))
+        self.addCleanup(instrumentation.remove_hook, hook)
+
+        result = self.slicer.datatables.row_index_table(metrics=['foo'], dimensions=['cont'])
+
+        self.assertEqual(5, hook.call_count)
+        self.assertEqual(2, len(result['data']))
+
+    def test_event_as_dict(self):
+        event = instrumentation.StageEvent('data', 0.5, table='test_table', rows=2)
+
+        self.assertDictEqual({'stage': 'data', 'seconds': 0.5, 'table': 'test_table', 'transformer': None,
+                              'fingerprint': None, 'rows': 2, 'columns': None, 'bytes': None, 'error': None},
+                             event.as_dict())
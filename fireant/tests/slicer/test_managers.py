@@ -1,13 +1,20 @@
 # coding: utf-8
+from datetime import date
 from unittest import TestCase
 
+import pandas as pd
 from mock import patch, MagicMock
+from six import StringIO
 
 from fireant.slicer import *
 from fireant.slicer.managers import SlicerManager
+from fireant.slicer.operations import CumMean, CumSum, L1Loss, Totals
+from fireant.slicer.pagination import Paginator
+from fireant.slicer.queries import QueryManager
+from fireant.slicer.references import WoW
 from fireant.slicer.transformers import *
 from fireant.tests.database.mock_database import TestDatabase
-from pypika import Table
+from pypika import Order, Table, Tables
 
 
 class ManagerInitializationTests(TestCase):
@@ -49,6 +56,12 @@ class ManagerInitializationTests(TestCase):
         self.assertTrue(hasattr(self.slicer.datatables, 'row_index_csv'))
         self.assertTrue(hasattr(self.slicer.datatables, 'column_index_csv'))
 
+    def test_transformers_are_listed_by_dir(self):
+        self.assertTrue({'manager', 'notebooks', 'highcharts', 'datatables'} <= set(dir(self.slicer)))
+        self.assertTrue({'line_chart', 'line_chart_async', 'bar_chart', 'column_chart'}
+                        <= set(dir(self.slicer.highcharts)))
+        self.assertTrue({'row_index_table', 'row_index_csv'} <= set(dir(self.slicer.datatables)))
+
     @patch('fireant.slicer.managers.SlicerManager.post_process')
     @patch('fireant.slicer.managers.SlicerManager.query_data')
     @patch('fireant.slicer.managers.SlicerManager.operation_schema')
@@ -65,7 +78,7 @@ class ManagerInitializationTests(TestCase):
         result = self.slicer.manager.data(**mock_args)
 
         self.assertEqual('OK', result)
-        mock_query_schema.assert_called_once_with(**mock_args)
+        mock_query_schema.assert_called_once_with(pagination=None, **mock_args)
         mock_query_data.assert_called_once_with(a=1, b=2)
         mock_post_process.assert_called_once_with('dataframe', 'op_schema')
         mock_operation_schema.assert_called_once_with(mock_args['operations'])
@@ -98,7 +111,7 @@ class ManagerInitializationTests(TestCase):
         result = test_func(**request)
 
         self.assertEqual(mock_return, result)
-        mock_sm_data.assert_called_once_with(**request)
+        mock_sm_data.assert_called_once_with(pagination=None, **request)
         mock_sm_ds.assert_called_once_with(request['metrics'], request['dimensions'], request.get('references', ()), ())
         mock_transform.assert_called_once_with(mock_df.__getitem__(), mock_schema)
 
@@ -235,6 +248,23 @@ class ManagerInitializationTests(TestCase):
 
         self._test_transform(self.slicer.datatables.column_index_csv, mock_transform, request)
 
+    @patch.object(HighchartsLineTransformer, 'transform')
+    @patch.object(HighchartsLineTransformer, 'transform_json')
+    @patch.object(SlicerManager, 'display_schema')
+    @patch.object(SlicerManager, 'data')
+    def test_transform_as_json(self, mock_sm_data, mock_sm_ds, mock_transform_json, mock_transform):
+        mock_sm_data.return_value = MagicMock()
+        mock_sm_ds.return_value = {'metrics': []}
+        mock_transform_json.return_value = b'{}'
+
+        result = self.slicer.highcharts.line_chart(metrics=['foo'], dimensions=['cont'], as_json=True)
+
+        self.assertEqual(b'{}', result)
+        mock_sm_data.assert_called_once_with(metrics=['foo'], dimensions=['cont'], metric_filters=(),
+                                             dimension_filters=(), references=(), operations=(), pagination=None)
+        mock_transform_json.assert_called_once()
+        mock_transform.assert_not_called()
+
     @patch.object(SlicerManager, 'query_data')
     @patch.object(SlicerManager, 'data_query_schema')
     def test_remove_duplicate_metric_keys(self, mock_query_schema, mock_query_data):
@@ -246,7 +276,7 @@ class ManagerInitializationTests(TestCase):
             metrics=['foo'],
             dimensions=[],
             metric_filters=(), dimension_filters=(),
-            references=(), operations=(),
+            references=(), operations=(), pagination=None,
         )
 
     @patch.object(SlicerManager, 'query_data')
@@ -261,7 +291,7 @@ class ManagerInitializationTests(TestCase):
             metrics=['foo'],
             dimensions=['fizz'],
             metric_filters=(), dimension_filters=(),
-            references=(), operations=(),
+            references=(), operations=(), pagination=None,
         )
 
     @patch.object(SlicerManager, 'query_data')
@@ -276,7 +306,7 @@ class ManagerInitializationTests(TestCase):
             metrics=['foo'],
             dimensions=['fizz'],
             metric_filters=(), dimension_filters=(),
-            references=(), operations=(),
+            references=(), operations=(), pagination=None,
         )
 
     @patch.object(SlicerManager, 'query_data')
@@ -292,5 +322,476 @@ class ManagerInitializationTests(TestCase):
             metrics=['foo'],
             dimensions=[('fizz', DatetimeDimension.week)],
             metric_filters=(), dimension_filters=(),
-            references=(), operations=(),
+            references=(), operations=(), pagination=None,
+        )
+
+
+class ManagerChunkTests(TestCase):
+    def setUp(self):
+        test_table = Table('test')
+        self.slicer = Slicer(
+            test_table,
+            TestDatabase(),
+
+            metrics=[
+                Metric('foo', label='Foo'),
+            ],
+
+            dimensions=[
+                ContinuousDimension('cont', label='Cont', definition=test_table.cont),
+            ]
+        )
+
+    @patch.object(TestDatabase, 'fetch_dataframe_chunks')
+    def test_data_chunks(self, mock_fetch_chunks):
+        mock_fetch_chunks.return_value = iter([
+            pd.DataFrame([[0, 1], [1, 2]], columns=[b'cont', b'foo']),
+            pd.DataFrame([[2, 3]], columns=[b'cont', b'foo']),
+        ])
+
+        result = list(self.slicer.manager.data_chunks(metrics=['foo'], dimensions=['cont'], chunksize=2))
+
+        self.assertEqual(2, len(result))
+        self.assertListEqual([0, 1], list(result[0].index))
+        self.assertListEqual([1, 2], list(result[0]['foo']))
+        self.assertListEqual([2], list(result[1].index))
+        self.assertEqual(2, mock_fetch_chunks.call_args[1]['chunksize'])
+
+    def test_data_chunks_with_post_processing_operation(self):
+        from fireant.slicer.operations import CumSum
+
+        with self.assertRaises(SlicerException):
+            self.slicer.manager.data_chunks(metrics=['foo'], dimensions=['cont'], operations=[CumSum('foo')])
+
+    @patch.object(TestDatabase, 'fetch_dataframe_chunks')
+    def test_export_csv(self, mock_fetch_chunks):
+        mock_fetch_chunks.return_value = iter([
+            pd.DataFrame([[0, 1], [1, 2]], columns=['cont', 'foo']),
+            pd.DataFrame([[2, 3]], columns=['cont', 'foo']),
+        ])
+
+        buffer = StringIO()
+        self.slicer.manager.export_csv(buffer, metrics=['foo'], dimensions=['cont'], chunksize=2)
+
+        self.assertEqual('Cont,Foo\n'
+                         '0,1\n'
+                         '1,2\n'
+                         '2,3\n', buffer.getvalue())
+
+
+class ManagerMemoTests(TestCase):
+    def setUp(self):
+        test_table = Table('test')
+        self.slicer = Slicer(
+            test_table,
+            TestDatabase(),
+
+            metrics=[
+                Metric('foo', label='Foo'),
+                Metric('bar', label='Bar'),
+            ],
+
+            dimensions=[
+                DatetimeDimension('date', label='Date', definition=test_table.dt),
+                CategoricalDimension('cat', label='Cat', definition=test_table.cat),
+            ]
+        )
+
+    def _request(self, **kwargs):
+        request = dict(metrics=['foo'], dimensions=[('date', DatetimeDimension.week), 'cat'],
+                       dimension_filters=[ContainsFilter('cat', ['a', 'b'])])
+        request.update(kwargs)
+        return request
+
+    @patch('fireant.slicer.managers.SlicerManager._metrics_schema')
+    def test_data_query_schema_is_built_once_for_equal_requests(self, mock_metrics_schema):
+        mock_metrics_schema.return_value = {'foo': self.slicer.table.foo}
+
+        schema1 = self.slicer.manager.data_query_schema(**self._request())
+        schema2 = self.slicer.manager.data_query_schema(**self._request(metrics=('foo',)))
+
+        self.assertEqual(1, mock_metrics_schema.call_count)
+        self.assertIs(schema1['metrics'], schema2['metrics'])
+        self.assertIsNot(schema1, schema2)
+
+    def test_data_query_schema_differs_by_request(self):
+        manager = self.slicer.manager
+
+        schema = manager.data_query_schema(**self._request())
+
+        self.assertIsNot(schema['metrics'], manager.data_query_schema(**self._request(metrics=['bar']))['metrics'])
+        self.assertIsNot(schema['dimensions'], manager.data_query_schema(
+            **self._request(dimensions=[('date', DatetimeDimension.day), 'cat']))['dimensions'])
+        self.assertIsNot(schema['dfilters'], manager.data_query_schema(
+            **self._request(dimension_filters=[ContainsFilter('cat', ['a', 'c'])]))['dfilters'])
+        self.assertIsNot(schema['dfilters'], manager.data_query_schema(
+            **self._request(dimension_filters=[RangeFilter('date', pd.Timestamp('2000-01-01'),
+                                                           pd.Timestamp('2000-02-01'))]))['dfilters'])
+
+    def test_timestamp_filters_are_compared_by_value(self):
+        manager = self.slicer.manager
+
+        def schema(start):
+            return manager.data_query_schema(**self._request(
+                dimension_filters=[RangeFilter('date', pd.Timestamp(start), pd.Timestamp('2000-03-01'))]))
+
+        self.assertIs(schema('2000-01-01')['dfilters'], schema('2000-01-01')['dfilters'])
+        self.assertIsNot(schema('2000-01-01')['dfilters'], schema('2000-02-01')['dfilters'])
+
+    def test_display_schema_is_memoized(self):
+        manager = self.slicer.manager
+
+        schema1 = manager.display_schema(metrics=['foo'], dimensions=['cat'])
+        schema2 = manager.display_schema(metrics=['foo'], dimensions=['cat'])
+
+        self.assertIs(schema1['metrics'], schema2['metrics'])
+        self.assertIsNot(schema1['metrics'], manager.display_schema(metrics=['bar'], dimensions=['cat'])['metrics'])
+
+    @patch('fireant.slicer.queries.QueryManager._data_querystring')
+    def test_querystring_is_built_once_for_equal_requests(self, mock_data_querystring):
+        mock_data_querystring.return_value = 'SELECT 1'
+        manager = self.slicer.manager
+
+        for _ in range(2):
+            query_schema = manager.data_query_schema(**self._request())
+            query_schema.pop('database')
+            query_schema.pop('dtypes')
+            self.assertEqual('SELECT 1', manager._data_querystring(**query_schema))
+
+        self.assertEqual(1, mock_data_querystring.call_count)
+
+    def test_memoized_querystring_matches_built_querystring(self):
+        manager = self.slicer.manager
+        query_schema = manager.data_query_schema(**self._request())
+        query_schema.pop('database')
+        query_schema.pop('dtypes')
+
+        expected = QueryManager._data_querystring(manager, **query_schema)
+
+        self.assertEqual(expected, manager._data_querystring(**query_schema))
+        self.assertEqual(expected, manager._data_querystring(**query_schema))
+
+    def test_memo_size_is_bounded(self):
+        manager = self.slicer.manager
+        manager._schema_memo.maxsize = 2
+
+        for metric in ['foo', 'bar', 'foo']:
+            manager.display_schema(metrics=[metric])
+
+        self.assertEqual(2, len(manager._schema_memo))
+
+
+class PushdownOperationTests(TestCase):
+    def setUp(self):
+        self.test_table = Table('test')
+        self.test_database = TestDatabase()
+        self.test_database.supports_window_functions = True
+        self.slicer = Slicer(
+            self.test_table,
+            self.test_database,
+            metrics=[Metric('foo'), Metric('bar')],
+            dimensions=[DatetimeDimension('date'), CategoricalDimension('cat')],
+            pushdown_operations=True,
+        )
+
+    def _metric_keys(self, **kwargs):
+        request = dict(metrics=['foo'], dimensions=['date', 'cat'], operations=[CumSum('foo'), CumMean('bar')])
+        request.update(kwargs)
+        return list(self.slicer.manager.data_query_schema(**request)['metrics'].keys())
+
+    def test_cumulative_operations_are_selected(self):
+        self.assertListEqual(['foo', 'bar', 'foo_cumsum', 'bar_cummean'], self._metric_keys())
+
+    def test_not_pushed_down_when_disabled(self):
+        self.slicer.pushdown_operations = False
+        self.assertNotIn('foo_cumsum', self._metric_keys())
+
+    def test_not_pushed_down_without_window_functions(self):
+        self.test_database.supports_window_functions = False
+        self.assertNotIn('foo_cumsum', self._metric_keys())
+
+    def test_not_pushed_down_without_dimensions(self):
+        self.assertNotIn('foo_cumsum', self._metric_keys(dimensions=[]))
+
+    def test_not_pushed_down_with_references(self):
+        self.assertNotIn('foo_cumsum', self._metric_keys(references=[WoW('date')]))
+
+    def test_not_pushed_down_with_totals(self):
+        self.assertNotIn('foo_cumsum', self._metric_keys(operations=[CumSum('foo'), Totals('cat')]))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_pushed_down_operations_are_not_post_processed(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = pd.DataFrame({'date': pd.date_range('2000-01-01', periods=2),
+                                                          'cat': ['a', 'a'],
+                                                          'foo': [1., 2.],
+                                                          'foo_cumsum': [10., 20.]},
+                                                         columns=['date', 'cat', 'foo', 'foo_cumsum'])
+
+        result = self.slicer.manager.data(metrics=['foo'], dimensions=['date', 'cat'], operations=[CumSum('foo')])
+
+        self.assertIn('OVER (PARTITION BY', mock_fetch_dataframe.call_args[0][0])
+        self.assertListEqual(['foo', 'foo_cumsum'], list(result.columns))
+        self.assertListEqual([10., 20.], list(result['foo_cumsum']))
+
+
+class IncrementalRefreshTests(TestCase):
+    def setUp(self):
+        self.test_table = Table('test')
+        self.slicer = Slicer(
+            self.test_table,
+            TestDatabase(),
+            metrics=[Metric('foo')],
+            dimensions=[DatetimeDimension('date', definition=self.test_table.dt), CategoricalDimension('cat')],
         )
+
+    @staticmethod
+    def _results(start, foo):
+        return pd.DataFrame({'date': pd.date_range(start, periods=len(foo)),
+                             'cat': ['a'] * len(foo),
+                             'foo': foo},
+                            columns=['date', 'cat', 'foo'])
+
+    def _data(self, stop, **kwargs):
+        return self.slicer.manager.data(metrics=['foo'], dimensions=['date', 'cat'],
+                                        dimension_filters=[RangeFilter('date', date(2000, 1, 1), stop)],
+                                        incremental=True, **kwargs)
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_only_last_intervals_are_queried_again(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.side_effect = [self._results('2000-01-01', [1., 2., 3., 4.]),
+                                            self._results('2000-01-03', [30., 40., 50.])]
+
+        self._data(date(2000, 1, 4))
+        result = self._data(date(2000, 1, 5))
+
+        self.assertIn("'2000-01-03", mock_fetch_dataframe.call_args[0][0])
+        self.assertListEqual(list(pd.date_range('2000-01-01', periods=5)), list(result.index.get_level_values(0)))
+        # The rows before the last kept interval are kept and the others are replaced
+        self.assertListEqual([1., 2., 3., 40., 50.], list(result['foo']))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_cumulative_operations_continue_from_kept_rows(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.side_effect = [self._results('2000-01-01', [1., 2., 3., 4.]),
+                                            self._results('2000-01-03', [3., 5., 6.])]
+
+        self._data(date(2000, 1, 4), operations=[CumSum('foo'), CumMean('foo')])
+        result = self._data(date(2000, 1, 5), operations=[CumSum('foo'), CumMean('foo')])
+
+        self.assertListEqual([1., 3., 6., 11., 17.], list(result['foo_cumsum']))
+        self.assertListEqual([1., 1.5, 2., 2.75, 3.4], list(result['foo_cummean']))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_modifying_result_does_not_change_kept_rows(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.side_effect = [self._results('2000-01-01', [1., 2., 3., 4.]),
+                                            self._results('2000-01-03', [30., 40., 50.])]
+
+        result = self._data(date(2000, 1, 4))
+        result['foo'] = 0.
+        result = self._data(date(2000, 1, 5))
+
+        self.assertListEqual([1., 2., 3., 40., 50.], list(result['foo']))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_categories_are_unioned_when_rows_are_spliced(self, mock_fetch_dataframe):
+        kept, refreshed = self._results('2000-01-01', [1., 2., 3., 4.]), self._results('2000-01-03', [30., 40., 50.])
+        kept['cat'] = pd.Categorical(kept['cat'])
+        refreshed['cat'] = pd.Categorical(['a', 'b', 'b'])
+        mock_fetch_dataframe.side_effect = [kept, refreshed]
+
+        self._data(date(2000, 1, 4))
+        result = self._data(date(2000, 1, 5))
+
+        categories = result.index.get_level_values('cat')
+        self.assertEqual('category', str(categories.dtype))
+        self.assertListEqual(['a', 'a', 'a', 'b', 'b'], list(categories))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_earlier_stop_is_queried_completely(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.side_effect = [self._results('2000-01-01', [1., 2., 3., 4.]),
+                                            self._results('2000-01-01', [1., 2., 3.])]
+
+        self._data(date(2000, 1, 4))
+        result = self._data(date(2000, 1, 3))
+
+        self.assertIn("'2000-01-01", mock_fetch_dataframe.call_args[0][0])
+        self.assertListEqual([1., 2., 3.], list(result['foo']))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_requests_with_totals_are_queried_completely(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = self._results('2000-01-01', [1., 2., 3., 4.])
+
+        self._data(date(2000, 1, 4), operations=[Totals('cat')])
+        self._data(date(2000, 1, 5), operations=[Totals('cat')])
+
+        self.assertEqual(0, len(self.slicer.manager._incremental_memo))
+        self.assertIn("'2000-01-01", mock_fetch_dataframe.call_args[0][0])
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.test_table = Table('test')
+        self.test_database = TestDatabase()
+        self.slicer = Slicer(
+            self.test_table,
+            self.test_database,
+            metrics=[Metric('foo'), Metric('bar')],
+            dimensions=[CategoricalDimension('cat')],
+        )
+
+    def tearDown(self):
+        self.test_database.close()
+
+    def test_pagination_schema(self):
+        query_schema = self.slicer.manager.data_query_schema(metrics=['foo'], dimensions=['cat'],
+                                                             pagination=Paginator(offset=10, limit=5,
+                                                                                  order=[('foo', Order.desc), 'cat']))
+
+        self.assertDictEqual({'offset': 10, 'limit': 5, 'orderby': [('foo', Order.desc), ('cat', Order.asc)]},
+                             query_schema['pagination'])
+
+    def test_no_pagination_schema(self):
+        query_schema = self.slicer.manager.data_query_schema(metrics=['foo'], dimensions=['cat'])
+
+        self.assertIsNone(query_schema['pagination'])
+
+    def test_order_by_element_not_in_request_raises_exception(self):
+        with self.assertRaises(SlicerException):
+            self.slicer.manager.data_query_schema(metrics=['foo'], dimensions=['cat'],
+                                                  pagination=Paginator(order=[('bar', Order.desc)]))
+
+    def test_post_processed_operations_raise_exception(self):
+        with self.assertRaises(SlicerException):
+            self.slicer.manager.data_query_schema(metrics=['foo'], dimensions=['cat'], operations=[CumSum('foo')],
+                                                  pagination=Paginator(limit=5))
+
+    def test_operations_computed_with_window_functions(self):
+        self.test_database.supports_window_functions = True
+        self.slicer.pushdown_operations = True
+
+        query_schema = self.slicer.manager.data_query_schema(metrics=['foo'], dimensions=['cat'],
+                                                             operations=[CumSum('foo')],
+                                                             pagination=Paginator(limit=5))
+
+        self.assertIn('foo_cumsum', query_schema['metrics'])
+        self.assertDictEqual({'offset': 0, 'limit': 5, 'orderby': []}, query_schema['pagination'])
+
+    def test_operations_without_window_functions_raise_exception(self):
+        self.test_database.supports_window_functions = True
+        self.slicer.pushdown_operations = True
+
+        with self.assertRaises(SlicerException):
+            self.slicer.manager.data_query_schema(metrics=['foo', 'bar'], dimensions=['cat'],
+                                                  operations=[L1Loss('foo', 'bar')],
+                                                  pagination=Paginator(limit=5))
+
+    @patch.object(TestDatabase, 'fetch_dataframe')
+    def test_data_count(self, mock_fetch_dataframe):
+        mock_fetch_dataframe.return_value = pd.DataFrame([[1000000]], columns=['count'])
+
+        count = self.slicer.manager.data_count(metrics=['foo'], dimensions=['cat'])
+
+        self.assertEqual(1000000, count)
+        self.assertEqual('SELECT COUNT(*) "count" FROM ('
+                         'SELECT COALESCE("cat",\'None\') "cat" FROM "test" GROUP BY COALESCE("cat",\'None\')'
+                         ') "rows"', mock_fetch_dataframe.call_args[0][0])
+
+    @patch.object(SlicerManager, 'data_count')
+    @patch.object(SlicerManager, 'data')
+    def test_datatables_page_includes_total(self, mock_data, mock_data_count):
+        mock_data.return_value = pd.DataFrame({'cat': ['a', 'b'], 'foo': [2, 1]}).set_index('cat')
+        mock_data_count.return_value = 1000000
+        pagination = Paginator(offset=0, limit=2, order=[('foo', Order.desc)])
+
+        result = self.slicer.datatables.row_index_table(metrics=['foo'], dimensions=['cat'], pagination=pagination)
+
+        self.assertEqual(1000000, result['recordsTotal'])
+        self.assertEqual(1000000, result['recordsFiltered'])
+        self.assertEqual(2, len(result['data']))
+        self.assertEqual(pagination, mock_data.call_args[1]['pagination'])
+        self.assertNotIn('pagination', mock_data_count.call_args[1])
+
+    @patch.object(SlicerManager, 'data_count')
+    @patch.object(SlicerManager, 'data')
+    def test_no_count_without_pagination(self, mock_data, mock_data_count):
+        mock_data.return_value = pd.DataFrame({'cat': ['a', 'b'], 'foo': [2, 1]}).set_index('cat')
+
+        result = self.slicer.datatables.row_index_table(metrics=['foo'], dimensions=['cat'])
+
+        self.assertNotIn('recordsTotal', result)
+        mock_data_count.assert_not_called()
+
+
+class AggregateTableTests(TestCase):
+    def setUp(self):
+        self.test_table, self.daily_table, self.weekly_table, self.accounts_table = Tables('test', 'test_daily',
+                                                                                           'test_weekly', 'accounts')
+        self.slicer = Slicer(
+            self.test_table,
+            TestDatabase(),
+            metrics=[Metric('clicks'), Metric('cost'), Metric('visitors')],
+            dimensions=[
+                DatetimeDimension('date', definition=self.test_table.dt),
+                CategoricalDimension('device', definition=self.test_table.device),
+                UniqueDimension('account', definition=self.test_table.account_id,
+                                display_field=self.accounts_table.name, joins=['accounts']),
+            ],
+            joins=[Join('accounts', self.accounts_table, self.test_table.account_id == self.accounts_table.id)],
+            aggregate_tables=[
+                AggregateTable(self.daily_table, metrics=['clicks', 'cost'], dimensions=['date', 'device', 'account'],
+                               intervals={'date': [DatetimeDimension.day, DatetimeDimension.week]}, rows=1000),
+                AggregateTable(self.weekly_table, metrics=['clicks'], dimensions=['date'],
+                               intervals={'date': [DatetimeDimension.week]}, rows=10),
+            ]
+        )
+
+    def _table(self, **kwargs):
+        return self.slicer.manager.data_query_schema(**kwargs)['table']
+
+    def test_route_to_smallest_table(self):
+        self.assertIs(self.weekly_table, self._table(metrics=['clicks'],
+                                                     dimensions=[('date', DatetimeDimension.week)]))
+
+    def test_route_to_table_with_interval(self):
+        self.assertIs(self.daily_table, self._table(metrics=['clicks'], dimensions=['date']))
+
+    def test_route_to_table_with_metrics(self):
+        self.assertIs(self.daily_table, self._table(metrics=['clicks', 'cost'],
+                                                    dimensions=[('date', DatetimeDimension.week)]))
+
+    def test_route_to_table_with_filtered_dimension(self):
+        self.assertIs(self.daily_table, self._table(metrics=['clicks'], dimensions=[('date', DatetimeDimension.week)],
+                                                    dimension_filters=[EqualityFilter('device', EqualityOperator.eq,
+                                                                                      'mobile')]))
+
+    def test_fall_back_to_base_table_for_metric(self):
+        self.assertIs(self.test_table, self._table(metrics=['visitors'], dimensions=['date']))
+
+    def test_fall_back_to_base_table_for_interval(self):
+        self.assertIs(self.test_table, self._table(metrics=['clicks'], dimensions=[('date', DatetimeDimension.hour)]))
+
+    def test_fall_back_to_base_table_for_metric_filter(self):
+        self.assertIs(self.test_table, self._table(metrics=['clicks'], dimensions=['date'],
+                                                   metric_filters=[EqualityFilter('visitors', EqualityOperator.gt,
+                                                                                  10)]))
+
+    def test_fall_back_to_base_table_for_operation_metric(self):
+        self.assertIs(self.test_table, self._table(metrics=['clicks'], dimensions=['date'],
+                                                   operations=[L1Loss('clicks', 'visitors')]))
+
+    def test_fields_of_joined_tables_are_not_replaced(self):
+        query_schema = self.slicer.manager.data_query_schema(metrics=['clicks'], dimensions=['account'])
+        del query_schema['database']
+        del query_schema['dtypes']
+
+        self.assertEqual('SELECT '
+                         '"test_daily"."account_id" "account","accounts"."name" "account_display",'
+                         'SUM("test_daily"."clicks") "clicks" '
+                         'FROM "test_daily" '
+                         'JOIN "accounts" ON "test_daily"."account_id"="accounts"."id" '
+                         'GROUP BY "test_daily"."account_id","accounts"."name" '
+                         'ORDER BY "test_daily"."account_id","accounts"."name"',
+                         self.slicer.manager._data_querystring(**query_schema))
+
+    def test_slicer_definitions_are_not_changed(self):
+        self.slicer.manager.data_query_schema(metrics=['clicks'], dimensions=['account'])
+
+        self.assertEqual('test', self.slicer.dimensions['account'].definition.table.table_name)
@@ -0,0 +1,262 @@
+# coding: utf-8
+import threading
+from unittest import TestCase
+
+from mock import patch
+
+from fireant.slicer import *
+from fireant.slicer.managers import SlicerManager
+from fireant.slicer.options import ColumnIndex, OptionsCache, OptionsIndex, like_regex
+from fireant.tests.database.mock_database import TestDatabase
+from pypika import Table
+
+NAMES = [u'Zebra', u'apple', u'Apple Pie', u'banana', None, u'apricot', u'pineapple', u'grape', u'Apple']
+
+
+class LikeRegexTests(TestCase):
+    def test_wildcards(self):
+        self.assertTrue(like_regex('a%e').match('apple'))
+        self.assertTrue(like_regex('gr_pe').match('grape'))
+        self.assertFalse(like_regex('gr_pe').match('grappe'))
+
+    def test_special_characters_are_literals(self):
+        self.assertTrue(like_regex('a.b%').match('a.bc'))
+        self.assertFalse(like_regex('a.b%').match('axbc'))
+
+
+class ColumnIndexTests(TestCase):
+    def setUp(self):
+        self.index = ColumnIndex(NAMES)
+
+    def _like(self, pattern):
+        return [NAMES[position] for position in self.index.like(pattern)]
+
+    def test_prefix(self):
+        self.assertListEqual([u'apple', u'apricot'], self._like(u'ap%'))
+
+    def test_prefix_is_case_sensitive(self):
+        self.assertListEqual([u'Apple', u'Apple Pie'], self._like(u'Apple%'))
+
+    def test_substring(self):
+        self.assertListEqual([u'Apple', u'Apple Pie', u'apple', u'pineapple'], self._like(u'%pple%'))
+
+    def test_suffix(self):
+        self.assertListEqual([u'apple', u'pineapple'], self._like(u'%apple'))
+
+    def test_single_character_wildcard(self):
+        self.assertListEqual([u'grape'], self._like(u'gr_pe'))
+
+    def test_only_wildcards(self):
+        self.assertListEqual(sorted(name for name in NAMES if name), self._like(u'%'))
+
+    def test_exact(self):
+        self.assertListEqual([u'banana'], self._like(u'banana'))
+
+    def test_no_match(self):
+        self.assertListEqual([], self._like(u'%kiwi%'))
+
+    def test_equal(self):
+        self.assertListEqual([1, 3], self.index.equal([u'banana', u'apple', u'kiwi']))
+
+    def test_case_insensitive(self):
+        index = ColumnIndex(NAMES, case_sensitive=False)
+
+        self.assertListEqual([u'apple', u'Apple', u'Apple Pie', u'apricot'],
+                             [NAMES[position] for position in index.like(u'aP%')])
+        self.assertListEqual([u'apple', u'Apple'], [NAMES[position] for position in index.like(u'APPLE')])
+        self.assertListEqual([u'apple', u'Apple', u'Apple Pie', u'pineapple'],
+                             [NAMES[position] for position in index.like(u'%PPL%')])
+        # Equal values are still matched case-sensitively
+        self.assertListEqual([1], index.equal([u'apple']))
+
+    def test_non_string_values_are_not_searchable(self):
+        self.assertTrue(self.index.searchable)
+        self.assertFalse(ColumnIndex([1, 2, None]).searchable)
+
+
+class OptionsIndexTests(TestCase):
+    def setUp(self):
+        self.options = [{'account': i, 'account_display': name}
+                        for i, name in enumerate(NAMES)]
+        self.index = OptionsIndex(self.options, ['account', 'account_display'])
+
+    def test_search_without_filters(self):
+        self.assertListEqual(self.options[:3], self.index.search([], limit=3))
+
+    def test_search_with_limit(self):
+        result = self.index.search([('account_display', WildcardFilter('account', u'%pp%'))], limit=2)
+
+        self.assertListEqual([u'Apple', u'Apple Pie'], [option['account_display'] for option in result])
+
+    def test_search_with_several_filters(self):
+        result = self.index.search([('account_display', WildcardFilter('account', u'%pp%')),
+                                    ('account', ContainsFilter('account', [1, 2, 3]))])
+
+        self.assertListEqual([1, 2], [option['account'] for option in result])
+
+    def test_can_search(self):
+        self.assertTrue(self.index.can_search([('account', EqualityFilter('account', EqualityOperator.eq, 1))]))
+        self.assertTrue(self.index.can_search([('account_display', WildcardFilter('account', u'a%'))]))
+        self.assertFalse(self.index.can_search([('account', WildcardFilter('account', u'1%'))]))
+        self.assertFalse(self.index.can_search([('account', EqualityFilter('account', EqualityOperator.gt, 1))]))
+        self.assertFalse(self.index.can_search([('account', RangeFilter('account', 1, 2))]))
+
+    def test_patterns_with_escapes_are_not_searched(self):
+        self.assertFalse(self.index.can_search([('account_display', WildcardFilter('account', u'100\\%%'))]))
+
+
+class OptionsCacheTests(TestCase):
+    @patch('fireant.slicer.options.time.time')
+    def test_options_are_loaded_again_after_ttl(self, mock_time):
+        cache = OptionsCache()
+        mock_time.return_value = 100
+
+        self.assertEqual(1, cache.get('account', 60, lambda: 1))
+        self.assertEqual(1, cache.get('account', 60, lambda: 2))
+
+        mock_time.return_value = 160
+        self.assertEqual(3, cache.get('account', 60, lambda: 3))
+
+    def test_clear(self):
+        cache = OptionsCache()
+        cache.get('account', 60, lambda: 1)
+        cache.clear()
+
+        self.assertEqual(2, cache.get('account', 60, lambda: 2))
+
+    def test_loading_does_not_block_other_keys(self):
+        cache = OptionsCache()
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load():
+            loading.set()
+            release.wait(5)
+            return 1
+
+        thread = threading.Thread(target=cache.get, args=('account', 60, slow_load))
+        thread.start()
+        loading.wait(5)
+
+        try:
+            self.assertEqual(2, cache.get('device', 60, lambda: 2))
+        finally:
+            release.set()
+            thread.join()
+
+    def test_concurrent_requests_load_once(self):
+        cache = OptionsCache()
+        loading, release = threading.Event(), threading.Event()
+        calls, results = [], []
+
+        def slow_load():
+            calls.append(1)
+            loading.set()
+            release.wait(5)
+            return 1
+
+        threads = [threading.Thread(target=lambda: results.append(cache.get('account', 60, slow_load)))
+                   for _ in range(3)]
+        threads[0].start()
+        loading.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(calls))
+        self.assertListEqual([1, 1, 1], results)
+
+    def test_failed_load_is_retried(self):
+        cache = OptionsCache()
+
+        def failing_load():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            cache.get('account', 60, failing_load)
+
+        self.assertEqual(1, cache.get('account', 60, lambda: 1))
+
+
+class ManagerDimensionOptionsTests(TestCase):
+    def setUp(self):
+        self.test_table = Table('test')
+        self.slicer = Slicer(
+            self.test_table,
+            TestDatabase(),
+            metrics=[Metric('clicks')],
+            dimensions=[
+                UniqueDimension('account', definition=self.test_table.account_id,
+                                display_field=self.test_table.account_name),
+                CategoricalDimension('device'),
+                DatetimeDimension('date'),
+            ],
+            dimension_options_ttl=60,
+        )
+        self.options = [{'account': i, 'account_display': name}
+                        for i, name in enumerate(NAMES)]
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_options_are_searched_in_memory(self, mock_query):
+        mock_query.return_value = self.options
+
+        first = self.slicer.manager.dimension_options('account', [WildcardFilter(('account', 'display'), u'ap%')])
+        second = self.slicer.manager.dimension_options('account', [WildcardFilter(('account', 'display'), u'%ine%')],
+                                                       limit=1)
+
+        self.assertListEqual([1, 5], [option['account'] for option in first])
+        self.assertListEqual([6], [option['account'] for option in second])
+        mock_query.assert_called_once()
+        self.assertListEqual([], mock_query.call_args[1]['filters'])
+        self.assertIsNone(mock_query.call_args[1]['limit'])
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_case_insensitive_database(self, mock_query):
+        mock_query.return_value = self.options
+        self.slicer.database.case_sensitive_like = False
+
+        result = self.slicer.manager.dimension_options('account', [WildcardFilter(('account', 'display'), u'AP%')])
+
+        self.assertListEqual([1, 8, 2, 5], [option['account'] for option in result])
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_filters_on_other_dimensions_are_queried(self, mock_query):
+        self.slicer.manager.dimension_options('account', [ContainsFilter('device', ['mobile'])])
+
+        self.assertEqual(1, len(mock_query.call_args[1]['filters']))
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_unsupported_filters_are_queried(self, mock_query):
+        mock_query.return_value = self.options
+
+        self.slicer.manager.dimension_options('account', [EqualityFilter('account', EqualityOperator.gt, 3)])
+
+        self.assertEqual(2, mock_query.call_count)
+        self.assertEqual(1, len(mock_query.call_args[1]['filters']))
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_datetime_dimensions_are_queried(self, mock_query):
+        self.slicer.manager.dimension_options('date', [])
+        self.slicer.manager.dimension_options('date', [])
+
+        self.assertEqual(2, mock_query.call_count)
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_not_cached_without_ttl(self, mock_query):
+        self.slicer.dimension_options_ttl = None
+
+        self.slicer.manager.dimension_options('account', [])
+        self.slicer.manager.dimension_options('account', [])
+
+        self.assertEqual(2, mock_query.call_count)
+
+    @patch.object(SlicerManager, 'query_dimension_options')
+    def test_invalidate_dimension_options(self, mock_query):
+        mock_query.return_value = self.options
+
+        self.slicer.manager.dimension_options('account', [])
+        self.slicer.manager.invalidate_dimension_options()
+        self.slicer.manager.dimension_options('account', [])
+
+        self.assertEqual(2, mock_query.call_count)
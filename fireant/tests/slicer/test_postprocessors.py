@@ -2,6 +2,7 @@
 from unittest import TestCase
 
 import numpy as np
+import pandas as pd
 
 from fireant.slicer.postprocessors import OperationManager
 from fireant.tests import mock_dataframes as mock_df
@@ -193,3 +194,92 @@ class L2LossOperationTests(L1LossOperationTests, TestCase):
 
     def operation(self, metric_df, target_df):
         return list((metric_df - target_df).pow(2).expanding(min_periods=1).mean())
+
+
+class VectorizedOperationTests(PostProcessingTests, TestCase):
+    """
+    The operations are computed with running sums and counts for all references at once, which must give the same
+    results as an expanding window in each group.
+    """
+    expanding = {
+        'cumsum': lambda x: x.expanding(min_periods=1).sum(),
+        'cummean': lambda x: x.expanding(min_periods=1).mean(),
+        'l1loss': lambda x: x.abs().expanding(min_periods=1).mean(),
+        'l2loss': lambda x: x.pow(2).expanding(min_periods=1).mean(),
+    }
+
+    @classmethod
+    def setUpClass(cls):
+        random = np.random.RandomState(0)
+        index = pd.MultiIndex.from_product([pd.date_range('2000-01-01', periods=20), ['a', 'b', 'c']],
+                                           names=['date', 'cat'])
+        columns = pd.MultiIndex.from_product([['', 'wow'], ['one', 'target']])
+        cls.df = pd.DataFrame(random.normal(size=(len(index), 4)), index=index, columns=columns)
+        cls.df.iloc[::7, 0] = np.nan
+        cls.df.iloc[:4, 2] = np.nan
+
+    def assert_expanding(self, op_key, schema):
+        result_df = self.manager.post_process(self.df, [dict(schema, key=op_key)])
+
+        for reference in ['', 'wow']:
+            values = self.df[reference, 'one']
+            if 'target' in schema:
+                values = self.df[reference, 'target'] - values
+
+            expected = values.groupby(level=1).transform(self.expanding[op_key])
+            np.testing.assert_array_almost_equal(expected.values,
+                                                 result_df[reference, 'one_%s' % op_key].values)
+
+    def test_cumsum(self):
+        self.assert_expanding('cumsum', {'metric': 'one'})
+
+    def test_cummean(self):
+        self.assert_expanding('cummean', {'metric': 'one'})
+
+    def test_l1loss(self):
+        self.assert_expanding('l1loss', {'metric': 'one', 'target': 'target'})
+
+    def test_l2loss(self):
+        self.assert_expanding('l2loss', {'metric': 'one', 'target': 'target'})
+
+    def test_previous_rows_continue_operations(self):
+        splice = pd.Timestamp('2000-01-12')
+        dates = self.df.index.get_level_values(0)
+        previous, df = self.df[dates < splice], self.df[dates >= splice]
+
+        for op_key, schema in [('cumsum', {'metric': 'one'}),
+                               ('cummean', {'metric': 'one'}),
+                               ('l2loss', {'metric': 'one', 'target': 'target'})]:
+            expected_df = self.manager.post_process(self.df, [dict(schema, key=op_key)])
+            result_df = self.manager.post_process(df, [dict(schema, key=op_key)], previous=previous)
+
+            np.testing.assert_array_almost_equal(expected_df[dates >= splice].values, result_df.values)
+
+    def test_leading_nans_single_dim(self):
+        df = pd.DataFrame({'one': [np.nan, 1., np.nan, 3.]})
+
+        result_df = self.manager.post_process(df, [{'key': 'cumsum', 'metric': 'one'}])
+
+        np.testing.assert_array_equal([np.nan, 1., 1., 4.], result_df['one_cumsum'].values)
+
+    def test_no_operations_does_not_copy(self):
+        df = mock_df.time_dim_single_metric_df
+
+        self.assertIs(df, self.manager.post_process(df, []))
+        self.assertIs(df, self.manager.post_process(df, [{'key': 'totals'}]))
+
+    def test_repeated_operation_adds_one_column(self):
+        df = mock_df.time_dim_single_metric_df
+
+        result_df = self.manager.post_process(df, [{'key': 'cumsum', 'metric': 'one'},
+                                                   {'key': 'cumsum', 'metric': 'one'}])
+
+        self.assertListEqual(['one', 'one_cumsum'], list(result_df.columns))
+
+    def test_operations_computed_in_query_are_skipped(self):
+        df = mock_df.time_dim_single_metric_df.copy()
+        df['one_cumsum'] = 0.
+
+        result_df = self.manager.post_process(df, [{'key': 'cumsum', 'metric': 'one'}])
+
+        self.assertIs(df, result_df)
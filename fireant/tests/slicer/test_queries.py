@@ -3,10 +3,13 @@ import unittest
 from collections import OrderedDict
 from datetime import date
 
-from fireant import settings
+import pandas as pd
+from mock import patch
+
+from fireant import settings, utils
 from fireant.slicer.queries import QueryManager
 from fireant.tests.database.mock_database import TestDatabase
-from pypika import Tables, functions as fn, JoinType
+from pypika import Tables, Interval, Order, functions as fn, JoinType
 
 
 class QueryTests(unittest.TestCase):
@@ -712,6 +715,309 @@ class ComparisonTests(QueryTests):
         query = self._get_compare_query('wow_p')
         self.assert_reference_p(query, 'wow')
 
+    def test_multiple_references_are_each_shifted_from_the_original_dimension(self):
+        dt = self.mock_table.dt
+        query = self.manager._build_data_query(
+            table=self.mock_table,
+            joins=[],
+            metrics=OrderedDict([
+                ('clicks', fn.Sum(self.mock_table.clicks)),
+            ]),
+            dimensions=OrderedDict([
+                ('date', settings.database.round_date(dt, 'DD')),
+            ]),
+            mfilters=[],
+            dfilters=[
+                dt[date(2000, 1, 1):date(2000, 3, 1)]
+            ],
+            references=OrderedDict([
+                ('wow', 'date'),
+                ('yoy', 'date'),
+            ]),
+            rollup=[],
+        )
+
+        self.assertEqual(
+            'SELECT '
+            '"sq0"."date" "date","sq0"."clicks" "clicks",'
+            '"sq1"."clicks" "clicks_wow","sq2"."clicks" "clicks_yoy" '
+            'FROM ('
+            'SELECT ROUND("dt",\'DD\') "date",SUM("clicks") "clicks" '
+            'FROM "test_table" '
+            'WHERE "dt" BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+            'GROUP BY ROUND("dt",\'DD\')'
+            ') "sq0" '
+            'LEFT JOIN ('
+            'SELECT ROUND("dt",\'DD\')+INTERVAL \'1 WEEK\' "date",SUM("clicks") "clicks" '
+            'FROM "test_table" '
+            'WHERE "dt"+INTERVAL \'1 WEEK\' BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+            'GROUP BY ROUND("dt",\'DD\')+INTERVAL \'1 WEEK\''
+            ') "sq1" ON "sq0"."date"="sq1"."date" '
+            'LEFT JOIN ('
+            'SELECT ROUND("dt",\'DD\')+INTERVAL \'52 WEEK\' "date",SUM("clicks") "clicks" '
+            'FROM "test_table" '
+            'WHERE "dt"+INTERVAL \'52 WEEK\' BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+            'GROUP BY ROUND("dt",\'DD\')+INTERVAL \'52 WEEK\''
+            ') "sq2" ON "sq0"."date"="sq2"."date" '
+            'ORDER BY "sq0"."date"', str(query)
+        )
+
+
+class ReplaceDimensionForReferenceTests(QueryTests):
+    def setUp(self):
+        self.dt = self.mock_table.dt
+        self.dimensions = OrderedDict([
+            ('date', settings.database.round_date(self.dt, 'DD')),
+            ('device_type', self.mock_table.device_type),
+        ])
+        self.dimension_f = lambda term: term + Interval(weeks=1)
+
+    def test_dimensions_are_not_copied(self):
+        dimensions, _ = self.manager._replace_dim_for_ref([], 'date', self.dimensions, self.dimension_f)
+
+        self.assertEqual('ROUND("dt",\'DD\')+INTERVAL \'1 WEEK\'', str(dimensions['date']))
+        self.assertIs(self.dimensions['device_type'], dimensions['device_type'])
+        self.assertEqual('ROUND("dt",\'DD\')', str(self.dimensions['date']))
+
+    def test_filters_are_matched_by_equal_field(self):
+        # A different instance of the same field than the one used in the dimension
+        dfilter = self.mock_table.dt[date(2000, 1, 1):date(2000, 3, 1)]
+
+        _, dfilters = self.manager._replace_dim_for_ref([dfilter], 'date', self.dimensions, self.dimension_f)
+
+        self.assertEqual('"dt"+INTERVAL \'1 WEEK\' BETWEEN \'2000-01-01\' AND \'2000-03-01\'', str(dfilters[0]))
+        self.assertEqual('"dt" BETWEEN \'2000-01-01\' AND \'2000-03-01\'', str(dfilter))
+
+    def test_other_filters_are_not_copied(self):
+        dfilter = self.mock_table.device_type.isin(['desktop'])
+
+        _, dfilters = self.manager._replace_dim_for_ref([dfilter], 'date', self.dimensions, self.dimension_f)
+
+        self.assertIs(dfilter, dfilters[0])
+
+    def test_comparison_filter(self):
+        dfilter = self.dt > date(2000, 1, 1)
+
+        _, dfilters = self.manager._replace_dim_for_ref([dfilter], 'date', self.dimensions, self.dimension_f)
+
+        self.assertEqual('"dt"+INTERVAL \'1 WEEK\'>\'2000-01-01\'', str(dfilters[0]))
+
+    def test_combined_filter(self):
+        device_filter = self.mock_table.device_type == 'desktop'
+        dfilter = self.dt[date(2000, 1, 1):date(2000, 3, 1)] & device_filter
+
+        _, dfilters = self.manager._replace_dim_for_ref([dfilter], 'date', self.dimensions, self.dimension_f)
+
+        self.assertEqual('"dt"+INTERVAL \'1 WEEK\' BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+                         'AND "device_type"=\'desktop\'', str(dfilters[0]))
+        self.assertIs(device_filter, dfilters[0].right)
+
+
+class TermsEqualTests(unittest.TestCase):
+    table, other_table = Tables('test_table', 'other_table')
+
+    def test_equal_fields(self):
+        self.assertTrue(utils.terms_equal(self.table.dt, self.table.dt))
+        self.assertTrue(utils.terms_equal(self.table.dt, self.table.dt.as_('date')))
+
+    def test_different_fields(self):
+        self.assertFalse(utils.terms_equal(self.table.dt, self.table.other))
+        self.assertFalse(utils.terms_equal(self.table.dt, self.other_table.dt))
+
+    def test_expressions(self):
+        self.assertTrue(utils.terms_equal(fn.Sum(self.table.clicks) / 2, fn.Sum(self.table.clicks) / 2))
+        self.assertFalse(utils.terms_equal(fn.Sum(self.table.clicks) / 2, fn.Sum(self.table.clicks) / 3))
+        self.assertFalse(utils.terms_equal(fn.Sum(self.table.clicks), fn.Avg(self.table.clicks)))
+
+
+class TermsKeyTests(unittest.TestCase):
+    table, other_table = Tables('test_table', 'other_table')
+
+    def test_equal_terms_have_equal_keys(self):
+        self.assertEqual(utils.terms_key(fn.Sum(self.table.clicks) / 2), utils.terms_key(fn.Sum(self.table.clicks) / 2))
+        self.assertEqual(utils.terms_key(self.table.dt), utils.terms_key(self.table.dt.as_('date')))
+
+    def test_different_terms_have_different_keys(self):
+        self.assertNotEqual(utils.terms_key(self.table.dt), utils.terms_key(self.other_table.dt))
+        self.assertNotEqual(utils.terms_key(fn.Sum(self.table.clicks) / 2),
+                            utils.terms_key(fn.Sum(self.table.clicks) / 3))
+
+    def test_keys_are_hashable(self):
+        criterion = (self.table.dt == self.other_table.dt) & (self.table.clicks > 1)
+
+        self.assertEqual(hash(utils.terms_key(criterion)), hash(utils.terms_key(criterion)))
+
+
+class ParallelReferenceTests(QueryTests):
+    metrics = OrderedDict([
+        ('clicks', fn.Sum(QueryTests.mock_table.clicks)),
+        ('cost', fn.Sum(QueryTests.mock_table.cost)),
+    ])
+
+    def setUp(self):
+        self.manager = QueryManager()
+        self.manager.parallel_references = True
+        self.dt = self.mock_table.dt
+        self.dimensions = OrderedDict([
+            ('date', settings.database.round_date(self.dt, 'DD')),
+            ('device_type', self.mock_table.device_type),
+        ])
+
+    def _results(self, dates, device_types, clicks, cost):
+        return pd.DataFrame(OrderedDict([
+            ('date', pd.to_datetime(dates)),
+            ('device_type', device_types),
+            ('clicks', clicks),
+            ('cost', cost),
+        ]))
+
+    def test_querystrings_contain_base_query_and_one_query_per_reference(self):
+        querystrings = self.manager._data_querystrings(
+            table=self.mock_table,
+            metrics=self.metrics,
+            dimensions=self.dimensions,
+            dfilters=[self.dt[date(2000, 1, 1):date(2000, 3, 1)]],
+            references=OrderedDict([('wow', 'date'), ('yoy_d', 'date')]),
+        )
+
+        self.assertListEqual([
+            'SELECT ROUND("dt",\'DD\') "date","device_type" "device_type",'
+            'SUM("clicks") "clicks",SUM("cost") "cost" '
+            'FROM "test_table" '
+            'WHERE "dt" BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+            'GROUP BY ROUND("dt",\'DD\'),"device_type" '
+            'ORDER BY ROUND("dt",\'DD\'),"device_type"',
+
+            'SELECT ROUND("dt",\'DD\')+INTERVAL \'1 WEEK\' "date","device_type" "device_type",'
+            'SUM("clicks") "clicks",SUM("cost") "cost" '
+            'FROM "test_table" '
+            'WHERE "dt"+INTERVAL \'1 WEEK\' BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+            'GROUP BY ROUND("dt",\'DD\')+INTERVAL \'1 WEEK\',"device_type"',
+
+            'SELECT ROUND("dt",\'DD\')+INTERVAL \'52 WEEK\' "date","device_type" "device_type",'
+            'SUM("clicks") "clicks",SUM("cost") "cost" '
+            'FROM "test_table" '
+            'WHERE "dt"+INTERVAL \'52 WEEK\' BETWEEN \'2000-01-01\' AND \'2000-03-01\' '
+            'GROUP BY ROUND("dt",\'DD\')+INTERVAL \'52 WEEK\',"device_type"',
+        ], querystrings)
+
+    def test_querystrings_without_parallel_references_is_single_query(self):
+        self.manager.parallel_references = False
+
+        querystrings = self.manager._data_querystrings(
+            table=self.mock_table,
+            metrics=self.metrics,
+            dimensions=self.dimensions,
+            references=OrderedDict([('wow', 'date')]),
+        )
+
+        self.assertEqual(1, len(querystrings))
+        self.assertIn('LEFT JOIN', querystrings[0])
+
+    def test_join_references(self):
+        base = self._results(['2000-01-08', '2000-01-08', '2000-01-15'], ['desktop', 'mobile', 'desktop'],
+                             [10, 20, 30], [1.0, 2.0, 3.0])
+        # The reference results have the dimension shifted onto the dates of the base results
+        wow = self._results(['2000-01-15', '2000-01-08', '2000-01-01'], ['desktop', 'desktop', 'desktop'],
+                            [15, 5, 1], [0.0, 2.0, 4.0])
+
+        result = self.manager._join_references([base, wow.copy(), wow.copy(), wow.copy()], self.metrics,
+                                               self.dimensions,
+                                               OrderedDict([('wow', 'date'), ('wow_d', 'date'), ('wow_p', 'date')]))
+
+        self.assertListEqual(['date', 'device_type'], list(result.index.names))
+        self.assertListEqual([('', 'clicks'), ('', 'cost'),
+                              ('wow', 'clicks'), ('wow', 'cost'),
+                              ('wow_d', 'clicks'), ('wow_d', 'cost'),
+                              ('wow_p', 'clicks'), ('wow_p', 'cost')], list(result.columns))
+
+        self.assertListEqual([10, 20, 30], list(result[('', 'clicks')]))
+        self.assertListEqual([5, 15], list(result[('wow', 'clicks')][[0, 2]]))
+        self.assertListEqual([5, 15], list(result[('wow_d', 'clicks')][[0, 2]]))
+        self.assertListEqual([1.0, 1.0], list(result[('wow_p', 'clicks')][[0, 2]]))
+
+        # Rows without a matching reference row are null, as in a left join
+        self.assertTrue(result[('wow', 'clicks')].isnull()[1])
+        self.assertTrue(result[('wow_d', 'clicks')].isnull()[1])
+
+        # Division by zero in the percentage is null, as with NULLIF in SQL
+        self.assertListEqual([-0.5], list(result[('wow_p', 'cost')][[0]]))
+        self.assertTrue(result[('wow_p', 'cost')].isnull()[2])
+
+    def test_join_references_does_not_match_null_dimensions(self):
+        base = self._results(['2000-01-08', '2000-01-08'], ['desktop', None], [10, 30], [1.0, 3.0])
+        wow = self._results(['2000-01-08', '2000-01-08'], ['desktop', None], [5, 25], [1.0, 2.0])
+
+        result = self.manager._join_references([base, wow], self.metrics, self.dimensions,
+                                               OrderedDict([('wow', 'date')]))
+
+        self.assertListEqual([5], list(result[('wow', 'clicks')].dropna()))
+
+    def test_query_data_fetches_reference_queries_in_parallel(self):
+        database = TestDatabase()
+        base = self._results(['2000-01-08'], ['desktop'], [10], [1.0])
+        wow = self._results(['2000-01-08'], ['desktop'], [5], [2.0])
+
+        # The queries are executed in separate threads so the results are returned by query instead of call order
+        def fetch_dataframe(querystring):
+            return wow.copy() if 'INTERVAL' in querystring else base.copy()
+
+        with patch.object(database, 'fetch_dataframe', side_effect=fetch_dataframe) as mock_fetch:
+            result = self.manager.query_data(database, self.mock_table, metrics=self.metrics,
+                                             dimensions=self.dimensions, references=OrderedDict([('wow', 'date')]))
+
+        self.assertEqual(2, mock_fetch.call_count)
+        self.assertListEqual([10, 5], list(result.iloc[0][[('', 'clicks'), ('wow', 'clicks')]]))
+        database.close()
+
+
+class WindowMetricsTests(QueryTests):
+    def _dimensions(self):
+        return OrderedDict([
+            ('date', settings.database.round_date(self.mock_table.dt, 'DD')),
+            ('locale', self.mock_table.locale),
+            ('account', self.mock_table.account_id),
+        ])
+
+    def test_cumulative_operations_are_window_functions(self):
+        metrics = OrderedDict([('foo', fn.Sum(self.mock_table.foo)), ('bar', fn.Sum(self.mock_table.bar))])
+        dimensions = self._dimensions()
+
+        windows = self.manager._window_metrics(metrics, dimensions, [{'key': 'cumsum', 'metric': 'foo'},
+                                                                     {'key': 'cummean', 'metric': 'bar'}])
+        metrics.update(windows)
+        query = self.manager._build_data_query(self.mock_table, [], metrics, dimensions, [], [], {}, [])
+
+        self.assertListEqual(['foo_cumsum', 'bar_cummean'], list(windows.keys()))
+        self.assertEqual('SELECT '
+                         'ROUND("dt",\'DD\') "date","locale" "locale","account_id" "account",'
+                         'SUM("foo") "foo",SUM("bar") "bar",'
+                         'SUM(SUM("foo")) OVER (PARTITION BY "locale","account_id" ORDER BY ROUND("dt",\'DD\') '
+                         'ROWS UNBOUNDED PRECEDING) "foo_cumsum",'
+                         'AVG(SUM("bar")) OVER (PARTITION BY "locale","account_id" ORDER BY ROUND("dt",\'DD\') '
+                         'ROWS UNBOUNDED PRECEDING) "bar_cummean" '
+                         'FROM "test_table" '
+                         'GROUP BY ROUND("dt",\'DD\'),"locale","account_id" '
+                         'ORDER BY ROUND("dt",\'DD\'),"locale","account_id"', str(query))
+
+    def test_single_dimension_is_not_partitioned(self):
+        metrics = OrderedDict([('foo', fn.Sum(self.mock_table.foo))])
+        dimensions = OrderedDict([('locale', self.mock_table.locale)])
+
+        windows = self.manager._window_metrics(metrics, dimensions, [{'key': 'cumsum', 'metric': 'foo'}])
+
+        self.assertEqual('SUM(SUM("foo")) OVER (ORDER BY "locale" ROWS UNBOUNDED PRECEDING)',
+                         windows['foo_cumsum'].get_sql())
+
+    def test_other_operations_are_not_window_functions(self):
+        metrics = OrderedDict([('foo', fn.Sum(self.mock_table.foo)), ('bar', fn.Sum(self.mock_table.bar))])
+
+        windows = self.manager._window_metrics(metrics, self._dimensions(),
+                                               [{'key': 'l1loss', 'metric': 'foo', 'target': 'bar'},
+                                                {'key': 'totals'}])
+
+        self.assertDictEqual({}, windows)
+
 
 class TotalsQueryTests(QueryTests):
     def test_add_rollup_one_dimension(self):
@@ -806,6 +1112,101 @@ class TotalsQueryTests(QueryTests):
                          'ORDER BY ROUND("dt",\'DD\'),"locale","device_type"', str(query))
 
 
+class PaginationQueryTests(QueryTests):
+    def setUp(self):
+        self.metrics = OrderedDict([('clicks', fn.Sum(self.mock_table.clicks))])
+        self.dimensions = OrderedDict([
+            ('date', settings.database.round_date(self.mock_table.dt, 'DD')),
+            ('locale', self.mock_table.locale),
+        ])
+
+    def test_page_ordered_by_metric(self):
+        querystring = self.manager._data_querystring(self.mock_table, metrics=self.metrics, dimensions=self.dimensions,
+                                                     pagination={'offset': 20, 'limit': 10,
+                                                                 'orderby': [('clicks', Order.desc)]})
+
+        self.assertEqual('SELECT '
+                         'ROUND("dt",\'DD\') "date","locale" "locale",'
+                         'SUM("clicks") "clicks" '
+                         'FROM "test_table" '
+                         'GROUP BY ROUND("dt",\'DD\'),"locale" '
+                         'ORDER BY SUM("clicks") DESC,ROUND("dt",\'DD\'),"locale" '
+                         'LIMIT 10 OFFSET 20', querystring)
+
+    def test_page_ordered_by_dimensions(self):
+        querystring = self.manager._data_querystring(self.mock_table, metrics=self.metrics, dimensions=self.dimensions,
+                                                     pagination={'offset': 0, 'limit': 10, 'orderby': []})
+
+        self.assertEqual('SELECT '
+                         'ROUND("dt",\'DD\') "date","locale" "locale",'
+                         'SUM("clicks") "clicks" '
+                         'FROM "test_table" '
+                         'GROUP BY ROUND("dt",\'DD\'),"locale" '
+                         'ORDER BY ROUND("dt",\'DD\'),"locale" '
+                         'LIMIT 10', querystring)
+
+    def test_offset_without_limit(self):
+        querystring = self.manager._data_querystring(self.mock_table, metrics=self.metrics, dimensions=self.dimensions,
+                                                     pagination={'offset': 20, 'limit': None, 'orderby': []})
+
+        self.assertTrue(querystring.endswith('ORDER BY ROUND("dt",\'DD\'),"locale" OFFSET 20'))
+
+    def test_offset_without_limit_uses_unbounded_limit(self):
+        self.manager.unbounded_limit = -1
+        querystring = self.manager._data_querystring(self.mock_table, metrics=self.metrics, dimensions=self.dimensions,
+                                                     pagination={'offset': 20, 'limit': None, 'orderby': []})
+
+        self.assertTrue(querystring.endswith('ORDER BY ROUND("dt",\'DD\'),"locale" LIMIT -1 OFFSET 20'))
+
+    def test_page_with_references_is_ordered_by_the_selected_metric(self):
+        querystring = self.manager._data_querystring(self.mock_table, metrics=self.metrics, dimensions=self.dimensions,
+                                                     references=OrderedDict([('wow', 'date')]),
+                                                     pagination={'offset': 0, 'limit': 10,
+                                                                 'orderby': [('clicks', Order.desc)]})
+
+        self.assertTrue(querystring.endswith(' ORDER BY "clicks" DESC,"sq0"."date","sq0"."locale" LIMIT 10'))
+
+    def test_count_query_selects_only_dimensions(self):
+        querystring = self.manager._count_querystring(self.mock_table, metrics=self.metrics,
+                                                      dimensions=self.dimensions)
+
+        self.assertEqual('SELECT COUNT(*) "count" FROM ('
+                         'SELECT ROUND("dt",\'DD\') "date","locale" "locale" '
+                         'FROM "test_table" '
+                         'GROUP BY ROUND("dt",\'DD\'),"locale"'
+                         ') "rows"', querystring)
+
+    def test_count_query_without_dimensions_selects_metrics(self):
+        querystring = self.manager._count_querystring(self.mock_table, metrics=self.metrics)
+
+        self.assertEqual('SELECT COUNT(*) "count" FROM (SELECT SUM("clicks") "clicks" FROM "test_table") "rows"',
+                         querystring)
+
+    def test_query_count(self):
+        database = TestDatabase()
+
+        with patch.object(database, 'fetch_dataframe', return_value=pd.DataFrame([[42]])) as mock_fetch:
+            count = self.manager.query_count(database, self.mock_table, metrics=self.metrics,
+                                             dimensions=self.dimensions)
+
+        self.assertEqual(42, count)
+        self.assertTrue(mock_fetch.call_args[0][0].startswith('SELECT COUNT(*)'))
+
+    def test_page_ordered_by_metric_keeps_query_order(self):
+        database = TestDatabase()
+        dataframe = pd.DataFrame({'date': pd.to_datetime(['2000-01-03', '2000-01-02', '2000-01-01']),
+                                  'locale': ['de', 'en', 'de'],
+                                  'clicks': [30, 20, 10]})
+
+        with patch.object(database, 'fetch_dataframe', return_value=dataframe):
+            result = self.manager.query_data(database, self.mock_table, metrics=self.metrics,
+                                             dimensions=self.dimensions,
+                                             pagination={'offset': 0, 'limit': 3,
+                                                         'orderby': [('clicks', Order.desc)]})
+
+        self.assertListEqual([30, 20, 10], list(result['clicks']))
+
+
 class DimensionOptionTests(QueryTests):
     def test_dimension_options(self):
         locale = self.mock_table.locale
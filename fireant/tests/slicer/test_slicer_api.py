@@ -1,4 +1,6 @@
 # coding: utf-8
+import subprocess
+import sys
 from datetime import date
 from unittest import TestCase
 
@@ -10,7 +12,7 @@ from pypika import JoinType
 from pypika import functions as fn, Tables, Case
 
 QUERY_BUILDER_PARAMS = {'table', 'database', 'joins', 'metrics', 'dimensions', 'mfilters', 'dfilters', 'references',
-                        'rollup'}
+                        'rollup', 'pagination', 'dtypes'}
 
 
 class SlicerSchemaTests(TestCase):
@@ -62,6 +64,9 @@ class SlicerSchemaTests(TestCase):
 
                 # Metric with suffix
                 Metric('join_metric', definition=fn.Sum(cls.test_join_table.join_metric), joins=['join1']),
+
+                # Metric with integer values
+                Metric('count', definition=fn.Count(cls.test_table.id), dtype='int64'),
             ],
 
             dimensions=[
@@ -270,6 +275,16 @@ class SlicerSchemaDimensionTests(SlicerSchemaTests):
         self.assertEqual('"test"."account_id"', str(query_schema['dimensions']['account']))
         self.assertEqual('"test"."account_name"', str(query_schema['dimensions']['account_display']))
 
+    def test_dtypes_of_metrics_and_dimensions(self):
+        query_schema = self.test_slicer.manager.data_query_schema(
+            metrics=['foo', 'bar', 'count'],
+            dimensions=['date', 'locale', ('clicks', 50, 100), 'account'],
+        )
+
+        self.assertDictEqual({'foo': 'float64', 'bar': 'float64', 'count': 'int64',
+                              'date': 'datetime64[ns]', 'locale': 'category'},
+                             query_schema['dtypes'])
+
 
 class SlicerSchemaFilterTests(SlicerSchemaTests):
     def test_cat_dimension_filter_eq(self):
@@ -1200,3 +1215,109 @@ class SlicerDisplaySchemaTests(SlicerSchemaTests):
             },
             display_schema
         )
+
+
+class SlicerLazyImportTests(TestCase):
+    def test_constructing_slicer_does_not_import_pandas(self):
+        script = ('import sys\n'
+                  'from fireant.slicer import *\n'
+                  'from fireant.tests.database.mock_database import TestDatabase\n'
+                  'from pypika import Table\n'
+                  'slicer = Slicer(Table("test"), TestDatabase(), metrics=[Metric("foo")])\n'
+                  'print(",".join(module for module in ["pandas", "numpy", "matplotlib"] if module in sys.modules))\n')
+
+        output = subprocess.check_output([sys.executable, '-c', script])
+
+        self.assertEqual('', output.decode('utf-8').strip())
+
+    def test_transformer_bundles_are_created_on_first_use(self):
+        slicer = Slicer(Tables('test')[0], TestDatabase(), metrics=[Metric('foo')])
+
+        self.assertNotIn('highcharts', vars(slicer))
+        self.assertIs(slicer.highcharts, slicer.highcharts)
+        self.assertTrue(callable(slicer.highcharts.line_chart_async))
+
+    def test_unknown_attribute(self):
+        slicer = Slicer(Tables('test')[0], TestDatabase(), metrics=[Metric('foo')])
+
+        with self.assertRaises(AttributeError):
+            slicer.geojson
+        with self.assertRaises(AttributeError):
+            slicer.highcharts.pie_chart
+
+
+class SlicerSchemaRecordTests(TestCase):
+    def test_records_use_slots(self):
+        metric = Metric('clicks', definition=fn.Sum(Tables('test')[0].clicks))
+
+        self.assertNotIn('key', vars(metric))
+        self.assertEqual('clicks', metric.key)
+
+    def test_records_with_custom_attributes_are_compared_by_value(self):
+        metric, other = Metric('clicks'), Metric('clicks')
+        metric.color, other.color = 'red', 'blue'
+
+        self.assertNotEqual(metric, other)
+        other.color = 'red'
+        self.assertEqual(metric, other)
+
+    def test_subclass_attributes_are_interned_separately(self):
+        class TaggedMetric(Metric):
+            def __init__(self, key, tag, **kwargs):
+                super(TaggedMetric, self).__init__(key, **kwargs)
+                self.tag = tag
+
+        test_table, = Tables('test')
+        slicers = [Slicer(test_table, TestDatabase(),
+                          metrics=[TaggedMetric('clicks', tag, definition=fn.Sum(test_table.clicks))])
+                   for tag in ('A', 'B', 'A')]
+
+        self.assertEqual(['A', 'B', 'A'], [slicer.metrics['clicks'].tag for slicer in slicers])
+        self.assertIs(slicers[0].metrics['clicks'], slicers[2].metrics['clicks'])
+
+    def test_records_are_compared_by_value(self):
+        test_table, = Tables('test')
+
+        self.assertEqual(Metric('clicks', definition=fn.Sum(test_table.clicks)),
+                         Metric('clicks', definition=fn.Sum(test_table.clicks)))
+        self.assertNotEqual(Metric('clicks', definition=fn.Sum(test_table.clicks)),
+                            Metric('clicks', definition=fn.Avg(test_table.clicks)))
+        self.assertNotEqual(Metric('clicks'), Dimension('clicks'))
+        self.assertEqual(CategoricalDimension('device', display_options=(DimensionValue('d'), DimensionValue('m'))),
+                         CategoricalDimension('device', display_options=(DimensionValue('d'), DimensionValue('m'))))
+
+    def test_records_can_be_used_as_keys(self):
+        test_table, = Tables('test')
+        metrics = {Metric('clicks', definition=fn.Sum(test_table.clicks)): 1}
+
+        self.assertEqual(1, metrics[Metric('clicks', definition=fn.Sum(test_table.clicks))])
+
+    def test_equal_records_are_shared_between_slicers(self):
+        test_table, join_table = Tables('test', 'join')
+
+        def make_slicer(label):
+            return Slicer(
+                test_table, TestDatabase(),
+                joins=[Join('join', join_table, test_table.join_id == join_table.id)],
+                metrics=[Metric('clicks', definition=fn.Sum(test_table.clicks)),
+                         Metric('cost', label=label, definition=fn.Sum(test_table.cost))],
+                dimensions=[DatetimeDimension('date', definition=test_table.dt)],
+            )
+
+        slicer, other = make_slicer('Cost'), make_slicer('Spend')
+
+        self.assertIs(slicer.metrics['clicks'], other.metrics['clicks'])
+        self.assertIs(slicer.dimensions['date'], other.dimensions['date'])
+        self.assertIs(slicer.joins['join'], other.joins['join'])
+        self.assertIsNot(slicer.metrics['cost'], other.metrics['cost'])
+        self.assertEqual('Spend', other.metrics['cost'].label)
+
+    def test_records_of_different_tables_are_not_shared(self):
+        tables = Tables(*['tenant_{}'.format(i) for i in range(3)])
+        slicers = [Slicer(table, TestDatabase(), metrics=[Metric('clicks', definition=fn.Sum(table.clicks))])
+                   for table in tables + tables]
+
+        metrics = [slicer.metrics['clicks'] for slicer in slicers]
+        self.assertEqual(3, len({id(metric) for metric in metrics}))
+        for metric, table in zip(metrics, tables + tables):
+            self.assertEqual(table, metric.definition.fields()[0].table)
@@ -1,7 +1,7 @@
 # coding: utf-8
 from unittest import TestCase
 
-from fireant.slicer.transformers import CSVRowIndexTransformer, CSVColumnIndexTransformer
+from fireant.slicer.transformers import CSVRowIndexTransformer, CSVColumnIndexTransformer, TransformationException
 from fireant.tests import mock_dataframes as mock_df
 
 
@@ -194,10 +194,31 @@ class CSVRowIndexTransformerTests(TestCase):
                          '7,B,Y,30,60\n'
                          '7,B,Z,31,62\n', result)
 
+    def test_transform_chunks(self):
+        df = mock_df.cont_dim_multi_metric_df
+
+        result = list(self.csv_tx.transform_chunks([df[:3], df[3:]], mock_df.cont_dim_multi_metric_schema))
+
+        self.assertListEqual(['Cont,One,Two\n'
+                              '0,0,0\n'
+                              '1,1,2\n'
+                              '2,2,4\n',
+                              '3,3,6\n'
+                              '4,4,8\n'
+                              '5,5,10\n'
+                              '6,6,12\n'
+                              '7,7,14\n'], result)
+
 
 class CSVColumnIndexTransformerTests(CSVRowIndexTransformerTests):
     csv_tx = CSVColumnIndexTransformer()
 
+    def test_transform_chunks(self):
+        df = mock_df.cont_dim_multi_metric_df
+
+        with self.assertRaises(TransformationException):
+            list(self.csv_tx.transform_chunks([df], mock_df.cont_dim_multi_metric_schema))
+
     def test_cont_cat_dim_single_metric(self):
         df = mock_df.cont_cat_dims_single_metric_df
 
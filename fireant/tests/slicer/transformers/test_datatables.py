@@ -1,4 +1,5 @@
 # coding: utf-8
+import json
 from collections import OrderedDict
 from datetime import date, datetime
 from unittest import TestCase
@@ -259,6 +260,36 @@ class DataTablesRowIndexTransformerTests(TestCase):
                  'cat1': {'value': 'b', 'display': 'B'}, 'cat2': {'value': 'z', 'display': 'Z'}}]}
             , result)
 
+    def test_render_by_column_matches_render_by_row(self):
+        df = pd.DataFrame({
+            'date': pd.date_range('2000-01-01', periods=6, freq='12H'),
+            'cat': ['a', 'b', None, 'a', 'b', None],
+            'one': [1.234, np.nan, 0., -2.5, 3.14159, 10.],
+            'two': [1, 2, 3, 4, 5, 6],
+        }).set_index(['date', 'cat'])
+        display_schema = {
+            'metrics': OrderedDict([('one', {'label': 'One', 'precision': 2, 'prefix': '$'}),
+                                    ('two', {'label': 'Two', 'suffix': '%'})]),
+            'dimensions': OrderedDict([('date', {'label': 'Date'}),
+                                       ('cat', {'label': 'Cat', 'display_options': {'a': 'A'}})]),
+            'references': OrderedDict(),
+        }
+
+        result = self.dt_tx._render_data(df, display_schema)
+
+        self.assertEqual(repr(self.dt_tx._render_data_by_row(df, display_schema)), repr(result))
+        self.assertDictEqual({'date': {'value': '2000-01-01T12:00:00'}, 'cat': {'display': 'b', 'value': 'b'},
+                              'one': {'value': None, 'display': '$None'}, 'two': {'value': 2.0, 'display': '2.0%'}},
+                             result[1])
+
+    def test_render_by_column_matches_render_by_row_with_references(self):
+        df = mock_df.time_dim_single_metric_ref_df
+        display_schema = mock_df.time_dim_single_metric_ref_schema
+
+        result = self.dt_tx._render_data(df, display_schema)
+
+        self.assertEqual(repr(self.dt_tx._render_data_by_row(df, display_schema)), repr(result))
+
 
 class DataTablesColumnIndexTransformerTests(TestCase):
     maxDiff = None
@@ -641,3 +672,14 @@ class DatatablesUtilityTests(TestCase):
     def test_suffix(self):
         result = datatables._pretty(0.12, {'suffix': '€'})
         self.assertEqual('0.12€', result)
+
+
+class DataTablesJSONTests(TestCase):
+    def test_transform_json(self):
+        tx = DataTablesRowIndexTransformer()
+        df, display_schema = mock_df.time_dim_single_metric_ref_df, mock_df.time_dim_single_metric_ref_schema
+
+        result = tx.transform_json(df, display_schema)
+
+        self.assertIsInstance(result, bytes)
+        self.assertEqual(json.loads(json.dumps(tx.transform(df, display_schema))), json.loads(result.decode('utf-8')))
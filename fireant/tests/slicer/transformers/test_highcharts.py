@@ -1,13 +1,15 @@
 # coding: utf-8
+import json
 from datetime import date
 from unittest import TestCase
 
 import numpy as np
 import pandas as pd
+from mock import patch
 
 from fireant.slicer.transformers import (HighchartsLineTransformer, HighchartsColumnTransformer,
                                          HighchartsBarTransformer)
-from fireant.slicer.transformers import highcharts
+from fireant.slicer.transformers import highcharts, serialization
 from fireant.tests import mock_dataframes as mock_df
 
 
@@ -416,3 +418,176 @@ class HighchartsUtilityTests(TestCase):
         # Needs to be cast to python int
         result = highcharts._format_data_point(np.nan)
         self.assertIsNone(result)
+
+
+class HighchartsVectorizedDataTests(TestCase):
+    """
+    The series data is converted a column at a time which must give the same result as converting each point.
+    """
+    hc_tx = HighchartsLineTransformer()
+
+    def format_by_point(self, column):
+        return [HighchartsLineTransformer._format_point(key, value)
+                for key, value in column.items()
+                if not (isinstance(value, (float, int)) and np.isnan(value))]
+
+    def test_datetime_index_with_nans(self):
+        column = pd.Series([1.5, np.nan, 3., np.nan], index=pd.date_range('2000-01-01', periods=4, freq='H'))
+
+        result = self.hc_tx._format_data(column)
+
+        self.assertListEqual(self.format_by_point(column), result)
+        self.assertListEqual([(946684800000, 1.5), (946692000000, 3.)], result)
+
+    def test_timezone_aware_datetime_index(self):
+        column = pd.Series([1., 2.], index=pd.date_range('2000-01-01', periods=2, freq='D', tz='Europe/Berlin'))
+
+        self.assertListEqual(self.format_by_point(column), self.hc_tx._format_data(column))
+
+    def test_dates_before_epoch(self):
+        column = pd.Series([1., 2.], index=pd.to_datetime(['1969-12-31 23:59:59.9995', '1960-01-01']))
+
+        self.assertListEqual(self.format_by_point(column), self.hc_tx._format_data(column))
+
+    def test_int_index(self):
+        column = pd.Series([1., np.nan, 2.], index=[3, 4, 5])
+
+        result = self.hc_tx._format_data(column)
+
+        self.assertListEqual([(3, 1.), (5, 2.)], result)
+        self.assertIs(int, type(result[0][0]))
+
+    def test_float_index_with_nan(self):
+        column = pd.Series([1., 2.], index=[0.5, np.nan])
+
+        self.assertListEqual([(0.5, 1.), (None, 2.)], self.hc_tx._format_data(column))
+
+    def test_object_index(self):
+        column = pd.Series([1., np.nan, 2.], index=['a', 'b', np.nan])
+
+        self.assertListEqual(self.format_by_point(column), self.hc_tx._format_data(column))
+
+    def test_shared_x_values(self):
+        df = pd.DataFrame({'a': [1., np.nan], 'b': [np.nan, 2.]},
+                          index=pd.date_range('2000-01-01', periods=2, freq='D'))
+        x_values = highcharts._format_data_points(df.index)
+
+        for _, column in df.items():
+            self.assertListEqual(self.format_by_point(column), self.hc_tx._format_data(column, x_values))
+
+    def test_column_series_data(self):
+        df = pd.DataFrame({'ints': np.array([1, 2, 3], dtype=np.int64),
+                           'floats': [1.5, np.nan, 2.5],
+                           'objects': ['a', np.nan, 'c']},
+                          columns=['ints', 'floats', 'objects'])
+        display_schema = {'metrics': {key: {'label': key} for key in df.columns}, 'dimensions': {}}
+
+        result = HighchartsColumnTransformer().transform(df, display_schema)
+
+        self.assertListEqual([[1, 2, 3], [1.5, 2.5], ['a', 'c']],
+                             [series['data'] for series in result['series']])
+        self.assertIs(int, type(result['series'][0]['data'][0]))
+
+    def test_format_data_points_with_nat(self):
+        values = np.array(['2000-01-01', 'NaT'], dtype='datetime64[ns]')
+
+        result = highcharts._format_data_points(values)
+
+        self.assertEqual(946684800000, result[0])
+        self.assertIs(pd.NaT, result[1])
+
+    def test_float_metrics_are_not_cast(self):
+        df = pd.DataFrame({'a': [1., np.inf]}, index=pd.date_range('2000-01-01', periods=2, freq='D'))
+
+        with patch.object(pd.DataFrame, 'astype') as mock_astype:
+            result = self.hc_tx._prepare_dataframe(df, 0, {'date': {}})
+
+        mock_astype.assert_not_called()
+        self.assertListEqual([1.], list(result['a'].dropna()))
+
+    def test_int_metrics_are_cast_to_float(self):
+        df = pd.DataFrame({'a': np.array([1, 2], dtype=np.int64)},
+                          index=pd.date_range('2000-01-01', periods=2, freq='D'))
+
+        result = self.hc_tx._prepare_dataframe(df, 0, {'date': {}})
+
+        self.assertEqual(np.float64, result['a'].dtype)
+
+
+class HighchartsJSONTests(TestCase):
+    """
+    The JSON of a chart must be the same as serializing the result of ``transform``, whether or not the fast encoder is
+    installed.
+    """
+
+    def assert_same_json(self, tx, df, display_schema):
+        expected = json.dumps(tx.transform(df, display_schema), separators=(',', ':')).encode('utf-8')
+
+        self.assertEqual(expected, tx.transform_json(df, display_schema))
+        with patch.object(serialization, 'orjson', None):
+            self.assertEqual(expected, tx.transform_json(df, display_schema))
+
+    def test_line_chart_time_series_with_ref(self):
+        self.assert_same_json(HighchartsLineTransformer(), mock_df.time_dim_single_metric_ref_df,
+                              mock_df.time_dim_single_metric_ref_schema)
+
+    def test_line_chart_multiple_dimensions(self):
+        self.assert_same_json(HighchartsLineTransformer(), mock_df.cont_cat_dims_multi_metric_df,
+                              mock_df.cont_cat_dims_multi_metric_schema)
+
+    def test_line_chart_with_nans(self):
+        df = mock_df.time_dim_single_metric_df.copy()
+        df.iloc[1::2] = np.nan
+
+        self.assert_same_json(HighchartsLineTransformer(), df, mock_df.time_dim_single_metric_schema)
+
+    def test_column_chart(self):
+        self.assert_same_json(HighchartsColumnTransformer(), mock_df.cat_dim_multi_metric_df,
+                              mock_df.cat_dim_multi_metric_schema)
+
+    def test_bar_chart(self):
+        self.assert_same_json(HighchartsBarTransformer(), mock_df.uni_dim_multi_metric_df,
+                              mock_df.uni_dim_multi_metric_schema)
+
+    def test_series_data_are_arrays(self):
+        df = mock_df.cont_dim_single_metric_df.copy()
+        df.index = df.index.astype(np.float64)
+
+        tx = HighchartsLineTransformer()
+        result = tx._make_chart(df, mock_df.cont_dim_single_metric_schema, arrays=True)
+
+        self.assertIsInstance(result['series'][0]['data'], np.ndarray)
+
+    def test_time_series_data_are_arrays(self):
+        tx = HighchartsLineTransformer()
+        result = tx._make_chart(mock_df.time_dim_single_metric_df, mock_df.time_dim_single_metric_schema, arrays=True)
+
+        data = result['series'][0]['data']
+        self.assertIsInstance(data, serialization.IntegerPoints)
+        self.assertEqual(np.int64, data.x.dtype)
+        self.assertEqual(np.float64, data.y.dtype)
+
+    def test_integer_points_json(self):
+        points = serialization.IntegerPoints(np.array([-10, 0, 946684800000], dtype=np.int64),
+                                             np.array([0., 1.5, 1e20]))
+        expected = json.dumps(points.tolist(), separators=(',', ':')).encode('utf-8')
+
+        self.assertEqual(expected, serialization.dumps(points))
+        with patch.object(serialization, 'orjson', None):
+            self.assertEqual(expected, serialization.dumps(points))
+
+    def test_integer_points_too_large_for_floats_are_serialized_from_lists(self):
+        points = serialization.IntegerPoints(np.array([2 ** 53 + 1], dtype=np.int64), np.array([1.]))
+
+        self.assertIsNone(points.to_json())
+        self.assertEqual('[[{},1.0]]'.format(2 ** 53 + 1).encode('utf-8'), serialization.dumps(points))
+
+    def test_time_series_timestamps_are_integers(self):
+        tx = HighchartsLineTransformer()
+        df = mock_df.time_dim_single_metric_df
+
+        result = tx.transform_json(df, mock_df.time_dim_single_metric_schema)
+
+        timestamp = int(df.index[0].asm8) // int(1e6)
+        self.assertIn('[{},'.format(timestamp).encode('utf-8'), result)
+        self.assertNotIn('[{}.0,'.format(timestamp).encode('utf-8'), result)
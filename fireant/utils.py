@@ -1,7 +1,10 @@
 # coding: utf-8
+import copy
 import itertools
+import threading
+from collections import OrderedDict
 
-import pandas as pd
+from pypika.terms import Term
 
 
 def dimension_levels(dimension_key, dimension):
@@ -21,6 +24,8 @@ def slice_first(item):
 
 
 def correct_dimension_level_order(dataframe, display_schema):
+    import pandas as pd
+
     if isinstance(dataframe.index, pd.MultiIndex):
         dimension_orders = [order
                             for key, dimension in display_schema['dimensions'].items()
@@ -49,3 +54,160 @@ def filter_duplicates(iterable):
         filtered_list.append(item)
 
     return filtered_list
+
+
+def terms_equal(term, other):
+    """
+    Compares two PyPika terms or criteria by their structure.  PyPika overloads the == operator of terms to build
+    criteria so it cannot be used to compare them.  The aliases of terms are ignored since they do not change the value
+    of the term.
+    """
+    if term is other:
+        return True
+
+    if type(term) is not type(other):
+        return False
+
+    if isinstance(term, (list, tuple)):
+        return len(term) == len(other) and all(terms_equal(a, b) for a, b in zip(term, other))
+
+    if hasattr(term, '__dict__'):
+        ignored = {'alias'} if isinstance(term, Term) else set()
+        attrs, other_attrs = vars(term), vars(other)
+        keys = set(attrs) - ignored
+        return keys == set(other_attrs) - ignored and all(terms_equal(attrs[key], other_attrs[key]) for key in keys)
+
+    return term == other
+
+
+def terms_key(term):
+    """
+    Converts PyPika terms or criteria into a hashable value of their structure.  The keys of two terms are equal exactly
+    when the terms are equal by ``terms_equal``, so terms can be looked up by their structure in a dict without
+    comparing them with every other term.
+    """
+    if isinstance(term, (list, tuple)):
+        return (type(term),) + tuple(terms_key(item) for item in term)
+
+    if isinstance(term, dict):
+        return (dict,) + tuple(sorted(((key, terms_key(value)) for key, value in term.items()),
+                                      key=lambda item: str(item[0])))
+
+    if type(term).__hash__ in (None, object.__hash__) and hasattr(term, '__dict__'):
+        # Terms and criteria are compared by their attributes, other values such as tables and enums by their hash
+        ignored = {'alias'} if isinstance(term, Term) else set()
+        return (type(term),) + tuple(sorted((key, terms_key(value))
+                                            for key, value in vars(term).items()
+                                            if key not in ignored))
+
+    return term
+
+
+def replace_table(term, table, new_table):
+    """
+    Returns a copy of a PyPika term or criterion in which the fields of a table are replaced by the fields with the same
+    names in another table.  Fields of other tables, such as joined tables, are not changed.
+    """
+    term = copy.deepcopy(term)
+    for field in term.fields():
+        if terms_equal(field.table, table):
+            field.table = new_table
+    return term
+
+
+def freeze(value):
+    """
+    Converts a request parameter into an equivalent hashable value so that it can be used as a dictionary key.  Lists
+    and tuples are converted to tuples, dicts and sets to their sorted or frozen counterparts, and objects which are
+    compared by identity, such as filters, references and operations, to their type and attributes.  Other values, such
+    as strings, dates and timestamps, are already hashable by value and are returned unchanged.
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted(((key, freeze(item)) for key, item in value.items()), key=lambda item: str(item[0])))
+
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(item) for item in value)
+
+    if type(value).__hash__ is object.__hash__ and hasattr(value, '__dict__'):
+        return (type(value),) + freeze(vars(value))
+
+    return value
+
+
+class LRUCache(object):
+    """
+    A thread-safe dict-like cache which holds at most `maxsize` items and evicts the least recently used item first.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+
+            # Re-insert to mark the item as the most recently used
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+
+            while self.maxsize < len(self._items):
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def then(awaitable, func):
+    """
+    Returns an asyncio future which resolves to the result of calling `func` with the result of `awaitable`.  Errors and
+    cancellation are passed on in both directions.
+
+    This is used to chain asynchronous steps without coroutine syntax so that fireant can still be imported in Python 2.
+    """
+    import asyncio
+
+    inner = asyncio.ensure_future(awaitable)
+    outer = asyncio.get_event_loop().create_future()
+
+    def resolve(done):
+        if outer.done():
+            return
+
+        if done.cancelled():
+            outer.cancel()
+            return
+
+        exception = done.exception()
+        if exception is not None:
+            outer.set_exception(exception)
+            return
+
+        try:
+            outer.set_result(func(done.result()))
+        except Exception as e:
+            outer.set_exception(e)
+
+    def cancel(done):
+        if done.cancelled():
+            inner.cancel()
+
+    inner.add_done_callback(resolve)
+    outer.add_done_callback(cancel)
+    return outer
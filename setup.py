@@ -58,14 +58,22 @@ setup(
     install_requires=[
         'six',
         'pandas==0.18.1',
-        'pypika==0.1.2'
+        'pypika==0.1.2',
+        # concurrent.futures is used to run queries in parallel and is only in the standard library in Python 3
+        'futures; python_version < "3"',
     ],
     tests_require=[
         'mock'
     ],
     extras_require={
         'vertica': ['vertica-python>=0.6'],
+        'postgresql': ['psycopg2'],
+        'mysql': ['pymysql'],
         'matplotlib': ['matplotlib'],
+        # orjson.Fragment is used to serialize the timestamps of time series as integers
+        'json': ['orjson>=3.9'],
+        # Only used with pandas 0.23 or later, which pyarrow 0.17 requires
+        'arrow': ['pyarrow>=0.17'],
     },
 
     test_suite='fireant.tests',